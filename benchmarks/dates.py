@@ -0,0 +1,125 @@
+'''
+Date normalization with and without the ISO 8601 fast path and memo
+
+Collects the date values of the CKAN dicts in `examples/ckan` and
+normalizes them (as done when serializing and validating datasets) with:
+
+* `dateutil`: the XSD regular expressions and `dateutil` for other values,
+  the previous approach
+* `fast path`: the hand-written ISO 8601 parser, falling back to `dateutil`
+* `memoized`: the fast path plus the memo of raw strings, as used by the
+  profiles and validators
+
+Values are repeated to simulate the datasets of a catalog page.
+
+Usage:
+
+    python benchmarks/dates.py --repeat 1000
+
+It needs ckanext-dcat installed, but not a CKAN site.
+'''
+import argparse
+import glob
+import json
+import os
+import time
+
+from dateutil.parser import parse as parse_date
+from rdflib.namespace import XSD
+
+from ckanext.dcat import dates
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'ckan')
+
+DATE_KEYS = {
+    'issued', 'modified', 'created', 'metadata_created', 'metadata_modified',
+    'last_modified', 'temporal_start', 'temporal_end', 'start', 'end',
+    'retention_start', 'retention_end',
+}
+
+
+def _date_values(value, key=None):
+    if isinstance(value, dict):
+        if 'key' in value and 'value' in value:
+            # Extra
+            key = value['key']
+            if key.startswith('dcat_'):
+                key = key[5:]
+            yield from _date_values(value['value'], key)
+        else:
+            for _key, _value in value.items():
+                yield from _date_values(_value, _key)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _date_values(item, key)
+    elif isinstance(value, str) and value and key in DATE_KEYS:
+        yield value
+
+
+def dateutil_normalize_date(value):
+    if dates.is_year(value):
+        return XSD.gYear, value
+    elif dates.is_year_month(value):
+        return XSD.gYearMonth, value
+    elif dates.is_date(value):
+        return XSD.date, value
+    try:
+        _date = parse_date(value, default=dates.DEFAULT_DATETIME)
+        return XSD.dateTime, _date.isoformat()
+    except ValueError:
+        return None, value
+
+
+def fast_path_normalize_date(value):
+    # Normalization without the memo
+    if dates.is_year(value):
+        return XSD.gYear, value
+    elif dates.is_year_month(value):
+        return XSD.gYearMonth, value
+    elif dates.is_date(value):
+        return XSD.date, value
+    iso_value = dates._iso_datetime(value)
+    if iso_value is None:
+        return None, value
+    return XSD.dateTime, iso_value
+
+
+def run(name, normalize, values):
+    start = time.time()
+    results = [normalize(value) for value in values]
+    elapsed = time.time() - start
+    print('{0:<12} {1:>10} {2:>10.3f} {3:>14.2f}'.format(
+        name, len(values), elapsed, elapsed / len(values) * 1000000))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=1000,
+                        help='Times each example value is normalized '
+                             '(default 1000)')
+    parser.add_argument('--files', nargs='*',
+                        default=sorted(
+                            glob.glob(os.path.join(EXAMPLES_DIR, '*.json'))),
+                        help='CKAN dicts (default examples/ckan)')
+    args = parser.parse_args()
+
+    values = []
+    for path in args.files:
+        with open(path) as f:
+            values.extend(_date_values(json.load(f)))
+    print('{0} date values ({1} distinct) in {2} files\n'.format(
+        len(values), len(set(values)), len(args.files)))
+    values = values * args.repeat
+
+    print('{0:<12} {1:>10} {2:>10} {3:>14}'.format(
+        'method', 'values', 'time (s)', 'per value (us)'))
+    expected = run('dateutil', dateutil_normalize_date, values)
+    assert run('fast path', fast_path_normalize_date, values) == expected
+    dates.cache_clear()
+    assert run('memoized', dates.normalize_date, values) == expected
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+'''
+Parsing the datasets of a large catalog serially and on worker processes
+
+Builds a catalog by repeating the datasets of the files in `examples/dcat`
+(as `store_memory.py` does), loads it in an `RDFParser` and times running
+the profiles on all datasets:
+
+* serially, as `RDFParser.datasets()` does
+* on a pool of N forked processes, each inheriting the parsed graph and
+  the loaded profiles, and receiving only the dataset references
+
+Only the time spent running the profiles is measured, not loading the
+graph. Run it on a multi-core host, with no more workers than cores.
+
+Usage:
+
+    python benchmarks/parse_parallel.py --datasets 10000 --workers 2,4
+
+It needs CKAN and ckanext-dcat installed, but not a CKAN site.
+'''
+import argparse
+import gc
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+from store_memory import EXAMPLES_DIR, _templates, _chunks
+
+# Parser used by the worker processes
+_worker_parser = None
+
+
+def _init_worker(parser):
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_in_worker(dataset_ref):
+    return _worker_parser._parse_dataset(dataset_ref)
+
+
+def _serial(parser, dataset_refs):
+    return [parser._parse_dataset(ref) for ref in dataset_refs]
+
+
+def _parallel(parser, dataset_refs, workers):
+    gc.freeze()
+    try:
+        pool = multiprocessing.get_context('fork').Pool(
+            workers, initializer=_init_worker, initargs=(parser,))
+    finally:
+        gc.unfreeze()
+    with pool:
+        return list(pool.imap(_parse_in_worker, dataset_refs, chunksize=10))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--datasets', type=int, default=10000,
+                        help='Number of datasets to parse (default 10000)')
+    parser.add_argument('--workers', default='2,4',
+                        help='Comma separated list of pool sizes to compare '
+                             'with the serial run (default 2,4)')
+    parser.add_argument('--files', nargs='*',
+                        default=sorted(
+                            glob.glob(os.path.join(EXAMPLES_DIR, '*.rdf'))
+                            + glob.glob(os.path.join(EXAMPLES_DIR, '*.ttl'))),
+                        help='Example files (default examples/dcat)')
+    args = parser.parse_args()
+
+    from ckanext.dcat.processors import RDFParser
+
+    rdf_parser = RDFParser()
+    for chunk in _chunks(_templates(args.files), args.datasets):
+        rdf_parser.g.parse(data=chunk, format='nt')
+    dataset_refs = list(rdf_parser._datasets())
+
+    print('{0} datasets, {1} triples, {2} cores'.format(
+        len(dataset_refs), len(rdf_parser.g), os.cpu_count()))
+    print('{0:<10} {1:>10} {2:>10}'.format('workers', 'time (s)', 'speedup'))
+    sys.stdout.flush()
+
+    start = time.time()
+    expected = _serial(rdf_parser, dataset_refs)
+    serial = time.time() - start
+    print('{0:<10} {1:>10.1f} {2:>10.2f}'.format('serial', serial, 1))
+    sys.stdout.flush()
+
+    for workers in [int(w) for w in args.workers.split(',')]:
+        start = time.time()
+        result = _parallel(rdf_parser, dataset_refs, workers)
+        elapsed = time.time() - start
+        assert result == expected
+        print('{0:<10} {1:>10.1f} {2:>10.2f}'.format(
+            workers, elapsed, serial / elapsed))
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+'''
+Memory usage of the RDF parser stores on large catalogs
+
+Builds a catalog by repeating the datasets of the files in `examples/dcat`
+(renaming the datasets, distributions and blank nodes of each copy) and
+parses it with each store, reporting the time and the increase of the
+resident memory of the process. Each store is run on a separate process.
+
+Usage:
+
+    python benchmarks/store_memory.py --datasets 100000 --stores Memory,compact
+
+It needs CKAN and ckanext-dcat installed, but not a CKAN site.
+'''
+import argparse
+import glob
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from rdflib import Graph, URIRef, BNode
+from rdflib.namespace import RDF
+from rdflib.plugins.serializers.nt import _nt_row
+
+EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'examples', 'dcat')
+
+FORMATS = {'.rdf': 'xml', '.ttl': 'turtle', '.jsonld': 'json-ld'}
+
+MARKER = 'COPYMARKER'
+
+CHUNK_SIZE = 1000
+
+
+def _rss():
+    # Current resident memory in bytes
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _templates(files):
+    '''
+    Returns a list of (number of datasets, N-Triples template) tuples, with
+    the datasets, distributions and blank nodes of each file marked to be
+    renamed on each copy
+    '''
+    from ckanext.dcat.profiles import DCAT
+
+    templates = []
+    for path in files:
+        g = Graph()
+        try:
+            g.parse(path, format=FORMATS[os.path.splitext(path)[1]])
+        except Exception as e:
+            sys.stderr.write('Skipping {0}: {1}\n'.format(
+                os.path.basename(path), str(e).splitlines()[0]))
+            continue
+        datasets = set(g.subjects(RDF.type, DCAT.Dataset))
+        if not datasets:
+            continue
+        renamed = datasets | set(g.subjects(RDF.type, DCAT.Distribution))
+
+        def _copy_term(term):
+            if isinstance(term, BNode):
+                return BNode('c{0}x{1}'.format(MARKER, term))
+            if term in renamed:
+                return URIRef('{0}-{1}'.format(term, MARKER))
+            return term
+
+        templates.append((len(datasets), ''.join(
+            _nt_row(tuple(_copy_term(term) for term in triple))
+            for triple in g)))
+    return templates
+
+
+def _chunks(templates, datasets):
+    copy = 0
+    count = 0
+    while count < datasets:
+        chunk = []
+        for _ in range(CHUNK_SIZE):
+            if count >= datasets:
+                break
+            size, template = templates[copy % len(templates)]
+            chunk.append(template.replace(MARKER, str(copy)))
+            count += size
+            copy += 1
+        yield ''.join(chunk)
+
+
+def run(store_name, datasets, files):
+    from ckanext.dcat.processors import RDFParser
+
+    templates = _templates(files)
+
+    rss = _rss()
+    start = time.time()
+
+    parser = RDFParser(store=store_name)
+    for chunk in _chunks(templates, datasets):
+        parser.g.parse(data=chunk, format='nt')
+    triples = len(parser.g)
+
+    print('{0:<10} {1:>10} {2:>12} {3:>10.1f} {4:>12.1f}'.format(
+        store_name, datasets, triples, time.time() - start,
+        (_rss() - rss) / 1024 / 1024))
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--datasets', type=int, default=100000,
+                        help='Number of datasets to parse (default 100000)')
+    parser.add_argument('--stores', default='Memory,compact',
+                        help='Comma separated list of stores to compare '
+                             '(default Memory,compact)')
+    parser.add_argument('--files', nargs='*',
+                        default=sorted(
+                            glob.glob(os.path.join(EXAMPLES_DIR, '*.rdf'))
+                            + glob.glob(os.path.join(EXAMPLES_DIR, '*.ttl'))),
+                        help='Example files (default examples/dcat)')
+    parser.add_argument('--run-one', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run(args.run_one, args.datasets, args.files)
+        return
+
+    print('{0:<10} {1:>10} {2:>12} {3:>10} {4:>12}'.format(
+        'store', 'datasets', 'triples', 'time (s)', 'memory (MB)'))
+    sys.stdout.flush()
+    for store_name in args.stores.split(','):
+        subprocess.call(
+            [sys.executable, __file__, '--run-one', store_name,
+             '--datasets', str(args.datasets), '--files'] + args.files)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ import click
 
 import ckan.plugins.toolkit as tk
 
+import ckanext.dcat.dump as dump
+import ckanext.dcat.output_cache as output_cache
+import ckanext.dcat.prerender as prerender
 import ckanext.dcat.utils as utils
 from ckanext.dcat.processors import (
     RDFParser,
@@ -111,10 +114,17 @@ def consume(input, output, format, profiles, pretty, compat_mode):
     help=f"RDF profiles to use. If not provided will be read from config, "
     "if not present there, the default will be used: {DEFAULT_RDF_PROFILES}",
 )
+@click.option(
+    "-M",
+    "--merge",
+    is_flag=True,
+    help="When providing a list of datasets, serialize all of them in a single "
+    "graph instead of one serialization per dataset",
+)
 @click.option(
     "-m", "--compat_mode", is_flag=True, help="Compatibility mode (deprecated)"
 )
-def produce(input, output, format, profiles, compat_mode):
+def produce(input, output, format, profiles, merge, compat_mode):
     """
     Transforms CKAN dataset JSON objects into DCAT RDF serializations.
 
@@ -133,12 +143,138 @@ def produce(input, output, format, profiles, compat_mode):
     serializer = RDFSerializer(profiles=profiles, compatibility_mode=compat_mode)
 
     dataset = json.loads(contents)
-    if isinstance(dataset, list):
-        out = serializer.serialize_datasets(dataset, _format=format)
+    if isinstance(dataset, list) and merge:
+        output.write(serializer.serialize_datasets(dataset, _format=format, merge=True))
+    elif isinstance(dataset, list):
+        for i, out in enumerate(
+            serializer.iter_serialize_datasets(dataset, _format=format)
+        ):
+            if i:
+                output.write("\n")
+            output.write(out)
     else:
         out = serializer.serialize_dataset(dataset, _format=format)
 
-    output.write(out)
+        output.write(out)
+
+
+@dcat.command("dump", context_settings={"show_default": True})
+@click.argument("output_dir", type=click.Path(file_okay=False))
+@click.option(
+    "-f",
+    "--format",
+    type=click.Choice(dump.DUMP_FORMATS),
+    default="nt",
+    help="Serialization format",
+)
+@click.option(
+    "-p",
+    "--profiles",
+    help=f"RDF profiles to use. If not provided will be read from config, "
+    "if not present there, the default will be used: {DEFAULT_RDF_PROFILES}",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=dump.DEFAULT_BATCH_SIZE,
+    help="Number of datasets on each output file",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of processes used to serialize the datasets",
+)
+@click.option(
+    "-r",
+    "--resume",
+    is_flag=True,
+    help="Keep the files generated by a previous run with the same options "
+    "and only generate the missing ones",
+)
+def dump_catalog(output_dir, format, profiles, batch_size, workers, resume):
+    """
+    Dumps all public datasets of the site as DCAT RDF serializations.
+
+    The output is written to OUTPUT_DIR as gzip-compressed files, one with
+    the catalog description and one for each batch of datasets, plus a
+    manifest.json file describing them, e.g.:
+
+        ckan dcat dump -f ttl --workers 4 /var/lib/ckan/dcat-dump
+    """
+    profiles = _get_profiles(profiles)
+
+    manifest = dump.dump_catalog(
+        output_dir,
+        _format=format,
+        profiles=profiles,
+        batch_size=batch_size,
+        workers=workers,
+        resume=resume,
+    )
+
+    click.secho(
+        "Dumped {0} datasets in {1} files to {2}".format(
+            sum(shard["count"] for shard in manifest["shards"]),
+            len(manifest["shards"]),
+            output_dir,
+        ),
+        fg="green",
+    )
+
+
+@dcat.command("clear-output-cache")
+def clear_output_cache():
+    """
+    Removes all the serialized datasets stored in the output cache
+    (see ckanext.dcat.output_cache.backend).
+    """
+    try:
+        backend = output_cache.backend_from_config()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if backend is None:
+        click.secho("The output cache is not enabled", fg="yellow")
+    elif isinstance(backend, output_cache.MemoryBackend):
+        click.secho(
+            "The memory output cache is kept by each CKAN process, "
+            "restart them to clear it",
+            fg="yellow",
+        )
+    else:
+        backend.clear()
+        click.secho("Cleared the output cache", fg="green")
+
+
+@dcat.command("prerender")
+@click.option(
+    "-f",
+    "--formats",
+    help="Formats to render, separated by spaces. If not provided will be "
+    "read from config (ckanext.dcat.prerender.formats)",
+)
+def prerender_catalog(formats):
+    """
+    Renders all the pages of the catalog endpoint to the directory set in
+    ckanext.dcat.prerender.directory, so they are served without rendering
+    them on each request.
+    """
+    try:
+        pages = prerender.render_catalog(
+            formats=formats.split() if formats else None
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.secho(
+        "Rendered {0} catalog pages to {1}".format(
+            pages, prerender.prerender_directory()
+        ),
+        fg="green",
+    )
 
 
 def get_commands():
@@ -0,0 +1,194 @@
+"""
+Compression of the RDF endpoint responses
+
+RDF serializations compress very well (RDF/XML and JSON-LD catalog pages
+often 10 to 20 times), so the dataset and catalog endpoints compress their
+responses with the best of the encodings in
+`ckanext.dcat.compression.encodings` accepted by the client
+(`Accept-Encoding` header), instead of relying on a proxy to compress them
+on every request.
+
+Compressed variants are stored alongside the outputs that are already kept:
+in the output cache (see `ckanext.dcat.output_cache`) for datasets, and as
+files next to the pre-rendered catalog pages (see `ckanext.dcat.prerender`),
+so repeated requests are served without compressing them again.
+
+`gzip` is always available. `br` requires the `brotli` package and `zstd`
+the `zstandard` one.
+"""
+import os
+import tempfile
+import zlib
+
+from ckantoolkit import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENCODINGS_CONFIG = "ckanext.dcat.compression.encodings"
+
+DEFAULT_COMPRESSION_ENCODINGS = ["gzip"]
+
+FILE_EXTENSIONS = {
+    "gzip": ".gz",
+    "br": ".br",
+    "zstd": ".zst",
+}
+
+# Levels used when compressing responses, and when compressing files that
+# are stored and served many times
+LEVELS = {
+    "gzip": (6, 9),
+    "br": (5, 11),
+    "zstd": (3, 19),
+}
+
+
+def available_encodings():
+    """
+    Returns the encodings whose libraries are installed
+    """
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def configured_encodings():
+    """
+    Returns the encodings set in `ckanext.dcat.compression.encodings`, in
+    order of preference
+
+    An empty value disables the compression. Raises ValueError if an
+    encoding is not supported or its library is not installed.
+    """
+    value = config.get(COMPRESSION_ENCODINGS_CONFIG)
+    if value is None:
+        return DEFAULT_COMPRESSION_ENCODINGS
+    encodings = value.split() if isinstance(value, str) else list(value)
+    for encoding in encodings:
+        if encoding not in FILE_EXTENSIONS:
+            raise ValueError(
+                "Unknown compression encoding: {0}".format(encoding)
+            )
+        if encoding not in available_encodings():
+            raise ValueError(
+                'The "{0}" compression encoding requires the "{1}" '
+                "package".format(
+                    encoding, "brotli" if encoding == "br" else "zstandard"
+                )
+            )
+    return encodings
+
+
+def negotiate_encoding(request):
+    """
+    Returns the configured encoding preferred by the client of the request,
+    or None if the response should not be compressed
+    """
+    encodings = configured_encodings()
+    if not encodings:
+        return None
+    return request.accept_encodings.best_match(encodings)
+
+
+class _Compressor(object):
+    def __init__(self, encoding, best=False):
+        if encoding not in LEVELS:
+            raise ValueError(
+                "Unknown compression encoding: {0}".format(encoding)
+            )
+        level = LEVELS[encoding][1 if best else 0]
+        if encoding == "gzip":
+            obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress = obj.compress
+            self.flush = obj.flush
+        elif encoding == "br":
+            obj = brotli.Compressor(quality=level)
+            self.compress = obj.process
+            self.flush = obj.finish
+        elif encoding == "zstd":
+            obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress = obj.compress
+            self.flush = obj.flush
+
+
+def compress(data, encoding, best=False):
+    """
+    Returns the data (bytes or a string, encoded as UTF-8) compressed with
+    `encoding`
+
+    With `best`, the highest compression level is used, which is slower
+    but worth it for outputs served many times.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    compressor = _Compressor(encoding, best=best)
+    return compressor.compress(data) + compressor.flush()
+
+
+def iter_compress(chunks, encoding):
+    """
+    Generator that compresses the provided chunks (eg of a streamed
+    response) with `encoding`
+    """
+    compressor = _Compressor(encoding)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def fresh_variant_file(path, encoding):
+    """
+    Returns the path of the variant of the file compressed with `encoding`,
+    or None if it does not exist or is older than the file
+    """
+    variant_path = path + FILE_EXTENSIONS[encoding]
+    try:
+        if os.path.getmtime(variant_path) >= os.path.getmtime(path):
+            return variant_path
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def variant_file(path, encoding):
+    """
+    Returns the path of the variant of the file compressed with `encoding`
+
+    The variant is created if it does not exist or is older than the file,
+    and written atomically, so it can be served right away by any process.
+    It is compressed with the highest level, so this is meant to be run
+    when the file is written, not on requests.
+    """
+    variant_path = fresh_variant_file(path, encoding)
+    if variant_path:
+        return variant_path
+    variant_path = path + FILE_EXTENSIONS[encoding]
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+    try:
+        compressor = _Compressor(encoding, best=True)
+        with open(path, "rb") as source, os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                f.write(compressor.compress(chunk))
+            f.write(compressor.flush())
+        os.replace(tmp_path, variant_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return variant_path
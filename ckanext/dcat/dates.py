@@ -0,0 +1,171 @@
+"""
+Normalization of date values
+
+Date values of datasets and resources are added to the graph with the most
+specific XSD type they match (`xsd:gYear`, `xsd:gYearMonth`, `xsd:date`) or
+as `xsd:dateTime` values if they can be parsed as a date and time. They are
+validated the same way by the `dcat_date` validator.
+
+The ISO 8601 forms used by CKAN (eg `2024-04-10T10:07:31.182680`) are
+parsed by hand, and only other values are passed to `dateutil`, which is
+much slower. As the same values appear again and again (eg the creation and
+modification dates of resources created at once), the results are memoized
+for each raw string.
+"""
+import datetime
+import re
+from functools import lru_cache
+
+from dateutil.parser import parse as parse_date
+from rdflib.namespace import XSD
+
+# Number of raw strings whose normalized values are kept
+DATE_CACHE_SIZE = 10000
+
+# Default for the parts missing in the values parsed as date and time
+DEFAULT_DATETIME = datetime.datetime(1, 1, 1, 0, 0, 0)
+
+# https://www.w3.org/TR/xmlschema11-2/#gYear
+regexp_xsd_year = re.compile(
+    r"-?([1-9][0-9]{3,}|0[0-9]{3})(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
+)
+
+# https://www.w3.org/TR/xmlschema11-2/#gYearMonth
+regexp_xsd_year_month = re.compile(
+    r"-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
+)
+
+regexp_xsd_date = re.compile(
+    r"-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
+)
+
+# YYYY[-MM[-DD[(T| )HH:MM[:SS[.ffffff]][Z|(+|-)HH[[:]MM]]]]], from year 1000 (dateutil
+# reads lower years as two digit ones)
+regexp_iso_datetime = re.compile(
+    r"([1-9][0-9]{3})(?:-([0-9]{2})(?:-([0-9]{2})"
+    r"(?:[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,6}))?)?"
+    r"(Z|[+-][0-9]{2}(?::?[0-9]{2})?)?)?)?)?"
+)
+
+
+def is_year(value):
+    return regexp_xsd_year.fullmatch(value)
+
+
+def is_year_month(value):
+    return regexp_xsd_year_month.fullmatch(value)
+
+
+def is_date(value):
+    return regexp_xsd_date.fullmatch(value)
+
+
+def _parse_iso_datetime(value):
+    """
+    Parses the ISO 8601 forms matched by `regexp_iso_datetime`
+
+    Returns a datetime object, or None if the value does not have one of
+    these forms or is not a valid date, so it can be parsed by dateutil.
+    """
+    match = regexp_iso_datetime.fullmatch(value)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+
+    try:
+        if tz is None:
+            tzinfo = None
+        elif tz == "Z":
+            tzinfo = datetime.timezone.utc
+        else:
+            offset = tz[1:].replace(":", "")
+            offset = datetime.timedelta(
+                hours=int(offset[:2]), minutes=int(offset[2:] or 0)
+            )
+            tzinfo = datetime.timezone(-offset if tz[0] == "-" else offset)
+
+        return datetime.datetime(
+            int(year),
+            int(month or 1),
+            int(day or 1),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0),
+            int((fraction or "0").ljust(6, "0")),
+            tzinfo=tzinfo,
+        )
+    except ValueError:
+        return None
+
+
+def _iso_datetime(value):
+    _date = _parse_iso_datetime(value)
+    if _date is not None:
+        return _date.isoformat()
+    try:
+        return parse_date(value, default=DEFAULT_DATETIME).isoformat()
+    except ValueError:
+        return None
+
+
+def _normalize_date(value):
+    if is_year(value):
+        return XSD.gYear, value
+    elif is_year_month(value):
+        return XSD.gYearMonth, value
+    elif is_date(value):
+        return XSD.date, value
+
+    iso_value = iso_datetime(value)
+    if iso_value is None:
+        return None, value
+    return XSD.dateTime, iso_value
+
+
+_iso_datetime_cached = lru_cache(maxsize=DATE_CACHE_SIZE)(_iso_datetime)
+_normalize_date_cached = lru_cache(maxsize=DATE_CACHE_SIZE)(_normalize_date)
+
+
+def iso_datetime(value):
+    """
+    Returns the value parsed as a date and time, in ISO 8601 format
+
+    Missing parts are taken from `DEFAULT_DATETIME` (eg `2024` returns
+    `2024-01-01T00:00:00`). Returns None if the value can not be parsed.
+    """
+    if isinstance(value, str):
+        return _iso_datetime_cached(value)
+    return _iso_datetime(value)
+
+
+def normalize_date(value):
+    """
+    Returns a `(datatype, lexical form)` tuple for a date value
+
+    Values matching `xsd:gYear`, `xsd:gYearMonth` or `xsd:date` are
+    returned as they are with that datatype. Other values are parsed as a
+    date and time and returned as `xsd:dateTime` (see `iso_datetime()`).
+    If the value can not be parsed, the datatype is None and the value is
+    returned as it is.
+
+    Values that are not strings raise a TypeError.
+    """
+    if isinstance(value, str):
+        return _normalize_date_cached(value)
+    return _normalize_date(value)
+
+
+def cache_info():
+    """
+    Returns the `functools.lru_cache` statistics of the memoized values,
+    keyed by function name
+    """
+    return {
+        "normalize_date": _normalize_date_cached.cache_info(),
+        "iso_datetime": _iso_datetime_cached.cache_info(),
+    }
+
+
+def cache_clear():
+    _normalize_date_cached.cache_clear()
+    _iso_datetime_cached.cache_clear()
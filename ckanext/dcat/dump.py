@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Full catalog dumps
+
+Generates a serialization of all the public datasets of the site, split in
+gzip-compressed shard files plus a `manifest.json` file describing them.
+Dataset ids are read directly from the database in keyset batches (one batch
+per shard), and shards can be serialized in parallel by a pool of worker
+processes.
+"""
+import datetime
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+
+from ckan import model
+import ckan.plugins.toolkit as toolkit
+
+from ckanext.dcat.processors import RDFSerializer
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+DUMP_FORMATS = ["nt", "ttl", "jsonld"]
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Same dataset types excluded from the catalog endpoint
+EXCLUDED_DATASET_TYPES = ["harvest", "showcase"]
+
+
+def iter_dataset_id_batches(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Generator that returns tuples with a list of public, active dataset ids
+    and the most recent modification date of these datasets
+
+    Ids are sorted and read using keyset pagination (`WHERE id > last_id`),
+    so the cost of each query does not depend on how far in the catalog we
+    are, as happens with growing `start` offsets in searches.
+    """
+    query = (
+        model.Session.query(model.Package.id, model.Package.metadata_modified)
+        .filter(model.Package.state == "active")
+        .filter(model.Package.private == False)  # noqa: E712
+        .filter(model.Package.type.notin_(EXCLUDED_DATASET_TYPES))
+        .order_by(model.Package.id)
+    )
+
+    last_id = None
+    while True:
+        batch_query = query
+        if last_id is not None:
+            batch_query = batch_query.filter(model.Package.id > last_id)
+        rows = batch_query.limit(batch_size).all()
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        yield ids, max(row[1] for row in rows)
+        last_id = ids[-1]
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def shard_file_name(index, _format):
+    return "datasets-{0:05d}.{1}.gz".format(index, _format)
+
+
+def catalog_file_name(_format):
+    return "catalog.{0}.gz".format(_format)
+
+
+def _write_gzip(path, chunks):
+    """
+    Writes the provided chunks to a gzip file
+
+    The file is written to a temporary path first and moved into place once
+    complete, so a crash never leaves a truncated shard behind.
+    """
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def _iter_dataset_dicts(dataset_ids, errors):
+    context = {"ignore_auth": True}
+    for dataset_id in dataset_ids:
+        try:
+            dataset_dict = toolkit.get_action("package_show")(
+                context.copy(), {"id": dataset_id}
+            )
+        except toolkit.ObjectNotFound as e:
+            # The dataset was purged since the ids were read
+            log.warning("Skipping dataset %s: %s", dataset_id, e)
+            errors.append(dataset_id)
+            continue
+        # `ignore_auth` also returns datasets deleted or made private since
+        # the ids were read, which must not end up in the dump
+        if dataset_dict.get("private") or dataset_dict.get("state") != "active":
+            log.warning("Skipping dataset %s: not public", dataset_id)
+            errors.append(dataset_id)
+            continue
+        yield dataset_dict
+
+
+def dump_shard(task):
+    """
+    Serializes a batch of datasets into a shard file
+
+    `task` is a dict with the keys `index`, `ids`, `last_modified`,
+    `output_dir`, `format` and `profiles`. Returns the manifest entry for the shard.
+
+    This runs on the worker processes, so it only takes and returns
+    picklable values.
+    """
+    errors = []
+    serializer = RDFSerializer(profiles=task["profiles"])
+
+    file_name = shard_file_name(task["index"], task["format"])
+    _write_gzip(
+        os.path.join(task["output_dir"], file_name),
+        serializer.iter_serialize_catalog_datasets(
+            _iter_dataset_dicts(task["ids"], errors), _format=task["format"]
+        ),
+    )
+
+    return {
+        "index": task["index"],
+        "file": file_name,
+        "first_id": task["ids"][0],
+        "last_id": task["ids"][-1],
+        "size": len(task["ids"]),
+        "last_modified": task["last_modified"],
+        "count": len(task["ids"]) - len(errors),
+        "skipped": errors,
+    }
+
+
+def _init_worker():
+    # Forked workers must not share the database connections of the parent
+    model.meta.engine.dispose(close=False)
+
+
+def _read_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _completed_shards(manifest, output_dir, options):
+    """
+    Returns a dict with the shards of a previous run that can be reused,
+    keyed by index
+
+    Shards are only reused if the dump options match and the shard file
+    exists. Each batch is checked again against its shard when iterating
+    the batches (see `_shard_is_current`), as datasets may have been
+    created, updated or deleted since.
+    """
+    if not manifest:
+        return {}
+    for key, value in options.items():
+        if manifest.get(key) != value:
+            log.info(
+                "Dump options changed (%s), ignoring previous shards", key
+            )
+            return {}
+
+    return {
+        shard["index"]: shard
+        for shard in manifest.get("shards", [])
+        if os.path.exists(os.path.join(output_dir, shard["file"]))
+    }
+
+
+def _shard_is_current(shard, ids, last_modified):
+    """
+    Checks if a shard of a previous run still has the datasets of a batch
+
+    Besides the first and last ids, the number of ids and the most recent
+    modification date are compared, so datasets created, updated or deleted
+    within the range of ids of the shard are detected too.
+    """
+    return bool(shard) and (
+        shard["first_id"] == ids[0]
+        and shard["last_id"] == ids[-1]
+        and shard.get("size") == len(ids)
+        and shard.get("last_modified") == last_modified
+    )
+
+
+def dump_catalog(
+    output_dir,
+    _format="nt",
+    profiles=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    workers=1,
+    resume=False,
+):
+    """
+    Dumps all the public datasets of the site to `output_dir`
+
+    The output consists of:
+
+    * `catalog.{format}.gz`: the catalog description
+    * `datasets-{index}.{format}.gz`: one shard for each batch of
+      `batch_size` datasets, linked to the catalog
+    * `manifest.json`: options used and details of each completed shard
+
+    If `workers` is greater than 1, shards are serialized in parallel on a
+    pool of processes. If `resume` is True, shards completed on a previous
+    run with the same options (as recorded in the manifest) are kept and
+    only the missing ones are generated.
+
+    Returns the manifest dict.
+    """
+    if _format not in DUMP_FORMATS:
+        raise ValueError("Unsupported dump format: {0}".format(_format))
+
+    # Fail early if the profiles are not valid
+    profiles = [
+        profile.name for profile in RDFSerializer(profiles=profiles)._profiles
+    ]
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    options = {
+        "format": _format,
+        "profiles": profiles,
+        "batch_size": batch_size,
+    }
+    previous = _read_manifest(output_dir) if resume else None
+    completed = _completed_shards(previous, output_dir, options)
+
+    manifest = dict(options)
+    manifest.update(
+        {
+            "started": _now(),
+            "finished": None,
+            "catalog": catalog_file_name(_format),
+            "shards": [],
+        }
+    )
+
+    serializer = RDFSerializer(profiles=profiles)
+    _write_gzip(
+        os.path.join(output_dir, manifest["catalog"]),
+        serializer.iter_serialize_catalog({}, [], _format=_format),
+    )
+
+    # Read all the batches upfront. Only ids are loaded, and this way all
+    # database access on the main process happens before forking workers
+    shards = {}
+    tasks = []
+    batches = iter_dataset_id_batches(batch_size)
+    for index, (ids, last_modified) in enumerate(batches):
+        last_modified = last_modified.isoformat()
+        shard = completed.get(index)
+        if _shard_is_current(shard, ids, last_modified):
+            shards[index] = shard
+            continue
+        tasks.append(
+            {
+                "index": index,
+                "ids": ids,
+                "last_modified": last_modified,
+                "output_dir": output_dir,
+                "format": _format,
+                "profiles": profiles,
+            }
+        )
+    if shards:
+        log.info("Reusing %s shards from a previous run", len(shards))
+
+    def _shard_done(shard):
+        shards[shard["index"]] = shard
+        manifest["shards"] = [shards[i] for i in sorted(shards)]
+        _write_manifest(output_dir, manifest)
+        log.info(
+            "Written shard %s (%s datasets)", shard["file"], shard["count"]
+        )
+
+    if workers > 1:
+        # Release the connections before forking, workers open their own
+        model.Session.remove()
+        model.meta.engine.dispose()
+
+        ctx = multiprocessing.get_context("fork")
+        with ctx.Pool(workers, initializer=_init_worker) as pool:
+            for shard in pool.imap_unordered(dump_shard, tasks):
+                _shard_done(shard)
+    else:
+        for task in tasks:
+            _shard_done(dump_shard(task))
+
+    # Remove shards left over from previous runs with more datasets. Only
+    # shards of this format are considered, as other formats may be dumped
+    # to the same directory
+    current = set(s["file"] for s in shards.values())
+    suffix = ".{0}.gz".format(_format)
+    for file_name in os.listdir(output_dir):
+        if (
+            file_name.startswith("datasets-")
+            and file_name.endswith(suffix)
+            and file_name not in current
+        ):
+            os.remove(os.path.join(output_dir, file_name))
+
+    manifest["shards"] = [shards[i] for i in sorted(shards)]
+    manifest["finished"] = _now()
+    _write_manifest(output_dir, manifest)
+
+    return manifest
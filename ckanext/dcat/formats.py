@@ -0,0 +1,100 @@
+"""
+Lookup of resource formats
+
+Normalizes the format and media type values found in DCAT distributions
+against the list of formats included with CKAN core (see
+`ckan.lib.helpers.resource_formats`), so resources get a format that view
+plugins, etc will understand (`CSV`, `XML`, etc).
+
+The list is indexed once per process. Besides the keys of the CKAN list
+(which include the lower cased format, description, media type and
+alternative names), values are matched regardless of case and surrounding
+whitespace, media types with parameters (eg `text/csv; charset=utf-8`) and
+the URIs of the IANA media types and the EU file type vocabularies.
+Lookups of values not in the index are memoized.
+"""
+import re
+import threading
+from functools import lru_cache
+
+from ckan.lib.helpers import resource_formats
+
+# Number of values not found directly in the index whose results are kept
+FORMAT_CACHE_SIZE = 1024
+
+regexp_format_uri = re.compile(
+    r"https?://(?:www\.iana\.org/assignments/media-types"
+    r"|publications\.europa\.eu/resource/authority/file-type)/(.+)",
+    re.IGNORECASE,
+)
+
+_index = None
+_lock = threading.Lock()
+
+
+def _format_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = {
+                    key: (line[0], line[1])
+                    for key, line in resource_formats().items()
+                }
+    return _index
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def _lookup_variant(value):
+    index = _format_index()
+
+    key = value.strip().lower()
+    match = regexp_format_uri.fullmatch(key)
+    if match:
+        key = match.group(1)
+    elif ";" in key:
+        key = key.split(";")[0].strip()
+
+    return index.get(key)
+
+
+def resource_format(value):
+    """
+    Returns the `(media type, format)` tuple of the CKAN format matching the
+    provided value, eg `("text/csv", "CSV")`, or None if not found
+
+    The value can be a format name, a media type or a media type or file
+    type URI. The media type of some CKAN formats is empty.
+    """
+    if not value or not isinstance(value, str):
+        return None
+    result = _format_index().get(value)
+    if result is None:
+        result = _lookup_variant(value)
+    return result
+
+
+def is_format_uri(value):
+    """
+    Returns True if the value is a URI of the IANA media types or the EU
+    file type vocabularies
+    """
+    return bool(regexp_format_uri.fullmatch(value.strip()))
+
+
+def cache_info():
+    """
+    Returns the `functools.lru_cache` statistics of the values not found
+    directly in the index
+    """
+    return _lookup_variant.cache_info()
+
+
+def invalidate():
+    """
+    Drops the index, so it is built again on the next lookup
+    """
+    global _index
+    with _lock:
+        _index = None
+        _lookup_variant.cache_clear()
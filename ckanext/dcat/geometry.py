@@ -0,0 +1,234 @@
+"""
+Conversion of geometries
+
+Spatial values are stored in CKAN as GeoJSON and added to the graph as WKT
+and / or GeoJSON literals (see `ckanext.dcat.output_spatial_format`). When
+parsing, WKT literals are converted to GeoJSON.
+
+Converting detailed geometries (eg administrative boundaries) is the most
+expensive step when serializing datasets, and the same geometries are
+converted again on every request and harvest. Conversions are memoized by
+the SHA-1 digest of each raw string, so the (potentially large) strings are
+not kept, and the most recently used results are kept up to
+`GEOMETRY_CACHE_MAX_BYTES` per function. Results larger than
+`GEOMETRY_CACHE_MAX_ITEM_BYTES` are not cached.
+
+The number of decimals of the output coordinates can be set with
+`ckanext.dcat.output_spatial_decimals`. By default WKT coordinates have 4
+decimals and GeoJSON ones are kept as they are.
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+from ckantoolkit import config
+from geomet import InvalidGeoJSONException, wkt
+
+OUTPUT_SPATIAL_DECIMALS_CONFIG = "ckanext.dcat.output_spatial_decimals"
+
+# Total size of the cached conversions (per function)
+GEOMETRY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Size of the largest conversion that is cached
+GEOMETRY_CACHE_MAX_ITEM_BYTES = 1024 * 1024
+
+DEFAULT_WKT_DECIMALS = 4
+
+
+def output_decimals():
+    """
+    Returns the configured number of decimals of the output coordinates, or
+    None if not set
+    """
+    value = config.get(OUTPUT_SPATIAL_DECIMALS_CONFIG)
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _round_coordinates(value, decimals):
+    if isinstance(value, list):
+        return [_round_coordinates(item, decimals) for item in value]
+    if isinstance(value, float):
+        return round(value, decimals)
+    return value
+
+
+def _round_geometry(geometry, decimals):
+    if not isinstance(geometry, dict):
+        return geometry
+    geometry = dict(geometry)
+    for key in ("coordinates", "bbox"):
+        if key in geometry:
+            geometry[key] = _round_coordinates(geometry[key], decimals)
+    if isinstance(geometry.get("geometries"), list):
+        geometry["geometries"] = [
+            _round_geometry(item, decimals) for item in geometry["geometries"]
+        ]
+    return geometry
+
+
+def _geojson_to_wkt(value, decimals):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if decimals is None:
+        decimals = DEFAULT_WKT_DECIMALS
+    try:
+        return wkt.dumps(value, decimals=decimals)
+    except (TypeError, ValueError, InvalidGeoJSONException):
+        return None
+
+
+def _normalize_geojson(value, decimals):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if decimals is not None:
+        value = _round_geometry(value, decimals)
+    return json.dumps(value)
+
+
+def _wkt_to_geojson(value):
+    try:
+        return json.dumps(wkt.loads(value))
+    except (ValueError, TypeError):
+        return None
+
+
+def _is_geojson(value):
+    try:
+        json.loads(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "currsize", "bytes"])
+
+
+class _DigestCache(object):
+    """
+    Memoizes a conversion of geometry strings by their SHA-1 digest, keeping
+    the most recently used results up to `max_bytes`
+    """
+
+    def __init__(self, func, max_bytes=GEOMETRY_CACHE_MAX_BYTES,
+                 max_item_bytes=GEOMETRY_CACHE_MAX_ITEM_BYTES):
+        self.func = func
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._lock = threading.Lock()
+        self.cache_clear()
+
+    def __call__(self, value, *args):
+        key = (hashlib.sha1(value.encode("utf-8")).digest(),) + args
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+
+        result = self.func(value, *args)
+
+        size = sys.getsizeof(result) + sys.getsizeof(key)
+        if size > self.max_item_bytes:
+            return result
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (result, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, removed_size) = self._entries.popitem(last=False)
+                self._bytes -= removed_size
+        return result
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, len(self._entries), self._bytes)
+
+    def cache_clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+            self._hits = self._misses = 0
+
+
+_geojson_to_wkt_cached = _DigestCache(_geojson_to_wkt)
+_normalize_geojson_cached = _DigestCache(_normalize_geojson)
+_wkt_to_geojson_cached = _DigestCache(_wkt_to_geojson)
+_is_geojson_cached = _DigestCache(_is_geojson)
+
+
+def geojson_to_wkt(value, decimals=None):
+    """
+    Returns a GeoJSON geometry (string or object) as WKT, or None if it is
+    not a valid geometry
+
+    Coordinates have `decimals` decimals (4 by default).
+    """
+    if isinstance(value, str):
+        return _geojson_to_wkt_cached(value, decimals)
+    return _geojson_to_wkt(value, decimals)
+
+
+def normalize_geojson(value, decimals=None):
+    """
+    Returns a GeoJSON geometry (string or object) serialized again as a
+    string, or None if it is not valid JSON
+
+    If `decimals` is provided, coordinates are rounded to that number of
+    decimals.
+    """
+    if isinstance(value, str):
+        return _normalize_geojson_cached(value, decimals)
+    return _normalize_geojson(value, decimals)
+
+
+def wkt_to_geojson(value):
+    """
+    Returns a WKT geometry as a GeoJSON string, or None if it can not be
+    parsed
+    """
+    if isinstance(value, str):
+        return _wkt_to_geojson_cached(value)
+    return _wkt_to_geojson(value)
+
+
+def is_geojson(value):
+    """
+    Returns True if the string is valid JSON
+    """
+    if isinstance(value, str):
+        return _is_geojson_cached(value)
+    return _is_geojson(value)
+
+
+def cache_info():
+    """
+    Returns the statistics of the memoized conversions (hits, misses,
+    number of entries and their approximate size in bytes), keyed by
+    function name
+    """
+    return {
+        "geojson_to_wkt": _geojson_to_wkt_cached.cache_info(),
+        "normalize_geojson": _normalize_geojson_cached.cache_info(),
+        "wkt_to_geojson": _wkt_to_geojson_cached.cache_info(),
+        "is_geojson": _is_geojson_cached.cache_info(),
+    }
+
+
+def cache_clear():
+    _geojson_to_wkt_cached.cache_clear()
+    _normalize_geojson_cached.cache_clear()
+    _wkt_to_geojson_cached.cache_clear()
+    _is_geojson_cached.cache_clear()
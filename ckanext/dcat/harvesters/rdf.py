@@ -15,6 +15,7 @@ from ckanext.harvest.model import HarvestObject, HarvestObjectExtra
 from ckanext.harvest.logic.schema import unicode_safe
 from ckanext.dcat.harvesters.base import DCATHarvester
 from ckanext.dcat.processors import RDFParserException, RDFParser
+from ckanext.dcat.stores import get_store
 from ckanext.dcat.interfaces import IDCATRDFHarvester
 
 log = logging.getLogger(__name__)
@@ -139,6 +140,14 @@ class DCATRDFHarvester(DCATHarvester):
             supported_formats = RDFParser().supported_formats()
             if rdf_format not in supported_formats:
                 raise ValueError('rdf_format should be one of: ' + ", ".join(supported_formats))
+        if 'rdf_store' in source_config_obj:
+            rdf_store = source_config_obj['rdf_store']
+            if not isinstance(rdf_store, str):
+                raise ValueError('rdf_store must be a string')
+            try:
+                get_store(rdf_store).close()
+            except RDFParserException as e:
+                raise ValueError(str(e))
 
         return source_config
 
@@ -147,8 +156,11 @@ class DCATRDFHarvester(DCATHarvester):
         log.debug('In DCATRDFHarvester gather_stage')
 
         rdf_format = None
+        rdf_store = None
         if harvest_job.source.config:
-            rdf_format = json.loads(harvest_job.source.config).get("rdf_format")
+            source_config = json.loads(harvest_job.source.config)
+            rdf_format = source_config.get("rdf_format")
+            rdf_store = source_config.get("rdf_store")
 
         # Get file contents of first page
         next_page_url = harvest_job.source.url
@@ -192,9 +204,8 @@ class DCATRDFHarvester(DCATHarvester):
                 return []
 
             # TODO: profiles conf
-            parser = RDFParser()
-
             try:
+                parser = RDFParser(store=rdf_store)
                 parser.parse(content, _format=rdf_format)
             except RDFParserException as e:
                 self._save_gather_error('Error parsing the RDF file: {0}'.format(e), harvest_job)
@@ -251,6 +262,10 @@ class DCATRDFHarvester(DCATHarvester):
             # get the next page
             next_page_url = parser.next_page()
 
+            # Release the graph (and remove any temporary files used by
+            # disk-backed stores) before moving on to the next page
+            parser.g.close()
+
         # Check if some datasets need to be deleted
         object_ids_to_delete = self._mark_datasets_for_deletion(guids_in_source, harvest_job)
 
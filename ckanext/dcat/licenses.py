@@ -0,0 +1,125 @@
+"""
+Lookup of CKAN licenses
+
+Maps the licenses found in DCAT distributions to the ids of the CKAN license
+register (see `ckan.model.license.LicenseRegister`) and back from ids to
+license URIs.
+
+The register is indexed once per process, as it can be loaded from a remote
+location (`licenses_group_url`). The index expires after
+`ckanext.dcat.licenses_cache_ttl` seconds so changes in the remote list are
+eventually picked up. If the register can not be loaded again, the previous
+index is kept until the next expiry.
+
+Besides the exact license URLs, URIs are matched regardless of scheme
+(`http` / `https`), trailing slashes and `legalcode` suffixes, eg
+`https://creativecommons.org/licenses/by-nc/2.0/legalcode` matches the
+`cc-nc` license.
+"""
+import logging
+import re
+import threading
+import time
+
+from ckan.model.license import LicenseRegister
+from ckantoolkit import config
+
+LICENSES_CACHE_TTL_CONFIG = "ckanext.dcat.licenses_cache_ttl"
+DEFAULT_LICENSES_CACHE_TTL = 3600
+
+regexp_license_uri = re.compile(
+    r"(?:https?://)?(.*?)(?:/+legalcode(?:\.[a-z_-]+)?)?/*", re.IGNORECASE
+)
+
+log = logging.getLogger(__name__)
+
+_index = None
+_expires = 0
+_lock = threading.Lock()
+
+
+def _normalize_uri(value):
+    return regexp_license_uri.fullmatch(value.strip()).group(1).lower()
+
+
+def _ttl():
+    try:
+        return int(config.get(LICENSES_CACHE_TTL_CONFIG, DEFAULT_LICENSES_CACHE_TTL))
+    except (TypeError, ValueError):
+        return DEFAULT_LICENSES_CACHE_TTL
+
+
+def _build_index():
+    uri2id = {}
+    variant2id = {}
+    title2id = {}
+    id2uri = {}
+    for license_id, license in list(LicenseRegister().items()):
+        # Later licenses take precedence, as in the register
+        uri2id[license.url] = license_id
+        title2id[license.title] = license_id
+        if license.url:
+            variant2id[_normalize_uri(license.url)] = license_id
+            id2uri[license_id] = license.url
+    return uri2id, variant2id, title2id, id2uri
+
+
+def _license_index():
+    global _index, _expires
+    if _index is None or time.monotonic() >= _expires:
+        with _lock:
+            if _index is None or time.monotonic() >= _expires:
+                try:
+                    _index = _build_index()
+                except Exception:
+                    if _index is None:
+                        raise
+                    log.warning(
+                        "Could not load the license register, "
+                        "using the previous one",
+                        exc_info=True,
+                    )
+                _expires = time.monotonic() + _ttl()
+    return _index
+
+
+def license_id_for_uri(value):
+    """
+    Returns the id of the CKAN license with the provided URI, or None if
+    not found
+    """
+    if not value or not isinstance(value, str):
+        return None
+    uri2id, variant2id, title2id, id2uri = _license_index()
+    license_id = uri2id.get(value)
+    if not license_id:
+        license_id = variant2id.get(_normalize_uri(value))
+    return license_id
+
+
+def license_id_for_title(value):
+    """
+    Returns the id of the CKAN license with the provided title, or None if
+    not found
+    """
+    uri2id, variant2id, title2id, id2uri = _license_index()
+    return title2id.get(value)
+
+
+def license_uri(license_id):
+    """
+    Returns the URI of the CKAN license with the provided id, or None if
+    not found or the license has no URI
+    """
+    uri2id, variant2id, title2id, id2uri = _license_index()
+    return id2uri.get(license_id)
+
+
+def invalidate():
+    """
+    Drops the index, so it is built again on the next lookup
+    """
+    global _index, _expires
+    with _lock:
+        _index = None
+        _expires = 0
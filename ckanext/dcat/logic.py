@@ -1,14 +1,25 @@
+import datetime
 import math
 
 from ckantoolkit import config
 from dateutil.parser import parse as dateutil_parse
 
+from ckan import model
 from ckan.plugins import toolkit
 
 import ckanext.dcat.converters as converters
 
-from ckanext.dcat.processors import RDFSerializer
-from ckanext.dcat.utils import catalog_uri
+from ckanext.dcat import compression
+from ckanext.dcat.output_cache import cache_key, output_cache
+from ckanext.dcat.processors import RDFSerializer, _get_configured_profiles
+from ckanext.dcat.utils import (
+    catalog_modification_cache,
+    catalog_uri,
+    organization_cache,
+    organizations_modified,
+    url_to_rdflib_format,
+    CATALOG_MODIFIED_FROM_PAGE_CONFIG,
+)
 
 DATASETS_PER_PAGE = 100
 
@@ -20,16 +31,110 @@ def dcat_dataset_show(context, data_dict):
 
     toolkit.check_access('dcat_dataset_show', context, data_dict)
 
-    dataset_dict = toolkit.get_action('package_show')(context, data_dict)
+    if 'output_cache_key' in context:
+        # Internal use only: the key was computed already by the caller
+        cached = context['output_cache_key']
+    else:
+        cached = None
+        if output_cache.enabled():
+            cached = _output_cache_key(_public_dataset(data_dict), data_dict)
 
-    serializer = RDFSerializer(profiles=data_dict.get('profiles'))
+    encoding = context.get('encoding')
+    if encoding and cached:
+        body = output_cache.get_variant(cached[0], cached[1], encoding)
+        if body is not None:
+            return body
+
+    output = output_cache.get(*cached) if cached else None
+    if output is None:
+        dataset_dict = toolkit.get_action('package_show')(context, data_dict)
+
+        serializer = RDFSerializer(profiles=data_dict.get('profiles'))
+
+        output = serializer.serialize_dataset(dataset_dict,
+                                              _format=data_dict.get('format'))
 
-    output = serializer.serialize_dataset(dataset_dict,
-                                          _format=data_dict.get('format'))
+        if cached:
+            output_cache.set(cached[0], cached[1], output)
+
+    if encoding:
+        # Internal use only: return the output compressed with `encoding`,
+        # caching the compressed output as well
+        body = compression.compress(output, encoding)
+        if cached:
+            output_cache.set_variant(cached[0], cached[1], encoding, body)
+        return body
 
     return output
 
 
+def _output_cache_key(pkg, data_dict):
+    '''
+    Returns the `(dataset id, key)` of the cached output for the request,
+    or None if the output should not be cached
+
+    `pkg` is the dataset returned by `_public_dataset`. Only outputs of
+    public active datasets are cached, so they are the same for all users.
+    '''
+    if not pkg or not output_cache.enabled():
+        return None
+
+    orgs_modified = organizations_modified()
+    if orgs_modified is None:
+        return None
+
+    return pkg.id, _dataset_output_key(pkg, data_dict, orgs_modified)
+
+
+def _public_dataset(data_dict):
+    '''
+    Returns the dataset requested if it is public and active, or None
+    '''
+    pkg = model.Package.get(data_dict.get('id'))
+    if not pkg or pkg.private or pkg.state != 'active':
+        return None
+    return pkg
+
+
+def _dataset_output_key(pkg, data_dict, orgs_modified):
+    '''
+    Returns the key of a dataset serialization, which includes the last time
+    organizations changed, as they are used as publisher fallback
+    '''
+    profiles = data_dict.get('profiles') or _get_configured_profiles()
+
+    return cache_key(
+        pkg.metadata_modified.isoformat(),
+        orgs_modified.isoformat(),
+        url_to_rdflib_format(data_dict.get('format') or 'xml'),
+        ' '.join(profiles),
+        catalog_uri(),
+    )
+
+
+def dataset_validators(pkg, data_dict):
+    '''
+    Returns the `(ETag, Last-Modified)` validators of the dataset
+    serialization requested, or None if the dataset is not public
+
+    `pkg` is the dataset returned by `_public_dataset`.
+
+    They are read from the dataset table without building the dataset dict,
+    so conditional requests can be answered without serializing it. The
+    ETag is the key of the output cache.
+    '''
+    if not pkg:
+        return None
+
+    orgs_modified = organizations_modified()
+    if orgs_modified is None:
+        return None
+
+    etag = _dataset_output_key(pkg, data_dict, orgs_modified)
+
+    return etag, max(pkg.metadata_modified, orgs_modified)
+
+
 @toolkit.side_effect_free
 def dcat_catalog_show(context, data_dict):
 
@@ -37,11 +142,24 @@ def dcat_catalog_show(context, data_dict):
 
     query = _search_ckan_datasets(context, data_dict)
     dataset_dicts = query['results']
+    if context.get('with_validators'):
+        # Internal use only: the validators of the page are set in the context
+        context['validators'] = catalog_validators(
+            context, data_dict, query=query)
     pagination_info = _pagination_info(query, data_dict)
+    catalog_dict = _catalog_dict(query, data_dict)
+    _prefetch_organizations(dataset_dicts)
 
     serializer = RDFSerializer(profiles=data_dict.get('profiles'))
 
-    output = serializer.serialize_catalog({}, dataset_dicts,
+    if context.get('stream'):
+        # Internal use only: return a generator with the serialization chunks
+        return serializer.iter_serialize_catalog(
+            catalog_dict, dataset_dicts,
+            _format=data_dict.get('format'),
+            pagination_info=pagination_info)
+
+    output = serializer.serialize_catalog(catalog_dict, dataset_dicts,
                                           _format=data_dict.get('format'),
                                           pagination_info=pagination_info)
 
@@ -57,10 +175,12 @@ def dcat_catalog_search(context, data_dict):
 
     dataset_dicts = query['results']
     pagination_info = _pagination_info(query, data_dict)
+    catalog_dict = _catalog_dict(query, data_dict)
+    _prefetch_organizations(dataset_dicts)
 
     serializer = RDFSerializer(profiles=data_dict.get('profiles'))
 
-    output = serializer.serialize_catalog({}, dataset_dicts,
+    output = serializer.serialize_catalog(catalog_dict, dataset_dicts,
                                           _format=data_dict.get('format'),
                                           pagination_info=pagination_info)
 
@@ -80,6 +200,15 @@ def dcat_datasets_list(context, data_dict):
 
 def _search_ckan_datasets(context, data_dict):
 
+    search_data_dict = _search_data_dict(data_dict)
+
+    query = toolkit.get_action('package_search')(context, search_data_dict)
+
+    return query
+
+
+def _search_data_dict(data_dict):
+
     n = int(config.get('ckanext.dcat.datasets_per_page', DATASETS_PER_PAGE))
     page = data_dict.get('page', 1) or 1
 
@@ -116,18 +245,139 @@ def _search_ckan_datasets(context, data_dict):
         search_data_dict['fq_list'].append(
             'metadata_modified:[{0} TO NOW]'.format(modified_since))
 
-    query = toolkit.get_action('package_search')(context, search_data_dict)
+    return search_data_dict
 
-    return query
+
+def catalog_validators(context, data_dict, query=None):
+    '''
+    Returns the `(ETag, Last-Modified)` validators of the catalog page
+    requested, or None if they can not be computed
+
+    They are computed from the page search results in `query` (the output
+    of `package_search`). If not provided, only the first dataset of the
+    page is searched, to answer conditional requests without rendering the
+    page.
+
+    As results are sorted by `metadata_modified`, creating, updating or
+    deleting a dataset changes the first dataset (or its modification
+    date) of the pages whose contents change, and deleting a dataset also
+    changes the number of results. For the ETag these are combined with the
+    request params, the catalog modification date and the last time
+    organizations changed (they are used as publisher fallback). The
+    Last-Modified date is the most recent of the modification date of the
+    first dataset and the last organization change, or None if there are
+    none.
+    '''
+    orgs_modified = organizations_modified()
+    if orgs_modified is None:
+        return None
+
+    search_data_dict = _search_data_dict(data_dict)
+    if query is None:
+        search_data_dict['rows'] = 1
+        search_data_dict['fl'] = ['id', 'metadata_modified']
+        query = toolkit.get_action('package_search')(
+            context.copy(), search_data_dict)
+
+    first = query['results'][0] if query['results'] else {}
+    profiles = data_dict.get('profiles') or _get_configured_profiles()
+
+    etag = cache_key(
+        str(query['count']),
+        first.get('id') or '',
+        _modified_key(first.get('metadata_modified')),
+        str(catalog_modification_cache.get() or ''),
+        orgs_modified.isoformat(),
+        str(search_data_dict['start']),
+        search_data_dict['q'] or '',
+        search_data_dict['fq'] or '',
+        ' '.join(search_data_dict['fq_list']),
+        url_to_rdflib_format(data_dict.get('format') or 'xml'),
+        ' '.join(profiles),
+        # Used in the pagination links
+        catalog_uri() + toolkit.request.path,
+    )
+
+    last_modified = max(
+        _modified_date(first.get('metadata_modified')) or orgs_modified,
+        orgs_modified)
+    if last_modified == datetime.datetime.min:
+        last_modified = None
+
+    return etag, last_modified
+
+
+def _modified_date(value):
+    # Dates of the search results, as naive datetimes in UTC
+    if not value:
+        return None
+    try:
+        date = dateutil_parse(str(value))
+    except (ValueError, OverflowError):
+        return None
+    if date.tzinfo:
+        date = date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def _modified_key(value):
+    # The search index keeps dates with millisecond precision, while the
+    # dataset dicts have microseconds, so both are compared in milliseconds
+    if not value:
+        return ''
+    try:
+        date = dateutil_parse(str(value))
+    except (ValueError, OverflowError):
+        return str(value)
+    date = date.replace(
+        tzinfo=None, microsecond=date.microsecond // 1000 * 1000)
+    return date.isoformat()
+
+
+def _prefetch_organizations(dataset_dicts):
+    '''
+    Loads the organizations of the datasets not cached yet before serializing
+    them, as they are used as publisher fallback
+    '''
+    organization_cache.prefetch(
+        (dataset_dict.get('organization') or {}).get('id')
+        for dataset_dict in dataset_dicts
+    )
 
 
-def _pagination_info(query, data_dict):
+def _catalog_dict(query, data_dict):
+    '''
+    Creates the catalog_dict to be passed to the serializers
+
+    If `ckanext.dcat.catalog_modified_from_page` is enabled, the catalog
+    modification date on the first page is taken from its most recent
+    dataset (results are sorted by `metadata_modified`), saving the
+    search the profiles would do otherwise. Filtered requests (`q`, `fq`
+    or `modified_since`) don't include all datasets, so they are not used.
+
+    Returns a dict
+    '''
+    catalog_dict = {}
+    filtered = (data_dict.get('q') not in (None, '', '*:*')
+                or data_dict.get('fq') or data_dict.get('modified_since'))
+    if (toolkit.asbool(config.get(CATALOG_MODIFIED_FROM_PAGE_CONFIG, False))
+            and int(data_dict.get('page') or 1) == 1
+            and not filtered
+            and query['results']):
+        catalog_dict['modified'] = query['results'][0]['metadata_modified']
+    return catalog_dict
+
+
+def _pagination_info(query, data_dict, path=None):
     '''
     Creates a pagination_info dict to be passed to the serializers
 
     `query` is the output of `package_search` and `data_dict`
     contains the request params.
 
+    Page URLs use the path and params of the current request, unless a
+    `path` is provided (eg when rendering pages outside a request).
+
     The keys for the dictionary are:
 
     * `count` (total elements)
@@ -145,10 +395,12 @@ def _pagination_info(query, data_dict):
 
         base_url = catalog_uri()
         base_url = '%s%s' % (
-            base_url, toolkit.request.path)
+            base_url, path or toolkit.request.path)
 
-        params = [p for p in toolkit.request.args.items()
-                  if p[0] != 'page' and p[0] in ('modified_since', 'profiles', 'q', 'fq')]
+        params = []
+        if not path:
+            params = [p for p in toolkit.request.args.items()
+                      if p[0] != 'page' and p[0] in ('modified_since', 'profiles', 'q', 'fq')]
         if params:
             qs = '&'.join(
                 ['{0}={1}'.format(
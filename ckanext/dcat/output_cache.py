@@ -0,0 +1,361 @@
+"""
+Cache of serialized datasets
+
+`dcat_dataset_show` runs `package_show` and serializes the dataset on every
+request, although crawlers fetch the same unchanged datasets again and
+again. If `ckanext.dcat.output_cache.backend` is set, the serialized outputs
+of public datasets are cached by dataset id, `metadata_modified`, format,
+profiles and base URI, so a new version of a dataset never gets an old
+output. The DCAT plugin drops the entries of a dataset when it is updated or
+deleted, and all entries when an organization changes, as organizations are
+used as publisher fallback.
+
+Backends:
+
+* `memory`: an LRU cache in each process, keeping
+  `ckanext.dcat.output_cache.maxsize` entries
+* `filesystem`: files in `ckanext.dcat.output_cache.directory`, which can be
+  shared by all processes
+* `redis`: the Redis server configured in CKAN (`ckan.redis.url`), shared by
+  all processes and servers
+
+In all of them entries expire after `ckanext.dcat.output_cache.ttl` seconds
+(0 to keep them until invalidated). Backends store bytes: besides the
+serialized outputs, compressed variants of them are cached with the same key
+and encoding name (see `ckanext.dcat.compression`). Entries created with other settings
+(eg `ckanext.dcat.output_spatial_format`) are not invalidated automatically,
+use `ckan dcat clear-output-cache` after changing them.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from ckantoolkit import config
+
+OUTPUT_CACHE_BACKEND_CONFIG = "ckanext.dcat.output_cache.backend"
+OUTPUT_CACHE_TTL_CONFIG = "ckanext.dcat.output_cache.ttl"
+OUTPUT_CACHE_MAXSIZE_CONFIG = "ckanext.dcat.output_cache.maxsize"
+OUTPUT_CACHE_DIRECTORY_CONFIG = "ckanext.dcat.output_cache.directory"
+
+DEFAULT_OUTPUT_CACHE_TTL = 86400
+DEFAULT_OUTPUT_CACHE_MAXSIZE = 1000
+
+REDIS_KEY_PREFIX = "ckanext-dcat:output:"
+
+log = logging.getLogger(__name__)
+
+
+def cache_key(*parts):
+    """
+    Returns a short key for the provided parts (eg format, profiles, etc)
+    """
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class MemoryBackend(object):
+    """
+    Keeps the `maxsize` most recently used outputs in the process
+    """
+
+    def __init__(self, maxsize=DEFAULT_OUTPUT_CACHE_MAXSIZE, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def get(self, dataset_id, key):
+        with self._lock:
+            entry = self._entries.get((dataset_id, key))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires and time.monotonic() >= expires:
+                self._remove((dataset_id, key))
+                return None
+            self._entries.move_to_end((dataset_id, key))
+            return value
+
+    def set(self, dataset_id, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[(dataset_id, key)] = (expires, value)
+            self._entries.move_to_end((dataset_id, key))
+            self._keys.setdefault(dataset_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_key):
+        del self._entries[entry_key]
+        dataset_id, key = entry_key
+        keys = self._keys[dataset_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys[dataset_id]
+
+    def delete(self, dataset_id):
+        with self._lock:
+            for key in self._keys.pop(dataset_id, ()):
+                del self._entries[(dataset_id, key)]
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self._keys = {}
+
+
+class FileSystemBackend(object):
+    """
+    Stores the outputs as files in a directory, one subdirectory per dataset
+
+    Files are written atomically, so the directory can be shared by several
+    processes. Expired files are removed when read.
+    """
+
+    def __init__(self, directory, ttl=0):
+        self.directory = directory
+        self.ttl = ttl
+
+    def _dataset_directory(self, dataset_id):
+        return os.path.join(
+            self.directory, hashlib.sha1(dataset_id.encode("utf-8")).hexdigest()
+        )
+
+    def get(self, dataset_id, key):
+        path = os.path.join(self._dataset_directory(dataset_id), key)
+        try:
+            if self.ttl and os.path.getmtime(path) + self.ttl <= time.time():
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, dataset_id, key, value):
+        directory = self._dataset_directory(dataset_id)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, os.path.join(directory, key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def delete(self, dataset_id):
+        shutil.rmtree(self._dataset_directory(dataset_id), ignore_errors=True)
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+
+class RedisBackend(object):
+    """
+    Stores the outputs in Redis, in a hash per dataset
+
+    By default it uses the connection to the Redis server configured in CKAN.
+    Any server implementing the Redis protocol can be used.
+    """
+
+    def __init__(self, client=None, ttl=0, prefix=REDIS_KEY_PREFIX):
+        if client is None:
+            from ckan.lib.redis import connect_to_redis
+
+            client = connect_to_redis()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _name(self, dataset_id):
+        return self.prefix + dataset_id
+
+    def get(self, dataset_id, key):
+        return self.client.hget(self._name(dataset_id), key)
+
+    def set(self, dataset_id, key, value):
+        name = self._name(dataset_id)
+        pipeline = self.client.pipeline()
+        pipeline.hset(name, key, value)
+        if self.ttl:
+            pipeline.expire(name, self.ttl)
+        pipeline.execute()
+
+    def delete(self, dataset_id):
+        self.client.delete(self._name(dataset_id))
+
+    def clear(self):
+        names = list(self.client.scan_iter(match=self.prefix + "*"))
+        if names:
+            self.client.delete(*names)
+
+
+def _int_option(key, default):
+    try:
+        return int(config.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def backend_from_config():
+    """
+    Returns the backend set in `ckanext.dcat.output_cache.backend`, or None
+    if the cache is not enabled
+
+    Raises ValueError if the settings are not valid.
+    """
+    name = config.get(OUTPUT_CACHE_BACKEND_CONFIG)
+    if not name:
+        return None
+    ttl = _int_option(OUTPUT_CACHE_TTL_CONFIG, DEFAULT_OUTPUT_CACHE_TTL)
+    if name == "memory":
+        return MemoryBackend(
+            maxsize=_int_option(
+                OUTPUT_CACHE_MAXSIZE_CONFIG, DEFAULT_OUTPUT_CACHE_MAXSIZE
+            ),
+            ttl=ttl,
+        )
+    elif name == "filesystem":
+        directory = config.get(OUTPUT_CACHE_DIRECTORY_CONFIG)
+        if not directory:
+            raise ValueError(
+                '"{0}" is required by the filesystem output cache'.format(
+                    OUTPUT_CACHE_DIRECTORY_CONFIG
+                )
+            )
+        return FileSystemBackend(directory, ttl=ttl)
+    elif name == "redis":
+        return RedisBackend(ttl=ttl)
+    raise ValueError(
+        'Unknown output cache backend: "{0}". Use "memory", "filesystem" '
+        'or "redis"'.format(name)
+    )
+
+
+class OutputCache(object):
+    """
+    Front of the configured backend, keeping the hits and misses of the
+    process
+
+    Errors of the backend are logged and handled as misses, so a failing
+    cache does not break the endpoints.
+    """
+
+    _unset = object()
+
+    def __init__(self):
+        self._backend = self._unset
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    @property
+    def backend(self):
+        if self._backend is self._unset:
+            with self._lock:
+                if self._backend is self._unset:
+                    self._backend = backend_from_config()
+        return self._backend
+
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, dataset_id, key):
+        """
+        Returns the cached output, or None if not cached
+        """
+        value = self._get(dataset_id, key)
+        if value is None:
+            return None
+        return value.decode("utf-8")
+
+    def set(self, dataset_id, key, value):
+        self._set(dataset_id, key, value.encode("utf-8"))
+
+    def get_variant(self, dataset_id, key, encoding):
+        """
+        Returns the cached output compressed with `encoding` (eg `gzip`),
+        or None if not cached
+        """
+        return self._get(dataset_id, "{0}.{1}".format(key, encoding))
+
+    def set_variant(self, dataset_id, key, encoding, value):
+        self._set(dataset_id, "{0}.{1}".format(key, encoding), value)
+
+    def _get(self, dataset_id, key):
+        try:
+            value = self.backend.get(dataset_id, key)
+        except Exception:
+            log.warning("Could not read from the output cache", exc_info=True)
+            value = None
+            self._errors += 1
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    def _set(self, dataset_id, key, value):
+        try:
+            self.backend.set(dataset_id, key, value)
+        except Exception:
+            log.warning("Could not write to the output cache", exc_info=True)
+            self._errors += 1
+
+    def invalidate(self, dataset_id):
+        """
+        Drops the cached outputs of a dataset
+        """
+        if self.enabled():
+            try:
+                self.backend.delete(dataset_id)
+            except Exception:
+                log.warning("Could not invalidate the output cache", exc_info=True)
+                self._errors += 1
+
+    def clear(self):
+        """
+        Drops all cached outputs
+        """
+        if self.enabled():
+            try:
+                self.backend.clear()
+            except Exception:
+                log.warning("Could not clear the output cache", exc_info=True)
+                self._errors += 1
+
+    def reset(self):
+        """
+        Drops the backend (not its contents) and the stats, so the backend is
+        set up again from the config on the next call
+        """
+        with self._lock:
+            self._backend = self._unset
+            self._hits = 0
+            self._misses = 0
+            self._errors = 0
+
+    def stats(self):
+        """
+        Returns a dict with the name of the backend class and the cache hits,
+        misses and errors of this process
+        """
+        return {
+            "backend": type(self.backend).__name__ if self.enabled() else None,
+            "hits": self._hits,
+            "misses": self._misses,
+            "errors": self._errors,
+        }
+
+
+output_cache = OutputCache()
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from functools import wraps
+import logging
 import os
 import json
 
 from ckantoolkit import config
 
+from ckan import model
 from ckan import plugins as p
 
 from ckan.lib.plugins import DefaultTranslation
@@ -19,10 +21,19 @@ from ckanext.dcat.logic import (dcat_dataset_show,
                                 dcat_datasets_list,
                                 dcat_auth,
                                 )
+from ckanext.dcat import compression
+from ckanext.dcat import formats
+from ckanext.dcat import licenses
+from ckanext.dcat import output_cache
+from ckanext.dcat import prerender
 from ckanext.dcat import helpers
 from ckanext.dcat import utils
+from ckanext.dcat.exceptions import RDFProfileException
+from ckanext.dcat.processors import profile_registry
 from ckanext.dcat.validators import dcat_validators
 
+log = logging.getLogger(__name__)
+
 
 CUSTOM_ENDPOINT_CONFIG = 'ckanext.dcat.catalog_endpoint'
 TRANSLATE_KEYS_CONFIG = 'ckanext.dcat.translate_keys'
@@ -50,16 +61,10 @@ def config_declaration(arg=None):
 
 
 def _get_dataset_schema(dataset_type="dataset"):
-    schema = None
     try:
-        schema_show = p.toolkit.get_action("scheming_dataset_schema_show")
-        try:
-            schema = schema_show({}, {"type": dataset_type})
-        except p.toolkit.ObjectNotFound:
-            pass
-    except KeyError:
-        pass
-    return schema
+        return utils.dataset_schema_cache.get(dataset_type)
+    except p.toolkit.ObjectNotFound:
+        return None
 
 
 @config_declaration
@@ -70,6 +75,7 @@ class DCATPlugin(p.SingletonPlugin, DefaultTranslation):
     p.implements(p.IActions, inherit=True)
     p.implements(p.IAuthFunctions, inherit=True)
     p.implements(p.IPackageController, inherit=True)
+    p.implements(p.IOrganizationController, inherit=True)
     p.implements(p.ITranslation, inherit=True)
     p.implements(p.IClick)
     p.implements(p.IBlueprint)
@@ -110,6 +116,44 @@ class DCATPlugin(p.SingletonPlugin, DefaultTranslation):
                     '"{0}" should contain {{_format}}'.format(
                         CUSTOM_ENDPOINT_CONFIG))
 
+        # Check the output cache settings
+        try:
+            output_cache.backend_from_config()
+        except ValueError as e:
+            raise Exception(str(e))
+        output_cache.output_cache.reset()
+
+        # Check the compression encodings
+        try:
+            compression.configured_encodings()
+        except ValueError as e:
+            raise Exception(str(e))
+
+        # Check the pre-rendered catalog formats
+        if prerender.prerender_directory():
+            for _format in prerender.prerender_formats():
+                if _format not in utils.CONTENT_TYPES:
+                    raise Exception(
+                        'Unknown format in "{0}": {1}'.format(
+                            prerender.PRERENDER_FORMATS_CONFIG, _format))
+
+        # Scheming (re)loads its schemas at this point
+        utils.dataset_schema_cache.invalidate()
+
+        # Index the resource formats and licenses and search the catalog
+        # modification date again with the current config
+        formats.invalidate()
+        licenses.invalidate()
+        utils.catalog_modification_cache.invalidate()
+        utils.organization_cache.invalidate()
+
+        # Resolve the configured RDF profiles once so requests don't pay
+        # the cost of scanning the entry points
+        try:
+            profile_registry.warm()
+        except RDFProfileException as e:
+            log.warning('Could not load the configured RDF profiles: %s', e)
+
     # ITemplateHelpers
 
     def get_helpers(self):
@@ -149,7 +193,60 @@ class DCATPlugin(p.SingletonPlugin, DefaultTranslation):
     def before_index(self, dataset_dict):
         return self.before_dataset_index(dataset_dict)
 
+    def after_create(self, context, data_dict):
+        return self.after_dataset_create(context, data_dict)
+
+    def after_update(self, context, data_dict):
+        return self.after_dataset_update(context, data_dict)
+
+    def after_delete(self, context, data_dict):
+        return self.after_dataset_delete(context, data_dict)
+
+    # Shared by IPackageController and IOrganizationController
+    def create(self, entity):
+        self._invalidate_organization(entity)
+
+    def edit(self, entity):
+        self._invalidate_organization(entity)
+
+    def delete(self, entity):
+        self._invalidate_organization(entity)
+
+    def _invalidate_organization(self, entity):
+        # The publisher fallback uses the cached organization details
+        if getattr(entity, 'is_organization', False):
+            utils.organization_cache.invalidate(entity.id)
+            # So the ETags of the RDF endpoints change as well
+            utils.set_organizations_modified()
+            # The cached outputs of its datasets may include the old ones
+            output_cache.output_cache.clear()
+            prerender.schedule_render()
+
     # CKAN >= 2.10 hooks
+    def after_dataset_create(self, context, data_dict):
+        # The catalog modification date needs to be searched again
+        utils.catalog_modification_cache.invalidate()
+        prerender.schedule_render()
+
+    def after_dataset_update(self, context, data_dict):
+        utils.catalog_modification_cache.invalidate()
+        self._invalidate_output_cache(data_dict)
+        prerender.schedule_render()
+
+    def after_dataset_delete(self, context, data_dict):
+        utils.catalog_modification_cache.invalidate()
+        self._invalidate_output_cache(data_dict)
+        prerender.schedule_render()
+
+    def _invalidate_output_cache(self, data_dict):
+        # Outputs are cached by id, but the dataset may have been
+        # referenced by name
+        if not output_cache.output_cache.enabled() or not data_dict.get('id'):
+            return
+        pkg = model.Package.get(data_dict['id'])
+        output_cache.output_cache.invalidate(
+            pkg.id if pkg else data_dict['id'])
+
     def after_dataset_show(self, context, data_dict):
 
         schema = _get_dataset_schema(data_dict["type"])
@@ -185,8 +282,8 @@ class DCATPlugin(p.SingletonPlugin, DefaultTranslation):
         schema = _get_dataset_schema(dataset_dict["type"])
         spatial = None
         if schema:
-            for field in schema['dataset_fields']:
-                if field['field_name'] in dataset_dict and 'repeating_subfields' in field:
+            for field in utils.schema_index(schema).repeating_dataset_fields:
+                if field['field_name'] in dataset_dict:
                     # Check value because of ckan/ckan#8953
                     value = dataset_dict[field['field_name']]
                     if isinstance(value, str):
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-rendered catalog pages
+
+Rendering a page of the catalog endpoint takes a search plus the
+serialization of all its datasets, and harvesters keep requesting the same
+unfiltered pages (`/catalog.ttl?page=N`). If `ckanext.dcat.prerender.directory`
+is set, all these pages are rendered to files in that directory, in each of
+the formats of `ckanext.dcat.prerender.formats`, and the catalog endpoint
+serves them directly. Requests with other params (`q`, `fq`,
+`modified_since`, `profiles`), other formats or pages not rendered yet are
+rendered live as usual.
+
+Pages are rendered again in a background job (see `ckan jobs worker`) when
+datasets or organizations change. The job waits until there have been no
+changes for `ckanext.dcat.prerender.delay` seconds before rendering, and
+there is only one job queued or running at a time regardless of the number
+of changes (eg during a harvest). Each render is written to a new
+subdirectory, and the `current` symlink is switched to it once all pages
+are written, so the endpoint keeps serving the last complete render until
+then. Pages can also be rendered on demand with `ckan dcat prerender`.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from ckantoolkit import config
+import ckan.plugins.toolkit as toolkit
+
+from ckanext.dcat import compression
+from ckanext.dcat.logic import (
+    _catalog_dict,
+    _pagination_info,
+    _prefetch_organizations,
+    _search_ckan_datasets,
+)
+from ckanext.dcat.processors import RDFSerializer
+from ckanext.dcat.utils import (
+    CONTENT_TYPES,
+    DEFAULT_CATALOG_ENDPOINT,
+    catalog_modification_cache,
+    organization_cache,
+)
+
+PRERENDER_DIRECTORY_CONFIG = "ckanext.dcat.prerender.directory"
+PRERENDER_FORMATS_CONFIG = "ckanext.dcat.prerender.formats"
+PRERENDER_DELAY_CONFIG = "ckanext.dcat.prerender.delay"
+PRERENDER_QUEUE_CONFIG = "ckanext.dcat.prerender.queue"
+
+DEFAULT_PRERENDER_FORMATS = ["rdf", "ttl", "jsonld"]
+DEFAULT_PRERENDER_DELAY = 60
+
+# Set while a render job is queued or running, so there is only one at a
+# time. It expires in case the job is lost, and is extended by the job
+# while it waits for changes to end
+PENDING_KEY = "ckanext-dcat:prerender:pending"
+PENDING_KEY_TIMEOUT = 3600
+
+# Time of the last change, checked again by the job before and after
+# rendering
+LAST_CHANGE_KEY = "ckanext-dcat:prerender:last-change"
+
+# Symlink to the subdirectory of the last complete render
+CURRENT_RENDER_LINK = "current"
+RENDER_DIRECTORY_PREFIX = "render-"
+
+log = logging.getLogger(__name__)
+
+
+def prerender_directory():
+    """
+    Returns the directory of the pre-rendered pages, or None if pages are
+    not pre-rendered
+    """
+    return config.get(PRERENDER_DIRECTORY_CONFIG) or None
+
+
+def prerender_formats():
+    """
+    Returns the list of formats pages are pre-rendered in
+    """
+    value = config.get(PRERENDER_FORMATS_CONFIG)
+    if value:
+        return toolkit.aslist(value)
+    return DEFAULT_PRERENDER_FORMATS
+
+
+def _delay():
+    try:
+        return int(config.get(PRERENDER_DELAY_CONFIG, DEFAULT_PRERENDER_DELAY))
+    except (TypeError, ValueError):
+        return DEFAULT_PRERENDER_DELAY
+
+
+def page_file_name(page, _format):
+    return "catalog-{0:05d}.{1}".format(page, _format)
+
+
+def catalog_path(_format):
+    """
+    Returns the path of the catalog endpoint for a format, used in the page
+    URLs
+    """
+    endpoint = config.get(
+        "ckanext.dcat.catalog_endpoint", DEFAULT_CATALOG_ENDPOINT
+    )
+    return endpoint.replace("{_format}", _format)
+
+
+def page_file(page, _format):
+    """
+    Returns the path of the page in the last complete render, or None if it
+    has not been rendered
+
+    The path is resolved, so the page and its compressed variants are read
+    from the same render even if a new one is switched in meanwhile.
+    """
+    directory = prerender_directory()
+    if not directory or _format not in prerender_formats():
+        return None
+    path = os.path.realpath(os.path.join(
+        directory, CURRENT_RENDER_LINK, page_file_name(page, _format)))
+    if not os.path.isfile(path):
+        return None
+    return path
+
+
+def _write_file(path, content):
+    # Written to a temporary file first, so requests never get a partial page
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def render_catalog(directory=None, formats=None):
+    """
+    Renders all the pages of the catalog endpoint without params to
+    `directory`, in each of the `formats` (by default the configured ones)
+
+    Each page is searched once and serialized in all formats, and compressed
+    with the encodings of `ckanext.dcat.compression.encodings`. Pages are
+    written to a new subdirectory, which replaces the current render
+    atomically once complete. The previous render is kept, as requests may
+    still be reading it, and older ones are removed.
+
+    The process caches of organizations and of the catalog modification date
+    are cleared first, as renders usually run in a worker process that is not
+    notified of the changes made by other processes.
+
+    Returns the number of pages rendered
+    """
+    directory = directory or prerender_directory()
+    if not directory:
+        raise ValueError(
+            '"{0}" is required to pre-render the catalog'.format(
+                PRERENDER_DIRECTORY_CONFIG
+            )
+        )
+    formats = formats or prerender_formats()
+    encodings = compression.configured_encodings()
+
+    for _format in formats:
+        if _format not in CONTENT_TYPES:
+            raise ValueError("Unsupported catalog format: {0}".format(_format))
+
+    os.makedirs(directory, exist_ok=True)
+
+    organization_cache.invalidate()
+    catalog_modification_cache.invalidate()
+
+    render_directory = tempfile.mkdtemp(
+        dir=directory, prefix=RENDER_DIRECTORY_PREFIX)
+    try:
+        pages = _render_pages(render_directory, formats, encodings)
+    except BaseException:
+        shutil.rmtree(render_directory, ignore_errors=True)
+        raise
+
+    previous = _switch_current_render(directory, render_directory)
+
+    for name in os.listdir(directory):
+        if (name.startswith(RENDER_DIRECTORY_PREFIX)
+                and name not in (os.path.basename(render_directory), previous)):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    log.info("Pre-rendered %s catalog pages in %s", pages, render_directory)
+
+    return pages
+
+
+def _render_pages(directory, formats, encodings):
+    page = 1
+    while True:
+        data_dict = {"page": page}
+        query = _search_ckan_datasets({"ignore_auth": True}, data_dict)
+        dataset_dicts = query["results"]
+        catalog_dict = _catalog_dict(query, data_dict)
+        _prefetch_organizations(dataset_dicts)
+
+        for _format in formats:
+            pagination_info = _pagination_info(
+                query, data_dict, path=catalog_path(_format)
+            )
+            serializer = RDFSerializer()
+            output = serializer.serialize_catalog(
+                catalog_dict,
+                dataset_dicts,
+                _format=_format,
+                pagination_info=pagination_info,
+            )
+            path = os.path.join(directory, page_file_name(page, _format))
+            _write_file(path, output)
+            for encoding in encodings:
+                compression.variant_file(path, encoding)
+
+        if "next" not in pagination_info:
+            break
+        page += 1
+
+    return page
+
+
+def _switch_current_render(directory, render_directory):
+    """
+    Points the current render symlink to `render_directory`, returning the
+    name of the previous render, if any
+    """
+    link = os.path.join(directory, CURRENT_RENDER_LINK)
+    try:
+        previous = os.readlink(link)
+    except OSError:
+        previous = None
+
+    # Renaming a new symlink over the current one is atomic
+    tmp_link = os.path.join(
+        directory, ".tmp-{0}".format(os.path.basename(render_directory)))
+    os.symlink(os.path.basename(render_directory), tmp_link)
+    try:
+        os.replace(tmp_link, link)
+    except BaseException:
+        os.remove(tmp_link)
+        raise
+
+    return previous
+
+
+def _redis():
+    from ckan.lib.redis import connect_to_redis
+
+    return connect_to_redis()
+
+
+def _last_change(redis):
+    return redis.get(LAST_CHANGE_KEY)
+
+
+def _enqueue(redis):
+    if redis.set(PENDING_KEY, "1", nx=True, ex=PENDING_KEY_TIMEOUT):
+        toolkit.enqueue_job(
+            render_catalog_job,
+            title="Pre-render DCAT catalog pages",
+            queue=config.get(PRERENDER_QUEUE_CONFIG) or "default",
+        )
+
+
+def schedule_render():
+    """
+    Records a change and queues a job to render the pages again, unless
+    there is one queued or running already
+
+    Errors are logged, so they never break the changes triggering the
+    render.
+    """
+    if not prerender_directory():
+        return
+    try:
+        redis = _redis()
+        redis.set(LAST_CHANGE_KEY, repr(time.time()))
+        _enqueue(redis)
+    except Exception:
+        log.warning("Could not queue the catalog render job", exc_info=True)
+
+
+def _wait_for_changes(redis, delay):
+    # Sleep until there have been no changes for `delay` seconds
+    while True:
+        redis.expire(PENDING_KEY, PENDING_KEY_TIMEOUT)
+        last_change = _last_change(redis)
+        try:
+            wait = float(last_change) + delay - time.time()
+        except (TypeError, ValueError):
+            wait = 0
+        if wait <= 0:
+            return last_change
+        time.sleep(wait)
+
+
+def render_catalog_job():
+    """
+    Background job rendering the pages once there have been no changes
+    for `ckanext.dcat.prerender.delay` seconds
+
+    The job holds the pending key while rendering, so renders never
+    overlap, and renders again if there were changes during the render.
+    """
+    redis = _redis()
+    delay = _delay()
+    try:
+        while True:
+            rendered_change = _wait_for_changes(redis, delay)
+            render_catalog()
+            if _last_change(redis) == rendered_change:
+                break
+    finally:
+        redis.delete(PENDING_KEY)
+
+    # Changes recorded after the last check found the key still set
+    if _last_change(redis) != rendered_change:
+        _enqueue(redis)
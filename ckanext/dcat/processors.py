@@ -1,7 +1,11 @@
 import sys
 import argparse
+import logging
 import xml
 import json
+import re
+import threading
+import time
 from importlib.metadata import entry_points
 
 from ckantoolkit import config
@@ -9,13 +13,22 @@ from ckantoolkit import config
 import rdflib
 import rdflib.parser
 from rdflib import URIRef, BNode, Literal
+from rdflib.exceptions import ParserError
 from rdflib.namespace import Namespace, RDF
 
 import ckan.plugins as p
 
 from ckanext.dcat.utils import catalog_uri, dataset_uri, url_to_rdflib_format, DCAT_EXPOSE_SUBCATALOGS
-from ckanext.dcat.profiles import DCAT, DCT, FOAF
+from ckanext.dcat.profiles import DCAT, DCT, FOAF, NodeView
 from ckanext.dcat.exceptions import RDFProfileException, RDFParserException
+from ckanext.dcat.stores import (
+    SubjectIndex,
+    LINE_PARSERS,
+    GraphDescriptions,
+    get_store,
+)
+
+log = logging.getLogger(__name__)
 
 HYDRA = Namespace('http://www.w3.org/ns/hydra/core#')
 DCAT = Namespace("http://www.w3.org/ns/dcat#")
@@ -23,6 +36,7 @@ DCAT = Namespace("http://www.w3.org/ns/dcat#")
 RDF_PROFILES_ENTRY_POINT_GROUP = 'ckan.rdf.profiles'
 RDF_PROFILES_CONFIG_OPTION = 'ckanext.dcat.rdf.profiles'
 COMPAT_MODE_CONFIG_OPTION = 'ckanext.dcat.compatibility_mode'
+BOUNDED_DESCRIPTIONS_CONFIG_OPTION = 'ckanext.dcat.rdf.bounded_descriptions'
 
 DEFAULT_RDF_PROFILES = ['euro_dcat_ap_3']
 
@@ -33,6 +47,144 @@ def _get_default_rdf_profiles():
 
 SUPPORTED_PAGINATION_COLLECTION_DESIGNS = [HYDRA.PartialCollectionView, HYDRA.PagedCollection]
 
+# rdflib formats that can be serialized in chunks by
+# RDFSerializer.iter_serialize_catalog()
+STREAMING_FORMATS = ['nt', 'nquads', 'turtle', 'json-ld']
+
+turtle_prefix_re = re.compile(r'^@prefix\s+(?P<prefix>\S*):\s+<(?P<uri>[^>]*)>\s*\.\s*$')
+
+
+def _get_configured_profiles():
+    '''
+    Returns the list of profile names set in the config, or the default ones
+    '''
+    profiles = config.get(RDF_PROFILES_CONFIG_OPTION, None)
+    if profiles:
+        return profiles.split(' ')
+    return DEFAULT_RDF_PROFILES
+
+
+def _resolve_profiles(profile_names):
+    '''
+    Looks up the profile classes for the provided names in the
+    ``ckan.rdf.profiles`` entry point group
+
+    Returns a list of profile classes in the same order as the names, raises
+    ``RDFProfileException`` if any of the names could not be found.
+    '''
+    profiles = []
+    loaded_profiles_names = []
+
+    for profile_name in profile_names:
+        profile_entry = None
+        try:
+            ep = entry_points(group=RDF_PROFILES_ENTRY_POINT_GROUP, name=profile_name)
+            if ep:
+                profile_entry = ep[profile_name]
+        except TypeError:
+            # Python 3.9
+            eps = [ep for ep in entry_points().get(RDF_PROFILES_ENTRY_POINT_GROUP)]    # type: ignore
+            profile_entry = [ep for ep in eps if ep.name == profile_name]
+            if profile_entry:
+                profile_entry = profile_entry[0]
+
+        if profile_entry:
+            profile_class = profile_entry.load()
+            # Set a reference to the profile name
+            profile_class.name = profile_entry.name
+            profiles.append(profile_class)
+            loaded_profiles_names.append(profile_entry.name)
+
+    unknown_profiles = set(profile_names) - set(loaded_profiles_names)
+    if unknown_profiles:
+        raise RDFProfileException(
+            'Unknown RDF profiles: {0}'.format(
+                ', '.join(sorted(unknown_profiles))))
+
+    return profiles
+
+
+class RDFProfileRegistry(object):
+    '''
+    Process-wide cache of resolved RDF profile classes
+
+    Scanning the ``ckan.rdf.profiles`` entry points is relatively expensive,
+    and it used to happen on every parser or serializer instantiation (ie
+    on every request to the DCAT endpoints). The registry resolves each
+    ordered list of profile names once and keeps the result keyed by the
+    tuple of names.
+
+    Unknown profiles are not cached, so the relevant exception is raised on
+    every call.
+    '''
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._resolution_time = 0.0
+
+    def get(self, profile_names):
+        '''
+        Returns a list with the profile classes for the provided names
+        '''
+        key = tuple(profile_names)
+        profiles = self._profiles.get(key)
+        if profiles is not None:
+            self._hits += 1
+            return list(profiles)
+
+        with self._lock:
+            profiles = self._profiles.get(key)
+            if profiles is None:
+                start = time.perf_counter()
+                try:
+                    profiles = _resolve_profiles(profile_names)
+                finally:
+                    self._misses += 1
+                    self._resolution_time += time.perf_counter() - start
+                self._profiles[key] = profiles
+            else:
+                self._hits += 1
+
+        return list(profiles)
+
+    def warm(self, profile_names=None):
+        '''
+        Resolves the provided list of profiles (or the ones defined in the
+        ``ckanext.dcat.rdf.profiles`` config option) ahead of time
+        '''
+        if not profile_names:
+            profile_names = _get_configured_profiles()
+        return self.get(profile_names)
+
+    def invalidate(self):
+        '''
+        Clears all resolved profiles and resets the stats
+        '''
+        with self._lock:
+            self._profiles = {}
+            self._hits = 0
+            self._misses = 0
+            self._resolution_time = 0.0
+
+    def stats(self):
+        '''
+        Returns a dict with the number of cached profile lists, cache hits
+        and misses and the total time (in seconds) spent resolving entry
+        points
+        '''
+        return {
+            'entries': len(self._profiles),
+            'hits': self._hits,
+            'misses': self._misses,
+            'resolution_time': self._resolution_time,
+        }
+
+
+profile_registry = RDFProfileRegistry()
+
 
 class RDFProcessor(object):
 
@@ -52,11 +204,7 @@ class RDFProcessor(object):
 
         '''
         if not profiles:
-            profiles = config.get(RDF_PROFILES_CONFIG_OPTION, None)
-            if profiles:
-                profiles = profiles.split(' ')
-            else:
-                profiles = DEFAULT_RDF_PROFILES
+            profiles = _get_configured_profiles()
         self._profiles = self._load_profiles(profiles)
         if not self._profiles:
             raise RDFProfileException(
@@ -71,43 +219,56 @@ class RDFProcessor(object):
 
         self.g = rdflib.ConjunctiveGraph()
 
+        self._profile_instances_cache = {}
+
+    def _profile_instances(self, dataset_type=None, graph=None):
+        '''
+        Returns the instances of the loaded profiles, bound to the class graph
+        (or to `graph` if provided)
+
+        Profile instances are created once per dataset type and reused for
+        all subsequent datasets, so the setup work done in the profiles
+        constructor (eg loading the scheming schema) is not repeated for
+        every dataset. The per-dataset state of each instance is cleared
+        before returning them.
+        '''
+        dataset_type = dataset_type or self.dataset_type
+        key = (dataset_type, tuple(self._profiles))
+
+        profiles = self._profile_instances_cache.get(key)
+        if profiles is None:
+            profiles = [
+                profile_class(
+                    self.g,
+                    dataset_type=dataset_type,
+                    compatibility_mode=self.compatibility_mode
+                )
+                for profile_class in self._profiles
+            ]
+            self._profile_instances_cache[key] = profiles
+
+        if graph is None:
+            graph = self.g
+        for profile in profiles:
+            if profile.g is not graph:
+                profile.rebind(graph)
+            else:
+                profile.reset()
+
+        return profiles
+
     def _load_profiles(self, profile_names):
         '''
         Loads the specified RDF parser profiles
 
         These are registered on ``entry_points`` in setup.py, under the
         ``[ckan.rdf.profiles]`` group.
-        '''
-        profiles = []
-        loaded_profiles_names = []
 
-        for profile_name in profile_names:
-            profile_entry = None
-            try:
-                ep = entry_points(group=RDF_PROFILES_ENTRY_POINT_GROUP, name=profile_name)
-                if ep:
-                    profile_entry = ep[profile_name]
-            except TypeError:
-                # Python 3.9
-                eps = [ep for ep in entry_points().get(RDF_PROFILES_ENTRY_POINT_GROUP)]    # type: ignore
-                profile_entry = [ep for ep in eps if ep.name == profile_name]
-                if profile_entry:
-                    profile_entry = profile_entry[0]
-
-            if profile_entry:
-                profile_class = profile_entry.load()
-                # Set a reference to the profile name
-                profile_class.name = profile_entry.name
-                profiles.append(profile_class)
-                loaded_profiles_names.append(profile_entry.name)
-
-        unknown_profiles = set(profile_names) - set(loaded_profiles_names)
-        if unknown_profiles:
-            raise RDFProfileException(
-                'Unknown RDF profiles: {0}'.format(
-                    ', '.join(sorted(unknown_profiles))))
-
-        return profiles
+        Resolved profile lists are cached process-wide in
+        ``profile_registry``, so after the first call for a given list of
+        names this is just a dict lookup.
+        '''
+        return profile_registry.get(profile_names)
 
 
 class RDFParser(RDFProcessor):
@@ -118,6 +279,35 @@ class RDFParser(RDFProcessor):
     CKAN dicts from the RDF graph.
     '''
 
+    def __init__(self, profiles=None, dataset_type='dataset',
+                 compatibility_mode=False, store=None,
+                 bounded_descriptions=None):
+        '''
+        Creates a parser instance
+
+        On top of the `RDFProcessor` parameters, the rdflib store used to
+        hold the parsed graph can be provided, either the name of an rdflib
+        store plugin or `sqlite` to use a temporary disk-backed store (see
+        `ckanext.dcat.stores.get_store()`). By default the value of the
+        ``ckanext.dcat.rdf.store`` config option is used (``Memory``).
+
+        If `bounded_descriptions` (or the
+        ``ckanext.dcat.rdf.bounded_descriptions`` config option) is True,
+        `datasets()` binds the profiles to a small graph with the
+        description of each dataset instead of the full graph.
+        '''
+        super(RDFParser, self).__init__(
+            profiles, dataset_type, compatibility_mode)
+
+        self.g = rdflib.ConjunctiveGraph(store=get_store(store))
+
+        if bounded_descriptions is None:
+            bounded_descriptions = p.toolkit.asbool(
+                config.get(BOUNDED_DESCRIPTIONS_CONFIG_OPTION, False))
+        self.bounded_descriptions = bounded_descriptions
+
+        self._descriptions = None
+
     def _datasets(self):
         '''
         Generator that returns all DCAT datasets on the graph
@@ -189,20 +379,83 @@ class RDFParser(RDFProcessor):
         Each dataset is passed to all the loaded profiles before being
         yielded, so it can be further modified by each one of them.
 
+        If the parser was created with `bounded_descriptions`, profiles are
+        bound to a graph containing only the bounded description of each
+        dataset (see `ckanext.dcat.stores.bounded_description()`), so the
+        cost of the lookups does not depend on the size of the full graph.
+        The descriptions are built from a single pass over the graph.
+        This is ignored if ``ckanext.dcat.expose_subcatalogs`` is enabled,
+        as the catalogs of each dataset are needed.
+
         Returns a dataset dict that can be passed to eg `package_create`
         or `package_update`
         '''
+        if self.bounded_descriptions and not p.toolkit.asbool(
+                config.get(DCAT_EXPOSE_SUBCATALOGS, False)):
+            self._descriptions = GraphDescriptions(self.g)
+        else:
+            self._descriptions = None
+
         for dataset_ref in self._datasets():
-            dataset_dict = {}
-            for profile_class in self._profiles:
-                profile = profile_class(
-                    self.g,
-                    dataset_type=self.dataset_type,
-                    compatibility_mode=self.compatibility_mode
-                )
-                profile.parse_dataset(dataset_dict, dataset_ref)
+            yield self._parse_dataset(dataset_ref)
 
-            yield dataset_dict
+    def _parse_dataset(self, dataset_ref):
+        graph = None
+        if self._descriptions is not None:
+            graph = rdflib.Graph(
+                store=self._descriptions.store(dataset_ref))
+
+        # Shared by all profiles, so each subject is looked up once
+        node_view = NodeView(self.g if graph is None else graph)
+
+        dataset_dict = {}
+        for profile in self._profile_instances(graph=graph):
+            profile.use_node_view(node_view)
+            profile.parse_dataset(dataset_dict, dataset_ref)
+
+        log.debug(
+            'Parsed dataset %s: %s object lookups, %s graph lookups',
+            dataset_ref, node_view.requests, node_view.lookups)
+
+        return dataset_dict
+
+    def stream_datasets(self, source, _format='nt'):
+        '''
+        Generator that returns CKAN datasets parsed from a large RDF
+        serialization, without loading it fully in memory
+
+        `source` is a path or a file-like object with an N-Triples or
+        N-Quads serialization (graph names are ignored). Triples are first
+        indexed by subject in a temporary on-disk database, and then each
+        dataset is parsed from a small graph containing only its own
+        description (see `SubjectIndex.dataset_descriptions()`), so memory
+        usage depends on the size of the largest dataset rather than on the
+        size of the whole document.
+
+        Datasets are passed to the loaded profiles as in `datasets()` and
+        yielded in the order they appear in the source. While parsing,
+        `self.g` is the graph of the current dataset.
+
+        It raises a ``RDFParserException`` if the format is not supported
+        or there was some error during the parsing.
+        '''
+        rdflib_format = url_to_rdflib_format(_format)
+        if rdflib_format not in LINE_PARSERS:
+            raise RDFParserException(
+                'Format not supported for streaming: {0}'.format(_format))
+
+        with SubjectIndex() as index:
+            try:
+                if isinstance(source, str):
+                    with open(source, 'rb') as f:
+                        index.load(f, rdflib_format)
+                else:
+                    index.load(source, rdflib_format)
+            except ParserError as e:
+                raise RDFParserException(e)
+
+            for dataset_ref, self.g in index.dataset_descriptions():
+                yield self._parse_dataset(dataset_ref)
 
 
 class RDFSerializer(RDFProcessor):
@@ -267,8 +520,7 @@ class RDFSerializer(RDFProcessor):
 
         dataset_ref = URIRef(dataset_uri(dataset_dict))
 
-        for profile_class in self._profiles:
-            profile = profile_class(self.g, compatibility_mode=self.compatibility_mode)
+        for profile in self._profile_instances():
             profile.graph_from_dataset(dataset_dict, dataset_ref)
 
         return dataset_ref
@@ -285,8 +537,7 @@ class RDFSerializer(RDFProcessor):
 
         catalog_ref = URIRef(catalog_uri())
 
-        for profile_class in self._profiles:
-            profile = profile_class(self.g, compatibility_mode=self.compatibility_mode)
+        for profile in self._profile_instances():
             profile.graph_from_catalog(catalog_dict, catalog_ref)
 
         return catalog_ref
@@ -305,6 +556,14 @@ class RDFSerializer(RDFProcessor):
 
         self.graph_from_dataset(dataset_dict)
 
+        return self._serialize_graph(_format, context)
+
+    def _serialize_graph(self, _format='xml', context=None):
+        '''
+        Returns the serialization of the class graph in the provided format
+
+        Additionally a custom context may be provided (JSON-LD only)
+        '''
         if not _format:
             _format = 'xml'
         _format = url_to_rdflib_format(_format)
@@ -320,7 +579,8 @@ class RDFSerializer(RDFProcessor):
 
         return output
 
-    def serialize_datasets(self, dataset_dicts, _format='xml', context=None):
+    def serialize_datasets(self, dataset_dicts, _format='xml', context=None,
+                           merge=False):
         '''
         Given a list of CKAN dataset dicts, returns an RDF serialization
 
@@ -329,14 +589,37 @@ class RDFSerializer(RDFProcessor):
 
         Additionally a custom context may be provided (JSON-LD only)
 
+        By default each dataset is serialized on its own graph and the
+        individual serializations are joined with new lines (see
+        `iter_serialize_datasets()`). If `merge` is True, all datasets are
+        added to the class graph and it is serialized once.
+
         Returns a string with the serialized datasets
         '''
-        out = []
-        for dataset_dict in dataset_dicts:
-            out.append(self.serialize_dataset(dataset_dict, _format, context))
-        return '\n'.join(out)
+        if merge:
+            for dataset_dict in dataset_dicts:
+                self.graph_from_dataset(dataset_dict)
+            return self._serialize_graph(_format, context)
 
+        return '\n'.join(
+            self.iter_serialize_datasets(dataset_dicts, _format, context))
 
+    def iter_serialize_datasets(self, dataset_dicts, _format='xml',
+                                context=None):
+        '''
+        Generator that returns an RDF serialization for each of the provided
+        CKAN dataset dicts
+
+        Each dataset is built on a new graph, so the output for a dataset
+        only contains its own triples and the total cost is linear on the
+        number of datasets. After each iteration the class graph
+        (`serializer.g`) contains the last serialized dataset.
+
+        Parameters are the same as in `serialize_dataset()`.
+        '''
+        for dataset_dict in dataset_dicts:
+            self.g = rdflib.ConjunctiveGraph()
+            yield self.serialize_dataset(dataset_dict, _format, context)
 
     def serialize_catalog(self, catalog_dict=None, dataset_dicts=None,
                           _format='xml', pagination_info=None):
@@ -380,6 +663,124 @@ class RDFSerializer(RDFProcessor):
 
         return output
 
+    def iter_serialize_catalog(self, catalog_dict=None, dataset_dicts=None,
+                               _format='xml', pagination_info=None):
+        '''
+        Generator that returns an RDF serialization of the whole catalog in
+        chunks
+
+        Parameters are the same as in `serialize_catalog()`.
+
+        For line-oriented or chunkable formats (N-Triples, N-Quads, Turtle
+        and JSON-LD, see `STREAMING_FORMATS`) the catalog, pagination info
+        and each of the datasets are built on separate graphs, and each
+        chunk is yielded as soon as the profiles have finished with it, so
+        the full catalog graph is never held in memory. In Turtle, each chunk
+        is a block of statements (only new prefixes are declared), and in
+        JSON-LD the output is an array with the node objects of each chunk.
+
+        For other formats, or if subcatalogs are exposed (which requires
+        access to the whole graph), the output of `serialize_catalog()` is
+        returned as a single chunk.
+        '''
+        if not _format:
+            _format = 'xml'
+        rdflib_format = url_to_rdflib_format(_format)
+
+        if (rdflib_format not in STREAMING_FORMATS
+                or p.toolkit.asbool(config.get(DCAT_EXPOSE_SUBCATALOGS, False))):
+            yield self.serialize_catalog(catalog_dict, dataset_dicts,
+                                         _format, pagination_info)
+            return
+
+        yield from self._serialize_graphs(
+            self._iter_catalog_graphs(catalog_dict, dataset_dicts, pagination_info),
+            rdflib_format
+        )
+
+    def iter_serialize_catalog_datasets(self, dataset_dicts, _format='nt'):
+        '''
+        Generator that returns the serialization of the provided datasets in
+        chunks, linked to the catalog (`catalog_uri()`) but without the
+        catalog description itself
+
+        It is meant for generating catalog dumps split in several files.
+        Only the formats in `STREAMING_FORMATS` are supported, see
+        `iter_serialize_catalog()` for details.
+        '''
+        rdflib_format = url_to_rdflib_format(_format)
+        if rdflib_format not in STREAMING_FORMATS:
+            raise ValueError(
+                'Format not supported for streaming: {0}'.format(_format))
+
+        catalog_ref = URIRef(catalog_uri())
+
+        yield from self._serialize_graphs(
+            self._iter_dataset_graphs(catalog_ref, dataset_dicts),
+            rdflib_format
+        )
+
+    def _serialize_graphs(self, graphs, rdflib_format):
+        if rdflib_format == 'turtle':
+            writer = self._turtle_chunks
+        elif rdflib_format == 'json-ld':
+            writer = self._json_ld_chunks
+        else:
+            writer = self._line_chunks
+
+        return writer(graphs, rdflib_format)
+
+    def _iter_catalog_graphs(self, catalog_dict, dataset_dicts, pagination_info):
+        '''
+        Generator that yields a graph with the catalog (and pagination)
+        triples and then one graph for each dataset
+
+        Dataset graphs include the triple linking the catalog with the
+        dataset. All graphs share the same default context identifier.
+        '''
+        catalog_ref = self.graph_from_catalog(catalog_dict)
+        if pagination_info:
+            self._add_pagination_triples(pagination_info)
+        yield self.g
+
+        yield from self._iter_dataset_graphs(catalog_ref, dataset_dicts)
+
+    def _iter_dataset_graphs(self, catalog_ref, dataset_dicts):
+        identifier = self.g.default_context.identifier
+
+        for dataset_dict in dataset_dicts or []:
+            self.g = rdflib.ConjunctiveGraph(identifier=identifier)
+            dataset_ref = self.graph_from_dataset(dataset_dict)
+            self.g.add((catalog_ref, DCAT.dataset, dataset_ref))
+            yield self.g
+
+    def _line_chunks(self, graphs, rdflib_format):
+        for graph in graphs:
+            yield graph.serialize(format=rdflib_format)
+
+    def _turtle_chunks(self, graphs, rdflib_format):
+        prefixes = {}
+        for graph in graphs:
+            lines = []
+            for line in graph.serialize(format=rdflib_format).splitlines(True):
+                match = turtle_prefix_re.match(line)
+                if match:
+                    prefix, uri = match.group('prefix'), match.group('uri')
+                    if prefixes.get(prefix) == uri:
+                        continue
+                    prefixes[prefix] = uri
+                lines.append(line)
+            yield ''.join(lines)
+
+    def _json_ld_chunks(self, graphs, rdflib_format):
+        first = True
+        yield '['
+        for graph in graphs:
+            for node in json.loads(graph.serialize(format=rdflib_format)):
+                yield ('\n' if first else ',\n') + json.dumps(node)
+                first = False
+        yield '\n]'
+
     def _add_source_catalog(self, root_catalog_ref, dataset_dict, dataset_ref):
         if not p.toolkit.asbool(config.get(DCAT_EXPOSE_SUBCATALOGS, False)):
             return
@@ -1,17 +1,26 @@
-import datetime
 import json
 from urllib.parse import quote
 
-from ckan.lib.helpers import resource_formats
-from ckan.model.license import LicenseRegister
-from ckantoolkit import ObjectNotFound, asbool, aslist, config, get_action, url_for
-from dateutil.parser import parse as parse_date
-from geomet import InvalidGeoJSONException, wkt
+from ckantoolkit import asbool, aslist, config, url_for
 from rdflib import BNode, Literal, URIRef, term, PROV
 from rdflib.namespace import ORG, RDF, RDFS, SKOS, XSD, Namespace
 
-from ckanext.dcat.utils import DCAT_EXPOSE_SUBCATALOGS
-from ckanext.dcat.validators import is_date, is_year, is_year_month
+from ckanext.dcat.utils import (
+    DCAT_EXPOSE_SUBCATALOGS,
+    catalog_modification_cache,
+    dataset_schema_cache,
+    schema_index,
+)
+from ckanext.dcat.dates import normalize_date
+from ckanext.dcat.formats import is_format_uri, resource_format
+from ckanext.dcat.geometry import (
+    geojson_to_wkt,
+    is_geojson,
+    normalize_geojson,
+    output_decimals,
+    wkt_to_geojson,
+)
+from ckanext.dcat.licenses import license_id_for_title, license_id_for_uri
 
 CNT = Namespace("http://www.w3.org/2011/content#")
 CR = Namespace("http://mlcommons.org/croissant/")
@@ -120,6 +129,179 @@ class CleanedURIRef(object):
         return URIRef(value)
 
 
+class NodeView(object):
+    """
+    Read-only view of the nodes of a graph used when parsing a dataset
+
+    The `_object*` helpers of the profiles look up the same subjects many
+    times (eg once per field of a distribution or agent). The view
+    materializes the predicate -> objects mapping of each subject the first
+    time it is used, so the graph is queried once per subject.
+
+    `requests` counts the object lookups served and `lookups` the graph
+    queries done, which would be equal without the view.
+
+    The graph must not be modified while the view is in use.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._subjects = {}
+        self.requests = 0
+        self.lookups = 0
+
+    def objects(self, subject, predicate):
+        """
+        Returns a sequence with the objects of the subject and predicate
+        """
+        self.requests += 1
+        predicates = self._subjects.get(subject)
+        if predicates is None:
+            self.lookups += 1
+            predicates = self._subjects[subject] = {}
+            for _predicate, _object in self.graph.predicate_objects(subject):
+                if _predicate in predicates:
+                    predicates[_predicate].append(_object)
+                else:
+                    predicates[_predicate] = [_object]
+        return predicates.get(predicate, ())
+
+
+class DictTriples(object):
+    """
+    Table of values to add to the graph from a CKAN dict, compiled once
+
+    `items` are tuples of the form `(key, predicate, fallbacks, _type)` or
+    `(key, predicate, fallbacks, _type, _class)`, as accepted by
+    `RDFProfile._add_triples_from_dict()`. `key` can also be a tuple of keys,
+    in which case the first one present on the root level of the dict is
+    used (eg `("title_translated", "title")`).
+
+    Each item is turned into a function when the table is created, so tables
+    are meant to be defined once as class attributes of the profiles and
+    passed to `_add_triples_from_dict()`::
+
+        class MyProfile(RDFProfile):
+
+            _dataset_items = DictTriples([
+                ("title", DCT.title, None, Literal),
+                ("url", DCAT.landingPage, None, URIRef, FOAF.Document),
+            ])
+
+            def graph_from_dataset(self, dataset_dict, dataset_ref):
+                self._add_triples_from_dict(
+                    dataset_dict, dataset_ref, self._dataset_items
+                )
+
+    If `list_value` or `date_value` are True, the values are added with
+    `_add_list_triple()` or `_add_date_triple()` respectively.
+    """
+
+    def __init__(self, items, list_value=False, date_value=False):
+        self.items = tuple(items)
+        self.list_value = list_value
+        self.date_value = date_value
+        self._emitters = tuple(self._compile(item) for item in self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def add_to_graph(self, profile, _dict, subject):
+        extras = profile._extras_index(_dict)
+        for emit in self._emitters:
+            emit(profile, _dict, extras, subject)
+
+    def _compile(self, item):
+        try:
+            key, predicate, fallbacks, _type, _class = item
+        except ValueError:
+            key, predicate, fallbacks, _type = item
+            _class = None
+
+        get_value = _value_getter(key, fallbacks)
+
+        if self.list_value:
+
+            def emit(profile, _dict, extras, subject):
+                value = get_value(_dict, extras)
+                if value:
+                    profile._add_list_triple(
+                        subject, predicate, value, _type, None, _class
+                    )
+
+        elif self.date_value:
+
+            def emit(profile, _dict, extras, subject):
+                value = get_value(_dict, extras)
+                if value:
+                    profile._add_date_triple(subject, predicate, value, _type)
+
+        else:
+            # ensure URIRef items are preprocessed (space removal/url encoding)
+            if _type == URIRef:
+                _type = CleanedURIRef
+
+            def emit(profile, _dict, extras, subject):
+                value = get_value(_dict, extras)
+                if not value:
+                    return
+                # If it is a dict, we assume it's a fluent multilingual field
+                if isinstance(value, dict):
+                    for lang, translated_value in value.items():
+                        profile.g.add(
+                            (subject, predicate, Literal(translated_value, lang=lang))
+                        )
+                    return
+                object = _type(value)
+                profile.g.add((subject, predicate, object))
+                if _class and isinstance(object, URIRef):
+                    profile.g.add((object, RDF.type, _class))
+
+        return emit
+
+
+def _value_getter(key, fallbacks):
+    """
+    Returns a function that gets the value of a `DictTriples` item from a
+    CKAN dict and the index of its extras (see `_get_dict_value`)
+    """
+    keys = (key,) + tuple(fallbacks or ())
+
+    if isinstance(key, tuple):
+        candidates = key
+
+        def get_value(_dict, extras):
+            for key in candidates:
+                if key in _dict:
+                    break
+            return _first_value(_dict, extras, (key,) + keys[1:])
+
+        return get_value
+
+    if len(keys) == 1:
+
+        def get_value(_dict, extras):
+            if key in _dict:
+                return _dict[key]
+            return extras.get(key)
+
+        return get_value
+
+    def get_value(_dict, extras):
+        return _first_value(_dict, extras, keys)
+
+    return get_value
+
+
+def _first_value(_dict, extras, keys):
+    value = None
+    for key in keys:
+        value = _dict[key] if key in _dict else extras.get(key)
+        if value:
+            break
+    return value
+
+
 class RDFProfile(object):
     """Base class with helper methods for implementing RDF parsing profiles
 
@@ -131,12 +313,11 @@ class RDFProfile(object):
 
     _form_languages = None
 
-    # Cache for mappings of licenses URL/title to ID built when needed in
-    # _license().
-    _licenceregister_cache = None
+    # NodeView used by the `_object*` helpers, see `use_node_view()`
+    _node_view = None
 
-    # Cache for organization_show details (used for publisher fallback)
-    _org_cache: dict = {}
+    # (extras list, length, index) of the last dict indexed in _extras_index()
+    _indexed_extras = None
 
     def __init__(self, graph, dataset_type="dataset", compatibility_mode=False):
         """Class constructor
@@ -157,21 +338,44 @@ class RDFProfile(object):
         self._default_locale_lang = None
 
 
-        try:
-            schema_show = get_action("scheming_dataset_schema_show")
-            try:
-                schema = schema_show({}, {"type": dataset_type})
-            except ObjectNotFound:
-                raise ObjectNotFound(f"Unknown dataset schema: {dataset_type}")
-
-            self._dataset_schema = schema
-
-        except KeyError:
-            pass
+        self._dataset_schema = dataset_schema_cache.get(dataset_type)
 
         if self._dataset_schema:
             self._form_languages = self._dataset_schema.get("form_languages")
 
+    def rebind(self, graph):
+        """
+        Points the profile to a different rdflib.Graph instance
+
+        Processors create the profile instances once and reuse them for all
+        the datasets they handle, so the schema and config values loaded in
+        the constructor are not looked up again. Per-dataset state is
+        cleared with `reset()`.
+        """
+        self.g = graph
+        self.reset()
+
+    def reset(self):
+        """
+        Clears any state kept between calls to `parse_dataset()` or
+        `graph_from_dataset()`
+
+        It is called by the processors before each dataset is handled.
+        Profiles that store per-dataset values on the instance should
+        extend this method (and call the parent one).
+        """
+        self._node_view = None
+        self._indexed_extras = None
+
+    def use_node_view(self, node_view):
+        """
+        Serves the lookups of the `_object*` helpers from a `NodeView` of
+        the graph until the next `reset()`
+
+        Used by the parser, as the graph is not modified when parsing.
+        """
+        self._node_view = node_view
+
     def _datasets(self):
         """
         Generator that returns all DCAT datasets on the graph
@@ -189,7 +393,7 @@ class RDFProfile(object):
         Yields term.URIRef objects that can be used on graph lookups
         and queries
         """
-        for distribution in self.g.objects(dataset, DCAT.distribution):
+        for distribution in self._objects(dataset, DCAT.distribution):
             yield distribution
 
     def _get_default_locale_lang(self):
@@ -216,6 +420,15 @@ class RDFProfile(object):
             keywords.extend([k.strip() for k in keyword.split(",")])
         return keywords
 
+    def _objects(self, subject, predicate):
+        """
+        Returns the objects for this subject and predicate, from the node
+        view if the profile is using one
+        """
+        if self._node_view is not None:
+            return self._node_view.objects(subject, predicate)
+        return self.g.objects(subject, predicate)
+
     def _object(self, subject, predicate):
         """
         Helper for returning the first object for this subject and predicate
@@ -224,7 +437,7 @@ class RDFProfile(object):
 
         Returns an rdflib reference (URIRef or BNode) or None if not found
         """
-        for _object in self.g.objects(subject, predicate):
+        for _object in self._objects(subject, predicate):
             return _object
         return None
 
@@ -256,7 +469,7 @@ class RDFProfile(object):
         if multilingual:
             return self._object_value_multilingual(subject, predicate)
         fallback = ""
-        for o in self.g.objects(subject, predicate):
+        for o in self._objects(subject, predicate):
             if isinstance(o, Literal):
                 if o.language and o.language == self._default_lang:
                     return str(o)
@@ -264,23 +477,22 @@ class RDFProfile(object):
                 # language is available
                 elif fallback == "":
                     fallback = str(o)
-            elif len(list(self.g.objects(o, RDFS.label))):
-                return str(next(self.g.objects(o, RDFS.label)))
             else:
-                return str(o)
+                label = self._object(o, RDFS.label)
+                return str(o if label is None else label)
         return fallback
 
     def _object_value_multilingual(self, subject, predicate):
         out = {}
-        for o in self.g.objects(subject, predicate):
+        for o in self._objects(subject, predicate):
 
             if isinstance(o, Literal):
                 if o.language:
                     out[o.language] = str(o)
                 else:
                     out[self._default_lang] = str(o)
-            elif len(list(self.g.objects(o, RDFS.label))):
-                for label in self.g.objects(o, RDFS.label):
+            elif self._object(o, RDFS.label) is not None:
+                for label in self._objects(o, RDFS.label):
                     if label.language:
                         out[label.language] = str(label)
                     else:
@@ -339,7 +551,7 @@ class RDFProfile(object):
         If the value can not be parsed as integer, returns an empty list
         """
         object_values = []
-        for object in self.g.objects(subject, predicate):
+        for object in self._objects(subject, predicate):
             if object:
                 try:
                     object_values.append(int(float(object)))
@@ -357,7 +569,7 @@ class RDFProfile(object):
         If the value can not be parsed as a float, returns an empty list
         """
         object_values = []
-        for object in self.g.objects(subject, predicate):
+        for object in self._objects(subject, predicate):
             if object:
                 try:
                     object_values.append(float(object))
@@ -374,7 +586,7 @@ class RDFProfile(object):
 
         If no values found, returns an empty list
         """
-        return [str(o) for o in self.g.objects(subject, predicate)]
+        return [str(o) for o in self._objects(subject, predicate)]
 
     def _object_value_list_multilingual(self, subject, predicate):
         """
@@ -399,7 +611,7 @@ class RDFProfile(object):
         If no values found, returns an empty list
         """
         out = {}
-        for o in self.g.objects(subject, predicate):
+        for o in self._objects(subject, predicate):
             lang = o.language or self._default_lang
             if lang not in out:
                 out[lang] = []
@@ -472,7 +684,7 @@ class RDFProfile(object):
     def _read_time_interval_schema_org(self, subject, predicate):
         start_date = end_date = None
 
-        for interval in self.g.objects(subject, predicate):
+        for interval in self._objects(subject, predicate):
             start_date = self._object_value(interval, SCHEMA.startDate)
             end_date = self._object_value(interval, SCHEMA.endDate)
 
@@ -484,7 +696,7 @@ class RDFProfile(object):
     def _read_time_interval_dcat(self, subject, predicate):
         start_date = end_date = None
 
-        for interval in self.g.objects(subject, predicate):
+        for interval in self._objects(subject, predicate):
             start_date = self._object_value(interval, DCAT.startDate)
             end_date = self._object_value(interval, DCAT.endDate)
 
@@ -496,9 +708,9 @@ class RDFProfile(object):
     def _read_time_interval_time(self, subject, predicate):
         start_date = end_date = None
 
-        for interval in self.g.objects(subject, predicate):
-            start_nodes = [t for t in self.g.objects(interval, TIME.hasBeginning)]
-            end_nodes = [t for t in self.g.objects(interval, TIME.hasEnd)]
+        for interval in self._objects(subject, predicate):
+            start_nodes = [t for t in self._objects(interval, TIME.hasBeginning)]
+            end_nodes = [t for t in self._objects(interval, TIME.hasEnd)]
             if start_nodes:
                 start_date = self._object_value_multiple_predicate(
                     start_nodes[0],
@@ -548,11 +760,11 @@ class RDFProfile(object):
         agents = []
         default_lang = self._get_default_locale_lang()
 
-        for agent in self.g.objects(subject, predicate):
+        for agent in self._objects(subject, predicate):
             agent_details = {}
             agent_details["uri"] = str(agent) if isinstance(agent, term.URIRef) else ""
 
-            names = list(self.g.objects(agent, FOAF.name))
+            names = list(self._objects(agent, FOAF.name))
             translations = {}
             fallback_name = ""
             for name_literal in names:
@@ -606,7 +818,7 @@ class RDFProfile(object):
         contacts = []
         default_lang = self._get_default_locale_lang()
 
-        for agent in self.g.objects(subject, predicate):
+        for agent in self._objects(subject, predicate):
 
             contact = {}
             contact["uri"] = str(agent) if isinstance(agent, URIRef) else ""
@@ -616,13 +828,13 @@ class RDFProfile(object):
             )
 
             name_literals = []
-            for literal in self.g.objects(agent, VCARD.fn):
+            for literal in self._objects(agent, VCARD.fn):
                 name_literals.append(literal)
-            for value in self.g.objects(agent, VCARD.hasFN):
+            for value in self._objects(agent, VCARD.hasFN):
                 if isinstance(value, Literal):
                     name_literals.append(value)
                 elif isinstance(value, BNode):
-                    name_literals.extend(self.g.objects(value, VCARD.hasValue))
+                    name_literals.extend(self._objects(value, VCARD.hasValue))
                 else:
                     name_literals.append(value)
 
@@ -671,18 +883,14 @@ class RDFProfile(object):
 
         Returns the String or None if the value is no valid GeoJSON or WKT geometry.
         """
-        for geometry in self.g.objects(spatial, datatype):
+        for geometry in self._objects(spatial, datatype):
             if geometry.datatype == URIRef(GEOJSON_IMT) or not geometry.datatype:
-                try:
-                    json.loads(str(geometry))
+                if is_geojson(str(geometry)):
                     cur_value = str(geometry)
-                except (ValueError, TypeError):
-                    pass
             if not cur_value and geometry.datatype == GSP.wktLiteral:
-                try:
-                    cur_value = json.dumps(wkt.loads(str(geometry)))
-                except (ValueError, TypeError):
-                    pass
+                geojson = wkt_to_geojson(str(geometry))
+                if geojson is not None:
+                    cur_value = geojson
         return cur_value
 
     def _spatial(self, subject, predicate):
@@ -708,7 +916,7 @@ class RDFProfile(object):
         bbox = None
         cent = None
 
-        for spatial in self.g.objects(subject, predicate):
+        for spatial in self._objects(subject, predicate):
 
             if isinstance(spatial, URIRef):
                 uri = str(spatial)
@@ -720,9 +928,9 @@ class RDFProfile(object):
                 geom = self._parse_geodata(spatial, LOCN.geometry, geom)
                 bbox = self._parse_geodata(spatial, DCAT.bbox, bbox)
                 cent = self._parse_geodata(spatial, DCAT.centroid, cent)
-                for label in self.g.objects(spatial, SKOS.prefLabel):
+                for label in self._objects(spatial, SKOS.prefLabel):
                     text = str(label)
-                for label in self.g.objects(spatial, RDFS.label):
+                for label in self._objects(spatial, RDFS.label):
                     text = str(label)
 
         return {
@@ -741,26 +949,17 @@ class RDFProfile(object):
 
         The first distribution with a license found in the registry is used so
         that if distributions have different licenses we'll only get the first
-        one.
+        one. License URIs are matched regardless of scheme, trailing slashes
+        and `legalcode` suffixes (see `ckanext.dcat.licenses`).
         """
-        if self._licenceregister_cache is not None:
-            license_uri2id, license_title2id = self._licenceregister_cache
-        else:
-            license_uri2id = {}
-            license_title2id = {}
-            for license_id, license in list(LicenseRegister().items()):
-                license_uri2id[license.url] = license_id
-                license_title2id[license.title] = license_id
-            self._licenceregister_cache = license_uri2id, license_title2id
-
         for distribution in self._distributions(dataset_ref):
             # If distribution has a license, attach it to the dataset
             license = self._object(distribution, DCT.license)
             if license:
                 # Try to find a matching license comparing URIs, then titles
-                license_id = license_uri2id.get(license.toPython())
+                license_id = license_id_for_uri(license.toPython())
                 if not license_id:
-                    license_id = license_title2id.get(
+                    license_id = license_id_for_title(
                         self._object_value(license, DCT.title)
                     )
                 if license_id:
@@ -810,13 +1009,15 @@ class RDFProfile(object):
         2. label of dct:format if it is an instance of dct:IMT (see above)
         3. value of dct:format if it is an URIRef and doesn't look like an IANA type
 
-        If `normalize_ckan_format` is True the label will
-        be tried to match against the standard list of formats that is included
-        with CKAN core
+        If `normalize_ckan_format` is True the media type and then the label
+        will be tried to match against the standard list of formats that is
+        included with CKAN core
         (https://github.com/ckan/ckan/blob/master/ckan/config/resource_formats.json)
         This allows for instance to populate the CKAN resource format field
         with a format that view plugins, etc will understand (`csv`, `xml`,
-        etc.)
+        etc.). See `ckanext.dcat.formats.resource_format` for the supported
+        variants. Labels that are media type or file type URIs (eg from the
+        EU file type vocabulary) are not matched, so the URI is kept.
 
         Return a tuple with the media type and the label, both set to None if
         they couldn't be found.
@@ -849,12 +1050,11 @@ class RDFProfile(object):
 
         if (imt or label) and normalize_ckan_format:
 
-            format_registry = resource_formats()
-
-            if imt in format_registry:
-                label = format_registry[imt][1]
-            elif label in format_registry:
-                label = format_registry[label][1]
+            ckan_format = resource_format(imt)
+            if not ckan_format and label and not is_format_uri(label):
+                ckan_format = resource_format(label)
+            if ckan_format:
+                label = ckan_format[1]
 
         return imt, label
 
@@ -878,6 +1078,36 @@ class RDFProfile(object):
 
         return default
 
+    def _extras_index(self, _dict):
+        """
+        Returns a dict with the values of the extras of a CKAN dict
+
+        Values are keyed by the extra key and, for keys starting with
+        `dcat_`, by the key without the prefix, keeping the first match as
+        `_get_dict_value` does.
+
+        The index of the last dict is kept, so it is only built once for all
+        the tables of values added for a dataset. It is rebuilt if extras are
+        added, but dicts should not be otherwise modified while serializing.
+        """
+        extras = _dict.get("extras")
+        if not extras:
+            return {}
+
+        indexed = self._indexed_extras
+        if indexed and indexed[0] is extras and indexed[1] == len(extras):
+            return indexed[2]
+
+        index = {}
+        for extra in extras:
+            key = extra["key"]
+            index.setdefault(key, extra["value"])
+            if key.startswith("dcat_"):
+                index.setdefault(key[5:], extra["value"])
+
+        self._indexed_extras = (extras, len(extras), index)
+        return index
+
     def _read_list_value(self, value):
         items = []
         # List of values
@@ -1019,32 +1249,23 @@ class RDFProfile(object):
             config.get("ckanext.dcat.output_spatial_format", DEFAULT_SPATIAL_FORMATS)
         )
 
-        if isinstance(value, str):
-            try:
-                value = json.loads(value)
-            except (TypeError, ValueError):
-                return
+        decimals = output_decimals()
 
         if "wkt" in spatial_formats:
             # WKT, because GeoDCAT-AP says so
-            try:
+            wkt_value = geojson_to_wkt(value, decimals)
+            if wkt_value is not None:
                 self.g.add(
-                    (
-                        spatial_ref,
-                        predicate,
-                        Literal(
-                            wkt.dumps(value, decimals=4),
-                            datatype=GSP.wktLiteral,
-                        ),
-                    )
+                    (spatial_ref, predicate, Literal(wkt_value, datatype=GSP.wktLiteral))
                 )
-            except (TypeError, ValueError, InvalidGeoJSONException):
-                pass
 
         if "geojson" in spatial_formats:
             # GeoJSON
-            self.g.add((spatial_ref, predicate, Literal(json.dumps(value), datatype=GEOJSON_IMT)))
-
+            geojson_value = normalize_geojson(value, decimals)
+            if geojson_value is not None:
+                self.g.add(
+                    (spatial_ref, predicate, Literal(geojson_value, datatype=GEOJSON_IMT))
+                )
 
     def _add_spatial_to_dict(self, dataset_dict, key, spatial):
         if spatial.get(key):
@@ -1094,29 +1315,37 @@ class RDFProfile(object):
                     if _class:
                         self.g.add((_object, RDF.type, _class))
 
+    @property
+    def _schema_index(self):
+        """
+        Returns the precomputed lookups on the dataset schema (see
+        `ckanext.dcat.utils.SchemaIndex`), or None if no schema was provided
+        """
+        if not self._dataset_schema:
+            return None
+        return schema_index(self._dataset_schema)
+
     def _schema_field(self, key):
         """
         Returns the schema field information if the provided key exists as a field in
         the dataset schema (if one was provided)
         """
-        if not self._dataset_schema:
+        index = self._schema_index
+        if not index:
             return None
 
-        for field in self._dataset_schema["dataset_fields"]:
-            if field["field_name"] == key:
-                return field
+        return index.dataset_fields.get(key)
 
     def _schema_resource_field(self, key):
         """
         Returns the schema field information if the provided key exists as a field in
         the resources fields of the dataset schema (if one was provided)
         """
-        if not self._dataset_schema:
+        index = self._schema_index
+        if not index:
             return None
 
-        for field in self._dataset_schema["resource_fields"]:
-            if field["field_name"] == key:
-                return field
+        return index.resource_fields.get(key)
 
     def _multilingual_dataset_fields(self):
         """
@@ -1133,16 +1362,11 @@ class RDFProfile(object):
         return self._multilingual_fields(entity="resource")
 
     def _multilingual_fields(self, entity="dataset"):
-        if not self._dataset_schema:
+        index = self._schema_index
+        if not index:
             return []
 
-        out = []
-        for field in self._dataset_schema[f"{entity}_fields"]:
-            if field.get("validators") and any(
-                v for v in field["validators"].split() if v.startswith("fluent")
-            ):
-                out.append(field["field_name"])
-        return out
+        return list(getattr(index, f"multilingual_{entity}_fields"))
 
     def _set_dataset_value(self, dataset_dict, key, value):
         """
@@ -1163,15 +1387,15 @@ class RDFProfile(object):
         return dataset_dict
 
     def _set_list_dataset_value(self, dataset_dict, key, value):
-        schema_field = self._schema_field(key)
-        if schema_field and "scheming_multiple_text" in schema_field["validators"]:
+        index = self._schema_index
+        if index and key in index.multiple_text_dataset_fields:
             return self._set_dataset_value(dataset_dict, key, value)
         else:
             return self._set_dataset_value(dataset_dict, key, json.dumps(value))
 
     def _set_list_resource_value(self, resource_dict, key, value):
-        schema_field = self._schema_resource_field(key)
-        if schema_field and "scheming_multiple_text" in schema_field["validators"]:
+        index = self._schema_index
+        if index and key in index.multiple_text_resource_fields:
             resource_dict[key] = value
         else:
             resource_dict[key] = json.dumps(value)
@@ -1203,24 +1427,20 @@ class RDFProfile(object):
     def _add_triples_from_dict(
         self, _dict, subject, items, list_value=False, date_value=False
     ):
+        """
+        Adds the values of a table of items to the graph
 
-        for item in items:
-            try:
-                key, predicate, fallbacks, _type, _class = item
-            except ValueError:
-                key, predicate, fallbacks, _type = item
-                _class = None
-            self._add_triple_from_dict(
-                _dict,
-                subject,
-                predicate,
-                key,
-                fallbacks=fallbacks,
-                list_value=list_value,
-                date_value=date_value,
-                _type=_type,
-                _class=_class,
-            )
+        `items` is a `DictTriples` table, or a list of item tuples (see
+        `DictTriples` for details), which is compiled on each call. Profiles
+        should define their tables once as `DictTriples` class attributes.
+
+        `list_value` and `date_value` only apply to lists of item tuples, as
+        compiled tables already define how values are added.
+        """
+        if not isinstance(items, DictTriples):
+            items = DictTriples(items, list_value=list_value, date_value=date_value)
+
+        items.add_to_graph(self, _dict, subject)
 
     def _add_triple_from_dict(
         self,
@@ -1322,30 +1542,20 @@ class RDFProfile(object):
         Adds a new triple with a date object
 
         If the value is one of xsd:gYear, xsd:gYearMonth or xsd:date. If not
-        the value will be parsed using dateutil, and if the date obtained is correct,
-        added to the graph as an xsd:dateTime value.
+        the value will be parsed as a date and time, and if the date obtained is
+        correct, added to the graph as an xsd:dateTime value (see
+        `ckanext.dcat.dates.normalize_date`).
 
         If there are parsing errors, the literal string value is added.
         """
         if not value:
             return
 
-        if is_year(value):
-            self.g.add((subject, predicate, _type(value, datatype=XSD.gYear)))
-        elif is_year_month(value):
-            self.g.add((subject, predicate, _type(value, datatype=XSD.gYearMonth)))
-        elif is_date(value):
-            self.g.add((subject, predicate, _type(value, datatype=XSD.date)))
+        datatype, lexical_value = normalize_date(value)
+        if datatype:
+            self.g.add((subject, predicate, _type(lexical_value, datatype=datatype)))
         else:
-            try:
-                default_datetime = datetime.datetime(1, 1, 1, 0, 0, 0)
-                _date = parse_date(value, default=default_datetime)
-
-                self.g.add(
-                    (subject, predicate, _type(_date.isoformat(), datatype=XSD.dateTime))
-                )
-            except ValueError:
-                self.g.add((subject, predicate, _type(value)))
+            self.g.add((subject, predicate, _type(value)))
 
     def _last_catalog_modification(self):
         """
@@ -1355,19 +1565,10 @@ class RDFProfile(object):
         dataset.
 
         Returns a dateTime string in ISO format, or None if it could not be
-        found.
+        found. The value is cached for all profiles, see
+        `ckanext.dcat.utils.CatalogModificationCache`.
         """
-        context = {"ignore_auth": True}
-        result = get_action("package_search")(
-            context,
-            {
-                "sort": "metadata_modified desc",
-                "rows": 1,
-            },
-        )
-        if result and result.get("results"):
-            return result["results"][0]["metadata_modified"]
-        return None
+        return catalog_modification_cache.get()
 
     def _add_mailto(self, mail_addr):
         """
@@ -12,7 +12,7 @@ from rdflib.namespace import Namespace
 from ckantoolkit import url_for, config, asbool, get_action
 
 from ckanext.dcat.utils import resource_uri
-from .base import RDFProfile, CleanedURIRef
+from .base import RDFProfile, CleanedURIRef, DictTriples
 from .base import (
     CR,
     DCT,
@@ -89,6 +89,78 @@ class CroissantProfile(RDFProfile):
     https://www.w3.org/wiki/WebSchemas/Datasets
     """
 
+    _dataset_items = DictTriples(
+        [
+            # Elements here are like: (key, predicate, fallbacks, _type)
+            ("title", SCHEMA.name, None, Literal),  # required
+            ("notes", SCHEMA.description, None, Literal),  # required
+            ("version", SCHEMA.version, None, Literal),  # recommended
+            ("cite_as", CR.citeAs, None, Literal),  # optional
+            (
+                "license",
+                SCHEMA.license,
+                ["license_url", "license_title"],
+                Literal,
+            ),  # required. Being here implies a cardinality of ONE, but the Croissant specification really indicates a cardinality of MANY. See _list_fields_graph() for the approach that would allow this. Keeping here in order to work with the default schema.
+            (
+                "structured_data_license",
+                SCHEMA.sdLicense,
+                None,
+                Literal,
+            ),  # recommended. Being here implies a cardinality of ONE, but the Croissant specification really indicates a cardinality of MANY. See _list_fields_graph() for the approach that would allow this. Keeping here in order to match license.
+        ]
+    )
+
+    _dataset_date_items = DictTriples(
+        [
+            ("created", SCHEMA.dateCreated, None, Literal),  # recommended
+            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),  # required
+            (
+                "modified",
+                SCHEMA.dateModified,
+                ["metadata_modified"],
+                Literal,
+            ),  # recommended
+        ],
+        date_value=True,
+    )
+
+    _dataset_list_items = DictTriples(
+        [
+            ("language", SCHEMA.inLanguage, None, Literal),  # recommended
+            ("same_as", SCHEMA.sameAs, None, Literal),  # recommended
+            # ("license", SCHEMA.license, None, Literal), # required. This would appear here if using the Croissant cardinality of MANY. See schemas/croissant.yaml for further details.
+            # ("structured_data_license", SCHEMA.sdLicense, None, Literal), # recommended. This would appear here is using the Croissant cardinality of MANY. See schemas/croissant.yaml for further details.
+        ],
+        list_value=True,
+    )
+
+    _agent_items = DictTriples(
+        [
+            ("identifier", SCHEMA.identifier, None, Literal),
+            ("name", SCHEMA.name, None, Literal),
+            ("email", SCHEMA.email, None, Literal),
+            ("url", SCHEMA.url, None, Literal),
+        ]
+    )
+
+    # List values of each resource type
+    _resource_list_items = {
+        "fileObject": DictTriples(
+            [
+                ("same_as", SCHEMA.sameAs, None, Literal),
+            ],
+            list_value=True,
+        ),
+        "fileSet": DictTriples(
+            [
+                ("includes", CR.includes, None, Literal),
+                ("excludes", CR.excludes, None, Literal),
+            ],
+            list_value=True,
+        ),
+    }
+
     def graph_from_dataset(self, dataset_dict, dataset_ref):
 
         g = self.g
@@ -143,39 +215,11 @@ class CroissantProfile(RDFProfile):
             (dataset_ref, DCT.conformsTo, Literal("http://mlcommons.org/croissant/1.0"))
         )  # required
 
-        items = [
-            # Elements here are like: (key, predicate, fallbacks, _type)
-            ("title", SCHEMA.name, None, Literal),  # required
-            ("notes", SCHEMA.description, None, Literal),  # required
-            ("version", SCHEMA.version, None, Literal),  # recommended
-            ("cite_as", CR.citeAs, None, Literal),  # optional
-            (
-                "license",
-                SCHEMA.license,
-                ["license_url", "license_title"],
-                Literal,
-            ),  # required. Being here implies a cardinality of ONE, but the Croissant specification really indicates a cardinality of MANY. See _list_fields_graph() for the approach that would allow this. Keeping here in order to work with the default schema.
-            (
-                "structured_data_license",
-                SCHEMA.sdLicense,
-                None,
-                Literal,
-            ),  # recommended. Being here implies a cardinality of ONE, but the Croissant specification really indicates a cardinality of MANY. See _list_fields_graph() for the approach that would allow this. Keeping here in order to match license.
-        ]
-        self._add_triples_from_dict(dataset_dict, dataset_ref, items)
-
-        items = [
-            ("created", SCHEMA.dateCreated, None, Literal),  # recommended
-            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),  # required
-            (
-                "modified",
-                SCHEMA.dateModified,
-                ["metadata_modified"],
-                Literal,
-            ),  # recommended
-        ]
+        self._add_triples_from_dict(dataset_dict, dataset_ref, self._dataset_items)
 
-        self._add_date_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_date_items
+        )
 
         dataset_url = url_for(
             "dataset.read", id=dataset_dict["name"], _external=True
@@ -230,13 +274,9 @@ class CroissantProfile(RDFProfile):
             )  # recommended
 
     def _list_fields_graph(self, dataset_ref, dataset_dict):
-        items = [
-            ("language", SCHEMA.inLanguage, None, Literal),  # recommended
-            ("same_as", SCHEMA.sameAs, None, Literal),  # recommended
-            # ("license", SCHEMA.license, None, Literal), # required. This would appear here if using the Croissant cardinality of MANY. See schemas/croissant.yaml for further details.
-            # ("structured_data_license", SCHEMA.sdLicense, None, Literal), # recommended. This would appear here is using the Croissant cardinality of MANY. See schemas/croissant.yaml for further details.
-        ]
-        self._add_list_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_list_items
+        )
 
     def _agent_graph(self, dataset_ref, dataset_dict, agent_role):
         agent_dicts = []
@@ -290,13 +330,7 @@ class CroissantProfile(RDFProfile):
             self.g.add((dataset_ref, agent_role, agent_ref))
             self.g.add((agent_ref, RDF.type, agent_type))
 
-            items = [
-                ("identifier", SCHEMA.identifier, None, Literal),
-                ("name", SCHEMA.name, None, Literal),
-                ("email", SCHEMA.email, None, Literal),
-                ("url", SCHEMA.url, None, Literal),
-            ]
-            self._add_triples_from_dict(agent_dict, agent_ref, items)
+            self._add_triples_from_dict(agent_dict, agent_ref, self._agent_items)
 
     def _temporal_graph(self, dataset_ref, dataset_dict):
         start = self._get_dataset_value(dataset_dict, "temporal_start")
@@ -426,18 +460,9 @@ class CroissantProfile(RDFProfile):
             )
 
     def _resource_list_fields_graph(self, resource_ref, resource_dict):
-        if resource_dict.get("type") == "fileObject":
-            items = [
-                ("same_as", SCHEMA.sameAs, None, Literal),
-            ]
-        elif resource_dict.get("type") == "fileSet":
-            items = [
-                ("includes", CR.includes, None, Literal),
-                ("excludes", CR.excludes, None, Literal),
-            ]
-        else:
-            items = []
-        self._add_list_triples_from_dict(resource_dict, resource_ref, items)
+        items = self._resource_list_items.get(resource_dict.get("type"))
+        if items:
+            self._add_triples_from_dict(resource_dict, resource_ref, items)
 
     def _resource_format_graph(self, resource_ref, resource_dict):
         if resource_dict.get("mimetype"):
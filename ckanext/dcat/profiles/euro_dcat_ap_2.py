@@ -4,7 +4,7 @@ from decimal import Decimal, DecimalException
 from rdflib import URIRef, BNode, Literal, Namespace, FOAF, PROV, RDF, RDFS
 from ckanext.dcat.utils import resource_uri
 
-from .base import URIRefOrLiteral, CleanedURIRef
+from .base import URIRefOrLiteral, CleanedURIRef, DictTriples
 from .base import (
     RDF,
     DCAT,
@@ -31,6 +31,86 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
 
     """
 
+    # key, predicate, fallbacks, _type, _class
+    _distribution_v2_items = DictTriples(
+        [
+            ("availability", DCATAP.availability, None, URIRefOrLiteral),
+            (
+                "compress_format",
+                DCAT.compressFormat,
+                None,
+                URIRefOrLiteral,
+                DCT.MediaType,
+            ),
+            (
+                "package_format",
+                DCAT.packageFormat,
+                None,
+                URIRefOrLiteral,
+                DCT.MediaType,
+            ),
+        ]
+    )
+
+    _distribution_v2_list_items = DictTriples(
+        [
+            (
+                "applicable_legislation",
+                DCATAP.applicableLegislation,
+                None,
+                URIRefOrLiteral,
+                ELI.LegalResource,
+            ),
+        ],
+        list_value=True,
+    )
+
+    _access_service_items = DictTriples(
+        [
+            ("availability", DCATAP.availability, None, URIRefOrLiteral),
+            ("license", DCT.license, None, URIRefOrLiteral),
+            ("access_rights", DCT.accessRights, None, URIRefOrLiteral),
+            ("title", DCT.title, None, Literal),
+            (
+                "endpoint_description",
+                DCAT.endpointDescription,
+                None,
+                URIRefOrLiteral,
+                RDFS.Resource,
+            ),
+            ("description", DCT.description, None, Literal),
+            ("modified", DCT.modified, None, Literal),
+        ]
+    )
+
+    # Extra list values for access services
+    _access_service_extra_list_items = DictTriples(
+        [
+            ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral),
+            ("format", DCT["format"], None, URIRefOrLiteral),
+            ("language", DCT.language, None, URIRefOrLiteral),
+            ("rights", DCT.rights, None, URIRefOrLiteral),
+            ("landing_page", DCAT.landingPage, None, URIRefOrLiteral),
+            ("applicable_legislation", DCATAP.applicableLegislation, None, URIRefOrLiteral, ELI.LegalResource),
+            ("theme", DCAT.theme, None, URIRefOrLiteral),
+        ],
+        list_value=True,
+    )
+
+    _access_service_list_items = DictTriples(
+        [
+            (
+                "endpoint_url",
+                DCAT.endpointURL,
+                None,
+                URIRefOrLiteral,
+                RDFS.Resource,
+            ),
+            ("serves_dataset", DCAT.servesDataset, None, URIRefOrLiteral),
+        ],
+        list_value=True,
+    )
+
     def parse_dataset(self, dataset_dict, dataset_ref):
 
         # Call base method for common properties
@@ -395,25 +475,9 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
             distribution_ref = CleanedURIRef(resource_uri(resource_dict))
 
             #  Simple values
-            items = [
-                ("availability", DCATAP.availability, None, URIRefOrLiteral),
-                (
-                    "compress_format",
-                    DCAT.compressFormat,
-                    None,
-                    URIRefOrLiteral,
-                    DCT.MediaType,
-                ),
-                (
-                    "package_format",
-                    DCAT.packageFormat,
-                    None,
-                    URIRefOrLiteral,
-                    DCT.MediaType,
-                ),
-            ]
-
-            self._add_triples_from_dict(resource_dict, distribution_ref, items)
+            self._add_triples_from_dict(
+                resource_dict, distribution_ref, self._distribution_v2_items
+            )
 
             # Temporal resolution
             self._add_triple_from_dict(
@@ -447,16 +511,9 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
                             )
                         )
             #  Lists
-            items = [
-                (
-                    "applicable_legislation",
-                    DCATAP.applicableLegislation,
-                    None,
-                    URIRefOrLiteral,
-                    ELI.LegalResource,
-                ),
-            ]
-            self._add_list_triples_from_dict(resource_dict, distribution_ref, items)
+            self._add_triples_from_dict(
+                resource_dict, distribution_ref, self._distribution_v2_list_items
+            )
 
             # Access services
             access_service_list = resource_dict.get("access_services", [])
@@ -482,23 +539,10 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
                 self.g.add((access_service_node, RDF.type, DCAT.DataService))
 
                 #  Simple values
-                items = [
-                    ("availability", DCATAP.availability, None, URIRefOrLiteral),
-                    ("license", DCT.license, None, URIRefOrLiteral),
-                    ("access_rights", DCT.accessRights, None, URIRefOrLiteral),
-                    ("title", DCT.title, None, Literal),
-                    (
-                        "endpoint_description",
-                        DCAT.endpointDescription,
-                        None,
-                        URIRefOrLiteral,
-                        RDFS.Resource,
-                    ),
-                    ("description", DCT.description, None, Literal),
-                    ("modified", DCT.modified, None, Literal),
-                ]
                 self._add_triples_from_dict(
-                    access_service_dict, access_service_node, items
+                    access_service_dict,
+                    access_service_node,
+                    self._access_service_items,
                 )
 
                 if access_service_dict.get("modified"):
@@ -517,16 +561,11 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
                     self._add_agent_to_graph(access_service_node, DCT.creator, creator_dict)
 
                 # Extra list values for access services
-                extra_items = [
-                    ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral),
-                    ("format", DCT["format"], None, URIRefOrLiteral),
-                    ("language", DCT.language, None, URIRefOrLiteral),
-                    ("rights", DCT.rights, None, URIRefOrLiteral),
-                    ("landing_page", DCAT.landingPage, None, URIRefOrLiteral),
-                    ("applicable_legislation", DCATAP.applicableLegislation, None, URIRefOrLiteral, ELI.LegalResource),
-                    ("theme", DCAT.theme, None, URIRefOrLiteral),
-                ]
-                self._add_list_triples_from_dict(access_service_dict, access_service_node, extra_items)
+                self._add_triples_from_dict(
+                    access_service_dict,
+                    access_service_node,
+                    self._access_service_extra_list_items,
+                )
 
                 # Add single-value triple for identifier
                 self._add_triple_from_dict(
@@ -548,18 +587,10 @@ class EuropeanDCATAP2Profile(BaseEuropeanDCATAPProfile):
                 )
 
                 #  Lists
-                items = [
-                    (
-                        "endpoint_url",
-                        DCAT.endpointURL,
-                        None,
-                        URIRefOrLiteral,
-                        RDFS.Resource,
-                    ),
-                    ("serves_dataset", DCAT.servesDataset, None, URIRefOrLiteral),
-                ]
-                self._add_list_triples_from_dict(
-                    access_service_dict, access_service_node, items
+                self._add_triples_from_dict(
+                    access_service_dict,
+                    access_service_node,
+                    self._access_service_list_items,
                 )
 
             if access_service_list:
@@ -1,3 +1,5 @@
+from decimal import Decimal, DecimalException
+
 from rdflib import Literal, BNode, URIRef
 
 from ckanext.dcat.profiles import (
@@ -9,7 +11,7 @@ from ckanext.dcat.profiles import (
     OWL,
 )
 
-from .base import URIRefOrLiteral
+from .base import URIRefOrLiteral, DictTriples
 from ckanext.dcat.utils import dataset_uri
 from .euro_dcat_ap_2 import EuropeanDCATAP2Profile
 from .euro_dcat_ap_scheming import EuropeanDCATAPSchemingProfile
@@ -20,6 +22,13 @@ class EuropeanDCATAP3Profile(EuropeanDCATAP2Profile, EuropeanDCATAPSchemingProfi
     An RDF profile based on the DCAT-AP 3 for data portals in Europe
     """
 
+    _dataset_v3_list_items = DictTriples(
+        [
+            ("has_version", DCAT.hasVersion, None, URIRefOrLiteral),
+        ],
+        list_value=True,
+    )
+
     def parse_dataset(self, dataset_dict, dataset_ref):
 
         # Call base method for common properties
@@ -68,6 +77,19 @@ class EuropeanDCATAP3Profile(EuropeanDCATAP2Profile, EuropeanDCATAPSchemingProfi
 
         self._graph_from_catalog_base(catalog_dict, catalog_ref)
 
+    def _byte_size(self, value):
+        """
+        Returns the literal for the dcat:byteSize of a distribution, an
+        xsd:nonNegativeInteger if the value is a whole number
+        """
+        try:
+            size = Decimal(value)
+            if size == size.to_integral_value():
+                return Literal(int(size), datatype=XSD.nonNegativeInteger)
+        except (ValueError, TypeError, OverflowError, DecimalException):
+            pass
+        return super()._byte_size(value)
+
     def _graph_from_dataset_v3(self, dataset_dict, dataset_ref):
 
         dataset_series = False
@@ -89,23 +111,9 @@ class EuropeanDCATAP3Profile(EuropeanDCATAP2Profile, EuropeanDCATAPSchemingProfi
         )
 
         # hasVersion
-        items = [
-            ("has_version", DCAT.hasVersion, None, URIRefOrLiteral),
-        ]
-        self._add_list_triples_from_dict(dataset_dict, dataset_ref, items)
-
-        # byteSize decimal -> nonNegativeInteger
-        for subject, predicate, object in self.g.triples((None, DCAT.byteSize, None)):
-            if object and object.datatype == XSD.decimal:
-                self.g.remove((subject, predicate, object))
-
-                self.g.add(
-                    (
-                        subject,
-                        predicate,
-                        Literal(int(object), datatype=XSD.nonNegativeInteger),
-                    )
-                )
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_v3_list_items
+        )
 
         # Other identifiers
         value = self._get_dict_value(dataset_dict, "alternate_identifier")
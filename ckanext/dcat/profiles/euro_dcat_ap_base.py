@@ -11,8 +11,11 @@ from ckanext.dcat.utils import (
     DCAT_EXPOSE_SUBCATALOGS,
     DCAT_CLEAN_TAGS,
     publisher_uri_organization_fallback,
+    organization_cache,
 )
-from .base import RDFProfile, URIRefOrLiteral, CleanedURIRef
+from ckanext.dcat.licenses import license_uri
+
+from .base import RDFProfile, URIRefOrLiteral, CleanedURIRef, DictTriples
 from .base import (
     RDF,
     XSD,
@@ -43,6 +46,82 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
 
     """
 
+    # key, predicate, fallbacks, _type, _class
+    _dataset_items = DictTriples(
+        [
+            (("title_translated", "title"), DCT.title, None, Literal),
+            (("notes_translated", "notes"), DCT.description, None, Literal),
+            ("url", DCAT.landingPage, None, URIRef, FOAF.Document),
+            ("identifier", DCT.identifier, ["guid", "id"], URIRefOrLiteral),
+            ("version", OWL.versionInfo, ["dcat_version"], Literal),
+            ("version_notes", ADMS.versionNotes, None, Literal),
+            ("frequency", DCT.accrualPeriodicity, None, URIRefOrLiteral, DCT.Frequency),
+            ("dcat_type", DCT.type, None, URIRefOrLiteral),
+        ]
+    )
+
+    _dataset_date_items = DictTriples(
+        [
+            ("issued", DCT.issued, ["metadata_created"], Literal),
+            ("modified", DCT.modified, ["metadata_modified"], Literal),
+        ],
+        date_value=True,
+    )
+
+    _dataset_list_items = DictTriples(
+        [
+            ("language", DCT.language, None, URIRefOrLiteral, DCT.LinguisticSystem),
+            ("theme", DCAT.theme, None, URIRef),
+            ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral, DCT.Standard),
+            ("documentation", FOAF.page, None, URIRefOrLiteral, FOAF.Document),
+            ("related_resource", DCT.relation, None, URIRefOrLiteral, RDFS.Resource),
+            ("has_version", DCT.hasVersion, None, URIRefOrLiteral),
+            ("is_version_of", DCT.isVersionOf, None, URIRefOrLiteral),
+            ("source", DCT.source, None, URIRefOrLiteral),
+            ("sample", ADMS.sample, None, URIRefOrLiteral, DCAT.Distribution),
+        ],
+        list_value=True,
+    )
+
+    # Publisher and creator details
+    _agent_items = DictTriples(
+        [
+            ("name", FOAF.name, None, Literal),
+            ("email", FOAF.mbox, None, Literal),
+            ("url", FOAF.homepage, None, URIRef),
+            ("type", DCT.type, None, URIRefOrLiteral),
+            ("identifier", DCT.identifier, None, URIRefOrLiteral),
+        ]
+    )
+
+    _distribution_items = DictTriples(
+        [
+            (("name_translated", "name"), DCT.title, None, Literal),
+            (("description_translated", "description"), DCT.description, None, Literal),
+            ("status", ADMS.status, None, URIRefOrLiteral),
+            ("license", DCT.license, None, URIRefOrLiteral, DCT.LicenseDocument),
+            ("access_url", DCAT.accessURL, None, URIRef, RDFS.Resource),
+            ("download_url", DCAT.downloadURL, None, URIRef, RDFS.Resource),
+        ]
+    )
+
+    _distribution_list_items = DictTriples(
+        [
+            ("documentation", FOAF.page, None, URIRefOrLiteral, FOAF.Document),
+            ("language", DCT.language, None, URIRefOrLiteral, DCT.LinguisticSystem),
+            ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral, DCT.Standard),
+        ],
+        list_value=True,
+    )
+
+    _distribution_date_items = DictTriples(
+        [
+            ("issued", DCT.issued, ["created"], Literal),
+            ("modified", DCT.modified, ["metadata_modified"], Literal),
+        ],
+        date_value=True,
+    )
+
     def _parse_dataset_base(self, dataset_dict, dataset_ref):
 
         dataset_dict["extras"] = []
@@ -339,27 +418,7 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
         g.add((dataset_ref, RDF.type, DCAT.Dataset))
 
         # Basic fields
-        title_key = (
-            "title_translated"
-            if "title_translated" in dataset_dict
-            else "title"
-        )
-        notes_key = (
-            "notes_translated"
-            if "notes_translated" in dataset_dict
-            else "notes"
-        )
-        items = [
-            (title_key, DCT.title, None, Literal),
-            (notes_key, DCT.description, None, Literal),
-            ("url", DCAT.landingPage, None, URIRef, FOAF.Document),
-            ("identifier", DCT.identifier, ["guid", "id"], URIRefOrLiteral),
-            ("version", OWL.versionInfo, ["dcat_version"], Literal),
-            ("version_notes", ADMS.versionNotes, None, Literal),
-            ("frequency", DCT.accrualPeriodicity, None, URIRefOrLiteral, DCT.Frequency),
-            ("dcat_type", DCT.type, None, URIRefOrLiteral),
-        ]
-        self._add_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(dataset_dict, dataset_ref, self._dataset_items)
 
         # Tags
         if "tags_translated" in dataset_dict:
@@ -371,25 +430,14 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
                 g.add((dataset_ref, DCAT.keyword, Literal(tag["name"])))
 
         # Dates
-        items = [
-            ("issued", DCT.issued, ["metadata_created"], Literal),
-            ("modified", DCT.modified, ["metadata_modified"], Literal),
-        ]
-        self._add_date_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_date_items
+        )
 
         #  Lists
-        items = [
-            ("language", DCT.language, None, URIRefOrLiteral, DCT.LinguisticSystem),
-            ("theme", DCAT.theme, None, URIRef),
-            ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral, DCT.Standard),
-            ("documentation", FOAF.page, None, URIRefOrLiteral, FOAF.Document),
-            ("related_resource", DCT.relation, None, URIRefOrLiteral, RDFS.Resource),
-            ("has_version", DCT.hasVersion, None, URIRefOrLiteral),
-            ("is_version_of", DCT.isVersionOf, None, URIRefOrLiteral),
-            ("source", DCT.source, None, URIRefOrLiteral),
-            ("sample", ADMS.sample, None, URIRefOrLiteral, DCAT.Distribution),
-        ]
-        self._add_list_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_list_items
+        )
 
         # Contact details
         if any(
@@ -460,18 +508,7 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
             }
         elif dataset_dict.get("organization"):
             # Fall back to dataset org
-            org_id = dataset_dict["organization"]["id"]
-            org_dict = None
-            if org_id in self._org_cache:
-                org_dict = self._org_cache[org_id]
-            else:
-                try:
-                    org_dict = toolkit.get_action("organization_show")(
-                        {"ignore_auth": True}, {"id": org_id}
-                    )
-                    self._org_cache[org_id] = org_dict
-                except toolkit.ObjectNotFound:
-                    pass
+            org_dict = organization_cache.get(dataset_dict["organization"]["id"])
             if org_dict:
                 publisher_ref = CleanedURIRef(
                     publisher_uri_organization_fallback(dataset_dict)
@@ -487,14 +524,9 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
         if publisher_ref:
             g.add((publisher_ref, RDF.type, FOAF.Agent))
             g.add((dataset_ref, DCT.publisher, publisher_ref))
-            items = [
-                ("name", FOAF.name, None, Literal),
-                ("email", FOAF.mbox, None, Literal),
-                ("url", FOAF.homepage, None, URIRef),
-                ("type", DCT.type, None, URIRefOrLiteral),
-                ("identifier", DCT.identifier, None, URIRefOrLiteral),
-            ]
-            self._add_triples_from_dict(publisher_details, publisher_ref, items)
+            self._add_triples_from_dict(
+                publisher_details, publisher_ref, self._agent_items
+            )
 
         # Creator
         creator_ref = None
@@ -529,14 +561,9 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
         if creator_ref:
             g.add((creator_ref, RDF.type, FOAF.Agent))
             g.add((dataset_ref, DCT.creator, creator_ref))  # Use DCT.creator for creator
-            items = [
-                ("name", FOAF.name, None, Literal),
-                ("email", FOAF.mbox, None, Literal),
-                ("url", FOAF.homepage, None, URIRef),
-                ("type", DCT.type, None, URIRefOrLiteral),
-                ("identifier", DCT.identifier, None, URIRefOrLiteral),
-            ]
-            self._add_triples_from_dict(creator_details, creator_ref, items)
+            self._add_triples_from_dict(
+                creator_details, creator_ref, self._agent_items
+            )
 
         # Temporal
         start = self._get_dataset_value(dataset_dict, "temporal_start")
@@ -577,6 +604,9 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
                 URIRefOrLiteral(dataset_dict["license_url"]), URIRef
             ):
                 resource_license_fallback = dataset_dict["license_url"]
+            elif dataset_dict.get("license_id"):
+                # Dicts not coming from package_show have no license_url
+                resource_license_fallback = license_uri(dataset_dict["license_id"])
 
         # Statetements
         self._add_statement_to_graph(
@@ -605,33 +635,14 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
             g.add((distribution, RDF.type, DCAT.Distribution))
 
             #  Simple values
-            name_key = (
-                "name_translated" if "name_translated" in resource_dict else "name"
+            self._add_triples_from_dict(
+                resource_dict, distribution, self._distribution_items
             )
-            description_key = (
-                "description_translated"
-                if "description_translated" in resource_dict
-                else "description"
-            )
-
-            items = [
-                (name_key, DCT.title, None, Literal),
-                (description_key, DCT.description, None, Literal),
-                ("status", ADMS.status, None, URIRefOrLiteral),
-                ("license", DCT.license, None, URIRefOrLiteral, DCT.LicenseDocument),
-                ("access_url", DCAT.accessURL, None, URIRef, RDFS.Resource),
-                ("download_url", DCAT.downloadURL, None, URIRef, RDFS.Resource),
-            ]
-
-            self._add_triples_from_dict(resource_dict, distribution, items)
 
             #  Lists
-            items = [
-                ("documentation", FOAF.page, None, URIRefOrLiteral, FOAF.Document),
-                ("language", DCT.language, None, URIRefOrLiteral, DCT.LinguisticSystem),
-                ("conforms_to", DCT.conformsTo, None, URIRefOrLiteral, DCT.Standard),
-            ]
-            self._add_list_triples_from_dict(resource_dict, distribution, items)
+            self._add_triples_from_dict(
+                resource_dict, distribution, self._distribution_list_items
+            )
 
             # Statetements
             self._add_statement_to_graph(
@@ -706,25 +717,13 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
                     )
 
             # Dates
-            items = [
-                ("issued", DCT.issued, ["created"], Literal),
-                ("modified", DCT.modified, ["metadata_modified"], Literal),
-            ]
-
-            self._add_date_triples_from_dict(resource_dict, distribution, items)
+            self._add_triples_from_dict(
+                resource_dict, distribution, self._distribution_date_items
+            )
 
             # Numbers
             if resource_dict.get("size"):
-                try:
-                    g.add(
-                        (
-                            distribution,
-                            DCAT.byteSize,
-                            Literal(Decimal(resource_dict["size"]), datatype=XSD.decimal),
-                        )
-                    )
-                except (ValueError, TypeError, DecimalException):
-                    g.add((distribution, DCAT.byteSize, Literal(resource_dict["size"])))
+                g.add((distribution, DCAT.byteSize, self._byte_size(resource_dict["size"])))
             # Checksum
             if resource_dict.get("hash"):
                 checksum = BNode()
@@ -751,6 +750,16 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
 
                 g.add((distribution, SPDX.checksum, checksum))
 
+    def _byte_size(self, value):
+        """
+        Returns the literal for the dcat:byteSize of a distribution, an
+        xsd:decimal if the value is a number
+        """
+        try:
+            return Literal(Decimal(value), datatype=XSD.decimal)
+        except (ValueError, TypeError, DecimalException):
+            return Literal(value)
+
     def _graph_from_catalog_base(self, catalog_dict, catalog_ref):
 
         g = self.g
@@ -787,6 +796,8 @@ class BaseEuropeanDCATAPProfile(RDFProfile):
                 g.add((catalog_ref, predicate, _type(value)))
 
         # Dates
-        modified = self._last_catalog_modification()
+        modified = catalog_dict.get("modified") if catalog_dict else None
+        if not modified:
+            modified = self._last_catalog_modification()
         if modified:
             self._add_date_triple(catalog_ref, DCT.modified, modified)
\ No newline at end of file
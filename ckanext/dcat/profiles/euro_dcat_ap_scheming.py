@@ -82,7 +82,8 @@ class EuropeanDCATAPSchemingProfile(RDFProfile):
             * Turn namespaced extras into repeating subfields
         """
 
-        if not self._dataset_schema:
+        index = self._schema_index
+        if not index:
             # Not using scheming
             return dataset_dict
 
@@ -100,13 +101,12 @@ class EuropeanDCATAPSchemingProfile(RDFProfile):
 
         # Parse lists
         def _parse_list_value(data_dict, field_name):
-            schema_field = self._schema_field(
-                field_name
-            ) or self._schema_resource_field(field_name)
+            if field_name in index.dataset_fields:
+                multiple_text = field_name in index.multiple_text_dataset_fields
+            else:
+                multiple_text = field_name in index.multiple_text_resource_fields
 
-            if schema_field and "scheming_multiple_text" in schema_field.get(
-                "validators", []
-            ):
+            if multiple_text:
                 if isinstance(data_dict[field_name], str):
                     try:
                         data_dict[field_name] = json.loads(data_dict[field_name])
@@ -114,13 +114,9 @@ class EuropeanDCATAPSchemingProfile(RDFProfile):
                         pass
 
         def _supports_agent_translations(field_name):
-            schema_field = self._schema_field(field_name)
-            if schema_field and "repeating_subfields" in schema_field:
-                return any(
-                    subfield.get("field_name") == "name_translated"
-                    for subfield in schema_field["repeating_subfields"]
-                )
-            return False
+            return "name_translated" in index.dataset_subfield_names.get(
+                field_name, []
+            )
 
         def _prune_agent_translations(agent_list):
             pruned = []
@@ -148,46 +144,42 @@ class EuropeanDCATAPSchemingProfile(RDFProfile):
             "spatial_coverage": "spatial",
             "temporal_coverage": "temporal",
         }
-        for schema_field in self._dataset_schema["dataset_fields"]:
-            if "repeating_subfields" in schema_field:
-                # Check if existing extras need to be migrated
-                field_name = schema_field["field_name"]
-                new_extras = []
-                new_dict = {}
-                check_name = new_fields_mapping.get(field_name, field_name)
-                subfield_names = [
-                    subfield["field_name"]
-                    for subfield in schema_field["repeating_subfields"]
-                ]
-                for extra in dataset_dict.get("extras", []):
-                    if extra["key"].startswith(f"{check_name}_"):
-                        subfield = extra["key"][extra["key"].index("_") + 1 :]
-                        if subfield in subfield_names:
-                            new_dict[subfield] = extra["value"]
-                        else:
-                            new_extras.append(extra)
-                    elif extra["key"] == "spatial" and field_name == "spatial_coverage":
-                        # Special case, spatial geom
-                        new_dict["geom"] = extra["value"]
+        for schema_field in index.repeating_dataset_fields:
+            # Check if existing extras need to be migrated
+            field_name = schema_field["field_name"]
+            new_extras = []
+            new_dict = {}
+            check_name = new_fields_mapping.get(field_name, field_name)
+            subfield_names = index.dataset_subfield_names[field_name]
+            for extra in dataset_dict.get("extras", []):
+                if extra["key"].startswith(f"{check_name}_"):
+                    subfield = extra["key"][extra["key"].index("_") + 1 :]
+                    if subfield in subfield_names:
+                        new_dict[subfield] = extra["value"]
                     else:
                         new_extras.append(extra)
-                # Legacy profiles may have already promoted namespaced extras such as
-                # `temporal_start` to first-level schema fields before we get here.
-                # Rebuild the repeating structure from those root fields as well.
-                for subfield in subfield_names:
-                    legacy_field_name = f"{check_name}_{subfield}"
-                    value = dataset_dict.get(legacy_field_name)
-                    if value not in (None, "", [], {}):
-                        new_dict.setdefault(subfield, value)
-                if field_name == "temporal_coverage":
-                    temporal_coverage = self._temporal_coverage_details(dataset_ref)
-                    if temporal_coverage:
-                        dataset_dict[field_name] = temporal_coverage
-                        dataset_dict["extras"] = new_extras
-                        continue
-                if new_dict:
-                    dataset_dict.setdefault(field_name, [new_dict])
+                elif extra["key"] == "spatial" and field_name == "spatial_coverage":
+                    # Special case, spatial geom
+                    new_dict["geom"] = extra["value"]
+                else:
+                    new_extras.append(extra)
+            # Legacy profiles may have already promoted namespaced extras such as
+            # `temporal_start` to first-level schema fields before we get here.
+            # Rebuild the repeating structure from those root fields as well.
+            for subfield in subfield_names:
+                legacy_field_name = f"{check_name}_{subfield}"
+                value = dataset_dict.get(legacy_field_name)
+                if value not in (None, "", [], {}):
+                    new_dict.setdefault(subfield, value)
+            if field_name == "temporal_coverage":
+                temporal_coverage = self._temporal_coverage_details(dataset_ref)
+                if temporal_coverage:
+                    dataset_dict[field_name] = temporal_coverage
                     dataset_dict["extras"] = new_extras
+                    continue
+            if new_dict:
+                dataset_dict.setdefault(field_name, [new_dict])
+                dataset_dict["extras"] = new_extras
 
         # Contact details
         contacts = self._contact_details(dataset_ref, DCAT.contactPoint)
@@ -209,21 +201,20 @@ class EuropeanDCATAPSchemingProfile(RDFProfile):
             dataset_dict["qualified_relation"] = qual_relations
 
         # Repeating subfields: resources
-        for schema_field in self._dataset_schema["resource_fields"]:
-            if "repeating_subfields" in schema_field:
-                # Check if value needs to be load from JSON
-                field_name = schema_field["field_name"]
-                for resource_dict in dataset_dict.get("resources", []):
-                    if resource_dict.get(field_name) and isinstance(
-                        resource_dict[field_name], str
-                    ):
-                        try:
-                            # TODO: load only subfields in schema?
-                            resource_dict[field_name] = json.loads(
-                                resource_dict[field_name]
-                            )
-                        except ValueError:
-                            pass
+        for schema_field in index.repeating_resource_fields:
+            # Check if value needs to be load from JSON
+            field_name = schema_field["field_name"]
+            for resource_dict in dataset_dict.get("resources", []):
+                if resource_dict.get(field_name) and isinstance(
+                    resource_dict[field_name], str
+                ):
+                    try:
+                        # TODO: load only subfields in schema?
+                        resource_dict[field_name] = json.loads(
+                            resource_dict[field_name]
+                        )
+                    except ValueError:
+                        pass
 
         return dataset_dict
 
@@ -3,7 +3,7 @@ from rdflib.namespace import Namespace
 from rdflib.namespace import DCTERMS as DCT
 from .base import CleanedURIRef
 from ckanext.dcat.utils import resource_uri
-from ckanext.dcat.profiles.base import URIRefOrLiteral
+from ckanext.dcat.profiles.base import URIRefOrLiteral, DictTriples
 from ckanext.dcat.profiles.euro_dcat_ap_3 import EuropeanDCATAP3Profile
 
 # HealthDCAT-AP namespace. Note: not finalized yet
@@ -37,6 +37,22 @@ class EuropeanHealthDCATAPProfile(EuropeanDCATAP3Profile):
     and Data Services descriptions in Europe.
     """
 
+    # key, predicate, fallbacks, _type, _class
+    _health_list_items = DictTriples(
+        [
+            ("analytics", HEALTHDCATAP.analytics, None, URIRefOrLiteral),
+            ("code_values", HEALTHDCATAP.hasCodeValues, None, URIRefOrLiteral),
+            ("coding_system", HEALTHDCATAP.hasCodingSystem, None, URIRefOrLiteral),
+            ("health_category", HEALTHDCATAP.healthCategory, None, URIRefOrLiteral),
+            ("health_theme", HEALTHDCATAP.healthCategory, None, URIRefOrLiteral),
+            ("legal_basis", DPV.hasLegalBasis, None, URIRefOrLiteral),
+            ("personal_data", DPV.hasPersonalData, None, URIRef),
+            ("publisher_type", HEALTHDCATAP.publisherType, None, URIRefOrLiteral),
+            ("purpose", DPV.hasPurpose, None, URIRefOrLiteral),
+        ],
+        list_value=True,
+    )
+
     def parse_dataset(self, dataset_dict, dataset_ref):
         # Call super method for DCAT-AP 3 properties
         dataset_dict = super(EuropeanHealthDCATAPProfile, self).parse_dataset(
@@ -189,19 +205,9 @@ class EuropeanHealthDCATAPProfile(EuropeanDCATAP3Profile):
         for prefix, namespace in namespaces.items():
             self.g.bind(prefix, namespace)
 
-        # key, predicate, fallbacks, _type, _class
-        list_items = [
-            ("analytics", HEALTHDCATAP.analytics, None, URIRefOrLiteral),
-            ("code_values", HEALTHDCATAP.hasCodeValues, None, URIRefOrLiteral),
-            ("coding_system", HEALTHDCATAP.hasCodingSystem, None, URIRefOrLiteral),
-            ("health_category", HEALTHDCATAP.healthCategory, None, URIRefOrLiteral),
-            ("health_theme", HEALTHDCATAP.healthCategory, None, URIRefOrLiteral),
-            ("legal_basis", DPV.hasLegalBasis, None, URIRefOrLiteral),
-            ("personal_data", DPV.hasPersonalData, None, URIRef),
-            ("publisher_type", HEALTHDCATAP.publisherType, None, URIRefOrLiteral),
-            ("purpose", DPV.hasPurpose, None, URIRefOrLiteral),
-        ]
-        self._add_list_triples_from_dict(dataset_dict, dataset_ref, list_items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._health_list_items
+        )
 
         multilingual_fields = set(self._multilingual_dataset_fields())
         for key, predicate in MULTILINGUAL_LITERAL_FIELDS.items():
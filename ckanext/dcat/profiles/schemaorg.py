@@ -1,11 +1,9 @@
-import datetime
-
-from dateutil.parser import parse as parse_date
 from rdflib import URIRef, BNode, Literal
 from ckantoolkit import url_for, config
 
+from ckanext.dcat.dates import iso_datetime
 from ckanext.dcat.utils import resource_uri, publisher_uri_organization_fallback
-from .base import RDFProfile, CleanedURIRef
+from .base import RDFProfile, CleanedURIRef, DictTriples
 from .base import (
     RDF,
     SCHEMA,
@@ -25,6 +23,60 @@ class SchemaOrgProfile(RDFProfile):
     https://www.w3.org/wiki/WebSchemas/Datasets
     """
 
+    # key, predicate, fallbacks, _type
+    _dataset_items = DictTriples(
+        [
+            ("identifier", SCHEMA.identifier, None, Literal),
+            ("title", SCHEMA.name, None, Literal),
+            ("notes", SCHEMA.description, None, Literal),
+            ("version", SCHEMA.version, ["dcat_version"], Literal),
+            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),
+            ("modified", SCHEMA.dateModified, ["metadata_modified"], Literal),
+            ("license", SCHEMA.license, ["license_url", "license_title"], Literal),
+        ]
+    )
+
+    _dataset_date_items = DictTriples(
+        [
+            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),
+            ("modified", SCHEMA.dateModified, ["metadata_modified"], Literal),
+        ],
+        date_value=True,
+    )
+
+    _dataset_list_items = DictTriples(
+        [
+            ("language", SCHEMA.inLanguage, None, Literal),
+        ],
+        list_value=True,
+    )
+
+    # Contact point items, keyed by agent prefix (see `_agent_graph()`)
+    _agent_contact_items = {}
+
+    _distribution_items = DictTriples(
+        [
+            ("name", SCHEMA.name, None, Literal),
+            ("description", SCHEMA.description, None, Literal),
+            ("license", SCHEMA.license, ["rights"], Literal),
+        ]
+    )
+
+    _distribution_date_items = DictTriples(
+        [
+            ("issued", SCHEMA.datePublished, None, Literal),
+            ("modified", SCHEMA.dateModified, None, Literal),
+        ],
+        date_value=True,
+    )
+
+    _distribution_list_items = DictTriples(
+        [
+            ("language", SCHEMA.inLanguage, None, Literal),
+        ],
+        list_value=True,
+    )
+
     def graph_from_dataset(self, dataset_dict, dataset_ref):
 
         g = self.g
@@ -80,42 +132,29 @@ class SchemaOrgProfile(RDFProfile):
         """
         Adds a new triple with a date object
 
-        Dates are parsed using dateutil, and if the date obtained is correct,
-        added to the graph as an SCHEMA.DateTime value.
+        Dates are parsed (see `ckanext.dcat.dates.iso_datetime`), and if the
+        date obtained is correct, added to the graph as an SCHEMA.DateTime value.
 
         If there are parsing errors, the literal string value is added.
         """
         if not value:
             return
-        try:
-            default_datetime = datetime.datetime(1, 1, 1, 0, 0, 0)
-            _date = parse_date(value, default=default_datetime)
 
-            self.g.add((subject, predicate, _type(_date.isoformat())))
-        except ValueError:
+        iso_value = iso_datetime(value)
+        if iso_value:
+            self.g.add((subject, predicate, _type(iso_value)))
+        else:
             self.g.add((subject, predicate, _type(value)))
 
     def _bind_namespaces(self):
         self.g.namespace_manager.bind("schema", SCHEMA, replace=True)
 
     def _basic_fields_graph(self, dataset_ref, dataset_dict):
-        items = [
-            ("identifier", SCHEMA.identifier, None, Literal),
-            ("title", SCHEMA.name, None, Literal),
-            ("notes", SCHEMA.description, None, Literal),
-            ("version", SCHEMA.version, ["dcat_version"], Literal),
-            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),
-            ("modified", SCHEMA.dateModified, ["metadata_modified"], Literal),
-            ("license", SCHEMA.license, ["license_url", "license_title"], Literal),
-        ]
-        self._add_triples_from_dict(dataset_dict, dataset_ref, items)
-
-        items = [
-            ("issued", SCHEMA.datePublished, ["metadata_created"], Literal),
-            ("modified", SCHEMA.dateModified, ["metadata_modified"], Literal),
-        ]
+        self._add_triples_from_dict(dataset_dict, dataset_ref, self._dataset_items)
 
-        self._add_date_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_date_items
+        )
 
         # Dataset URL
         dataset_url = url_for("dataset.read", id=dataset_dict["name"], _external=True)
@@ -154,10 +193,9 @@ class SchemaOrgProfile(RDFProfile):
             self.g.add((dataset_ref, SCHEMA.keywords, Literal(tag["name"])))
 
     def _list_fields_graph(self, dataset_ref, dataset_dict):
-        items = [
-            ("language", SCHEMA.inLanguage, None, Literal),
-        ]
-        self._add_list_triples_from_dict(dataset_dict, dataset_ref, items)
+        self._add_triples_from_dict(
+            dataset_dict, dataset_ref, self._dataset_list_items
+        )
 
     def _agent_graph(self, dataset_ref, dataset_dict, agent_type, schema_property_prefix):
         uri_key = f"{schema_property_prefix}_uri"
@@ -207,20 +245,25 @@ class SchemaOrgProfile(RDFProfile):
                 )
             self.g.add((contact_point, SCHEMA.url, Literal(agent_url)))
 
-            items = [
-                (
-                    email_key,
-                    SCHEMA.email,
-                    ["contact_email", "maintainer_email", "author_email"],
-                    Literal,
-                ),
-                (
-                    name_key,
-                    SCHEMA.name,
-                    ["contact_name", "maintainer", "author"],
-                    Literal,
-                ),
-            ]
+            items = self._agent_contact_items.get(schema_property_prefix)
+            if items is None:
+                items = DictTriples(
+                    [
+                        (
+                            email_key,
+                            SCHEMA.email,
+                            ["contact_email", "maintainer_email", "author_email"],
+                            Literal,
+                        ),
+                        (
+                            name_key,
+                            SCHEMA.name,
+                            ["contact_name", "maintainer", "author"],
+                            Literal,
+                        ),
+                    ]
+                )
+                self._agent_contact_items[schema_property_prefix] = items
             self._add_triples_from_dict(dataset_dict, contact_point, items)
 
             agent_identifier = self._get_dataset_value(dataset_dict, identifier_key)
@@ -295,26 +338,18 @@ class SchemaOrgProfile(RDFProfile):
         self._distribution_numbers_graph(distribution, resource_dict)
 
     def _distribution_basic_fields_graph(self, distribution, resource_dict):
-        items = [
-            ("name", SCHEMA.name, None, Literal),
-            ("description", SCHEMA.description, None, Literal),
-            ("license", SCHEMA.license, ["rights"], Literal),
-        ]
-
-        self._add_triples_from_dict(resource_dict, distribution, items)
-
-        items = [
-            ("issued", SCHEMA.datePublished, None, Literal),
-            ("modified", SCHEMA.dateModified, None, Literal),
-        ]
+        self._add_triples_from_dict(
+            resource_dict, distribution, self._distribution_items
+        )
 
-        self._add_date_triples_from_dict(resource_dict, distribution, items)
+        self._add_triples_from_dict(
+            resource_dict, distribution, self._distribution_date_items
+        )
 
     def _distribution_list_fields_graph(self, distribution, resource_dict):
-        items = [
-            ("language", SCHEMA.inLanguage, None, Literal),
-        ]
-        self._add_list_triples_from_dict(resource_dict, distribution, items)
+        self._add_triples_from_dict(
+            resource_dict, distribution, self._distribution_list_items
+        )
 
     def _distribution_format_graph(self, distribution, resource_dict):
         if resource_dict.get("format"):
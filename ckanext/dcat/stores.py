@@ -0,0 +1,848 @@
+import functools
+import os
+from array import array
+import sqlite3
+import tempfile
+import uuid
+import weakref
+from io import StringIO
+
+from ckantoolkit import config
+
+import rdflib
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.store import Store
+from rdflib.namespace import RDF
+from rdflib.plugins.parsers.ntriples import (
+    W3CNTriplesParser, NTGraphSink, r_wspace, r_tail)
+from rdflib.plugins.serializers.nt import _nt_row
+from rdflib.exceptions import ParserError
+
+from ckanext.dcat.exceptions import RDFParserException
+from ckanext.dcat.profiles import DCAT
+
+RDF_STORE_CONFIG_OPTION = 'ckanext.dcat.rdf.store'
+RDF_STORE_TMP_DIR_CONFIG_OPTION = 'ckanext.dcat.rdf.store.tmp_dir'
+
+DEFAULT_RDF_STORE = 'Memory'
+
+
+# Nodes typed as one of these classes are not followed when collecting the
+# description of a dataset (eg a dataset linking to its catalog or to
+# another dataset), otherwise descriptions could grow to the whole catalog
+BOUNDARY_CLASSES = (DCAT.Dataset, DCAT.Catalog)
+
+
+class _NQuadsStreamParser(W3CNTriplesParser):
+    '''
+    N-Quads parser that passes triples to the sink ignoring the graph name
+
+    The parsers treat the input as a single graph anyway (like
+    ConjunctiveGraph does), and this allows reusing the triple sinks.
+    '''
+
+    def parseline(self, bnode_context=None):
+        self.eat(r_wspace)
+        if (not self.line) or self.line.startswith('#'):
+            return
+
+        subject = self.subject(bnode_context)
+        self.eat(r_wspace)
+
+        predicate = self.predicate()
+        self.eat(r_wspace)
+
+        obj = self.object(bnode_context)
+        self.eat(r_wspace)
+
+        # Graph name, ignored
+        self.uriref() or self.nodeid(bnode_context)
+        self.eat(r_tail)
+
+        if self.line:
+            raise ParserError('Trailing garbage')
+
+        self.sink.triple(subject, predicate, obj)
+
+
+LINE_PARSERS = {
+    'nt': W3CNTriplesParser,
+    'nt11': W3CNTriplesParser,
+    'ntriples': W3CNTriplesParser,
+    'nquads': _NQuadsStreamParser,
+}
+
+
+def bounded_description(graph, node, boundaries=None):
+    '''
+    Generator that returns the triples describing a node in a graph
+
+    These are all triples with the node as subject plus, recursively, the
+    triples of the nodes referenced from them (eg distributions, agents,
+    contact points, spatial and temporal nodes). Classes (objects of
+    `rdf:type`) are not followed, and neither are nodes typed as one of
+    `BOUNDARY_CLASSES`.
+
+    When describing many nodes of the same graph, pass the set of boundary
+    nodes in `boundaries` to avoid looking up the type of every node, or use
+    `GraphDescriptions`, which reads the graph only once.
+    '''
+    if boundaries is None:
+        boundaries = set()
+        for _class in BOUNDARY_CLASSES:
+            boundaries.update(graph.subjects(RDF.type, _class))
+
+    pending = [node]
+    visited = set(pending)
+    while pending:
+        for triple in graph.triples((pending.pop(), None, None)):
+            yield triple
+            obj = triple[2]
+            if (triple[1] == RDF.type or obj in visited
+                    or not isinstance(obj, (URIRef, BNode))):
+                continue
+            visited.add(obj)
+            if obj not in boundaries:
+                pending.append(obj)
+
+
+class GraphDescriptions(object):
+    '''
+    Bounded descriptions of the nodes of a graph (see `bounded_description()`)
+
+    All triples are read from the graph in a single pass and indexed by
+    subject, along with the boundary nodes and the nodes referenced from each
+    subject. Getting the description of a node is then a walk over the
+    referenced nodes, and the resulting `DescriptionStore` shares the index
+    entries of the described nodes instead of copying their triples.
+    '''
+
+    def __init__(self, graph):
+        self._spo = {}
+        self._links = {}
+        self.boundaries = set()
+        for s, p, o in graph.triples((None, None, None)):
+            objects = self._spo.setdefault(s, {}).setdefault(p, {})
+            if o in objects:
+                continue
+            objects[o] = None
+            if p == RDF.type:
+                if o in BOUNDARY_CLASSES:
+                    self.boundaries.add(s)
+            elif isinstance(o, (URIRef, BNode)):
+                self._links.setdefault(s, []).append(o)
+
+    def store(self, node):
+        '''
+        Returns a `DescriptionStore` with the bounded description of a node
+        '''
+        described = {}
+        pending = [node]
+        visited = set(pending)
+        while pending:
+            subject = pending.pop()
+            if subject in self._spo:
+                described[subject] = self._spo[subject]
+            for obj in self._links.get(subject, ()):
+                if obj not in visited:
+                    visited.add(obj)
+                    if obj not in self.boundaries:
+                        pending.append(obj)
+
+        return DescriptionStore.from_index(described)
+
+
+class _LabelBNodeContext(dict):
+    '''
+    Blank node context for the line parsers that derives each blank node from
+    its label instead of remembering it
+
+    rdflib stores every label found in a document in the context, which would
+    grow with the size of the document. All labels get the same random prefix
+    so they don't clash with nodes from other documents.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.prefix = uuid.uuid4().hex
+
+    def get(self, label, default=None):
+        return BNode(self.prefix + label)
+
+
+def description_graph(data, root):
+    '''
+    Parses an N-Triples string with the description of a node
+
+    `root` is the N-Triples representation of the described node (ie
+    `<uri>` or `_:id`). Blank node ids are not kept when parsing, so this
+    returns a tuple with the node as found in the new graph and the graph.
+    '''
+    g = Graph(store=DescriptionStore())
+    bnode_context = {}
+    parser = W3CNTriplesParser(sink=NTGraphSink(g))
+    parser.parse(StringIO(data), bnode_context=bnode_context)
+
+    if root.startswith('_:'):
+        node = bnode_context.get(root[2:], BNode())
+    else:
+        node = URIRef(root[1:-1])
+
+    return node, g
+
+
+class SubjectIndex(object):
+    '''
+    Temporary on-disk index of triples, grouped by subject
+
+    Used to parse documents that do not fit in memory. Triples are read from
+    a line-based serialization (N-Triples or N-Quads) one by one and stored
+    as N-Triples lines in a private SQLite database, which is deleted when
+    the index is closed. Afterwards, the description of each dataset
+    (see `dataset_descriptions()`) can be retrieved as a small rdflib graph.
+
+    Use it as a context manager to make sure the database is removed::
+
+        with SubjectIndex() as index:
+            index.load(f, 'nt')
+            for dataset_ref, g in index.dataset_descriptions():
+                ...
+
+    '''
+
+    batch_size = 10000
+
+    def __init__(self):
+        # An empty file name creates a temporary database on disk, which is
+        # removed automatically when the connection is closed
+        self.conn = sqlite3.connect('')
+        self.conn.execute(
+            'CREATE TABLE triples (subject TEXT, object TEXT, line TEXT)')
+        self.conn.execute(
+            'CREATE TABLE boundaries '
+            '(subject TEXT PRIMARY KEY, is_dataset INTEGER)')
+        self._batch = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def load(self, source, _format='nt'):
+        '''
+        Reads all triples from a file-like object
+
+        `_format` must be one of the keys of `LINE_PARSERS`. Raises an
+        rdflib `ParserError` if the source is not valid.
+        '''
+        parser = LINE_PARSERS[_format](sink=self)
+        parser.parse(source, bnode_context=_LabelBNodeContext())
+        self._flush()
+        self.conn.execute(
+            'CREATE INDEX triples_subject ON triples (subject)')
+        self.conn.commit()
+
+    def triple(self, s, p, o):
+        '''
+        Sink method called by the rdflib parser for each triple
+        '''
+        subject = s.n3()
+        obj = o.n3()
+        line = _nt_row((s, p, o))
+
+        if p == RDF.type:
+            if o in BOUNDARY_CLASSES:
+                self.conn.execute(
+                    'INSERT OR IGNORE INTO boundaries VALUES (?, ?)',
+                    (subject, o == DCAT.Dataset))
+            # Classes are never followed
+            obj = None
+        elif not isinstance(o, (URIRef, BNode)):
+            obj = None
+
+        self._batch.append((subject, obj, line))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        self.conn.executemany(
+            'INSERT INTO triples VALUES (?, ?, ?)', self._batch)
+        self._batch = []
+
+    def dataset_descriptions(self):
+        '''
+        Generator that returns the description of each DCAT dataset in the
+        index, in the order they were typed in the source
+
+        Yields tuples with the dataset node (a term.URIRef or term.BNode
+        object) and an rdflib Graph with its description. This includes all
+        triples with the dataset as subject plus, recursively, the triples of
+        the nodes referenced from them (eg distributions, agents, contact
+        points, spatial and temporal nodes), stopping at other datasets and
+        catalogs.
+        '''
+        datasets = self.conn.execute(
+            'SELECT subject FROM boundaries WHERE is_dataset ORDER BY rowid')
+        for (root,) in datasets:
+            yield description_graph(''.join(self._description_lines(root)), root)
+
+    def _description_lines(self, root):
+        pending = [root]
+        visited = set(pending)
+        while pending:
+            node = pending.pop()
+            for obj, line in self.conn.execute(
+                    'SELECT object, line FROM triples WHERE subject = ?',
+                    (node,)).fetchall():
+                yield line
+                if obj and obj not in visited:
+                    visited.add(obj)
+                    if not self._is_boundary(obj):
+                        pending.append(obj)
+
+    def _is_boundary(self, node):
+        return self.conn.execute(
+            'SELECT 1 FROM boundaries WHERE subject = ?', (node,)
+        ).fetchone() is not None
+
+
+class _NamespacesStore(Store):
+    '''
+    Base class for the stores below, which keep namespace bindings in memory
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super(_NamespacesStore, self).__init__(*args, **kwargs)
+        self._namespace = {}
+        self._prefix = {}
+
+    def bind(self, prefix, namespace, override=True):
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self._prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None \
+                else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        for prefix, namespace in list(self._namespace.items()):
+            yield prefix, namespace
+
+
+class DescriptionStore(_NamespacesStore):
+    '''
+    Lightweight in-memory store for the description of a single dataset
+
+    Triples are only indexed by subject and predicate, which are the lookups
+    done by the profiles when parsing (`g.objects(dataset_ref, DCT.title)`,
+    etc). Any other pattern is resolved by scanning all triples, which is
+    fine for the small graphs this store is meant for. It is much faster to
+    build and query than the default rdflib store, which keeps several
+    indexes and supports contexts.
+    '''
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, triples=(), configuration=None, identifier=None):
+        super(DescriptionStore, self).__init__()
+        self.identifier = identifier
+        self._spo = {}
+        # Subjects whose entries are shared with other stores
+        self._shared = set()
+        self._len = 0
+        for triple in triples:
+            self._add(triple)
+
+    @classmethod
+    def from_index(cls, spo):
+        '''
+        Creates a store from a dict of `{subject: {predicate: {object: None}}}`
+
+        The entries of each subject are shared, and only copied if the
+        subject is modified.
+        '''
+        store = cls()
+        store._spo = dict(spo)
+        store._shared = set(spo)
+        store._len = sum(
+            len(objects)
+            for predicates in spo.values() for objects in predicates.values())
+        return store
+
+    def _predicates(self, s):
+        if s in self._shared:
+            self._shared.discard(s)
+            self._spo[s] = {
+                p: dict(objects) for p, objects in self._spo[s].items()}
+        return self._spo.setdefault(s, {})
+
+    def _add(self, triple):
+        s, p, o = triple
+        objects = self._predicates(s).setdefault(p, {})
+        if o not in objects:
+            objects[o] = None
+            self._len += 1
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        self._add(triple)
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        for (s, p, o), _ in list(self.triples(triple_pattern)):
+            predicates = self._predicates(s)
+            del predicates[p][o]
+            self._len -= 1
+            if not predicates[p]:
+                del predicates[p]
+                if not predicates:
+                    del self._spo[s]
+
+    def triples(self, triple_pattern, context=None):
+        s, p, o = triple_pattern
+        if s is None:
+            subjects = list(self._spo.items())
+        elif s in self._spo:
+            subjects = [(s, self._spo[s])]
+        else:
+            return
+        for subject, predicates in subjects:
+            if p is None:
+                items = list(predicates.items())
+            elif p in predicates:
+                items = [(p, predicates[p])]
+            else:
+                continue
+            for predicate, objects in items:
+                if o is None:
+                    for obj in list(objects):
+                        yield (subject, predicate, obj), iter(())
+                elif o in objects:
+                    yield (subject, predicate, o), iter(())
+
+    def __len__(self, context=None):
+        return self._len
+
+    def contexts(self, triple=None):
+        return iter(())
+
+
+class CompactStore(_NamespacesStore):
+    '''
+    Context-aware in-memory rdflib store optimized for memory usage
+
+    DCAT documents are very repetitive (the same predicates, classes,
+    licenses, formats or publishers appear in every dataset), so each term is
+    stored only once and referenced by an integer id. Quads are stored as
+    rows of four parallel arrays of term ids, and indexed by subject,
+    predicate and object with arrays of row numbers. Patterns are resolved
+    from the shortest index of their bound terms.
+
+    Arrays of integers take a fraction of the memory of the nested dicts of
+    the default rdflib store, and are not tracked by the garbage collector.
+    Removing triples is slower, but that is rarely done when parsing.
+    '''
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super(CompactStore, self).__init__()
+        self.identifier = identifier
+
+        self._ids = {}
+        self._terms = []
+
+        # Rows of (subject, predicate, object, context) term ids. Removed
+        # rows are kept with a subject of -1
+        self._rows = (array('i'), array('i'), array('i'), array('i'))
+        self._removed = 0
+        # Term id -> rows, for subjects, predicates and objects
+        self._index = ({}, {}, {})
+
+        self._contexts = {}
+
+    # Terms
+
+    def _term_id(self, term, create=False):
+        if isinstance(term, Graph):
+            term = term.identifier
+        term_id = self._ids.get(term)
+        if term_id is None and create:
+            term_id = self._ids[term] = len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def _context(self, context_id):
+        identifier = self._terms[context_id]
+        if identifier not in self._contexts:
+            self._contexts[identifier] = Graph(
+                store=self, identifier=identifier)
+        return self._contexts[identifier]
+
+    def _match(self, triple, context):
+        '''
+        Returns a list with the ids of the terms of a quad pattern (None for
+        the unbound ones) and the rows to check, or None if any of the terms
+        is not in the store (so nothing can match)
+        '''
+        ids = []
+        for term in triple + (context,):
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self._term_id(term)
+            if term_id is None:
+                return None
+            ids.append(term_id)
+
+        rows = None
+        for position in range(3):
+            if ids[position] is None:
+                continue
+            candidates = self._index[position].get(ids[position], ())
+            if rows is None or len(candidates) < len(rows):
+                rows = candidates
+        if rows is None:
+            rows = range(len(self._rows[0]))
+        else:
+            # Copy, so the store can be modified while iterating
+            rows = rows[:]
+        return ids, rows
+
+    def _rows_matching(self, ids, rows):
+        columns = self._rows
+        for row in rows:
+            if columns[0][row] == -1:
+                continue
+            if all(term_id is None or columns[position][row] == term_id
+                   for position, term_id in enumerate(ids)):
+                yield row
+
+    # Store API
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        if context is None:
+            raise ValueError('A context is required to add triples')
+        if isinstance(context, Graph):
+            self._contexts.setdefault(context.identifier, context)
+
+        ids = [self._term_id(term, create=True)
+               for term in triple + (context,)]
+        # Skip duplicates, the shortest index is usually just a few rows
+        rows = min((self._index[position].get(ids[position], ())
+                    for position in range(3)), key=len)
+        if next(self._rows_matching(ids, rows), None) is not None:
+            return
+
+        row = len(self._rows[0])
+        for position, term_id in enumerate(ids):
+            self._rows[position].append(term_id)
+            if position < 3:
+                index = self._index[position]
+                if term_id not in index:
+                    index[term_id] = array('i')
+                index[term_id].append(row)
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        match = self._match(triple_pattern, context)
+        if match is None:
+            return
+        for row in list(self._rows_matching(*match)):
+            for position in range(3):
+                self._index[position][self._rows[position][row]].remove(row)
+            self._rows[0][row] = -1
+            self._removed += 1
+
+    def triples(self, triple_pattern, context=None):
+        match = self._match(triple_pattern, context)
+        if match is None:
+            return
+        terms = self._terms
+        s, p, o, c = self._rows
+        if context is not None or len(self._contexts) < 2:
+            for row in self._rows_matching(*match):
+                yield (
+                    (terms[s[row]], terms[p[row]], terms[o[row]]),
+                    iter((self._context(c[row]),))
+                )
+            return
+
+        # Triples in several contexts are returned once
+        contexts = {}
+        for row in self._rows_matching(*match):
+            contexts.setdefault((s[row], p[row], o[row]), []).append(c[row])
+        for (s_id, p_id, o_id), context_ids in contexts.items():
+            yield (
+                (terms[s_id], terms[p_id], terms[o_id]),
+                (self._context(c_id) for c_id in context_ids)
+            )
+
+    def __len__(self, context=None):
+        if context is None:
+            if len(self._contexts) < 2:
+                return len(self._rows[0]) - self._removed
+            return len(set(
+                (s, p, o) for s, p, o, c in zip(*self._rows) if s != -1))
+        context_id = self._term_id(context)
+        return sum(1 for s, c in zip(self._rows[0], self._rows[3])
+                   if s != -1 and c == context_id)
+
+    def contexts(self, triple=None):
+        match = self._match(triple or (None, None, None), None)
+        if match is None:
+            return
+        context_ids = {self._rows[3][row] for row in self._rows_matching(*match)}
+        for context_id in context_ids:
+            yield self._context(context_id)
+
+
+class SQLiteStore(_NamespacesStore):
+    '''
+    Context-aware rdflib store backed by a temporary SQLite database
+
+    Meant for parsing sources that do not fit in memory, at the cost of
+    slower lookups. Terms are stored once in a `terms` table and referenced
+    by integer id from the `quads` table, which is indexed on (s, p), (p, o)
+    and (o), covering the access patterns used by the profiles.
+
+    The database is created in `tmp_dir` (or the default temporary
+    directory) and removed when the store is closed or garbage collected.
+    '''
+
+    context_aware = True
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    cache_size = 100000
+
+    def __init__(self, configuration=None, identifier=None, tmp_dir=None):
+        super(SQLiteStore, self).__init__()
+        self.identifier = identifier
+
+        fd, self.path = tempfile.mkstemp(
+            prefix='ckanext-dcat-', suffix='.sqlite', dir=tmp_dir)
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._finalizer = weakref.finalize(
+            self, _remove_database, self.conn, self.path)
+
+        self.conn.executescript('''
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE terms (
+                id INTEGER PRIMARY KEY,
+                kind TEXT, value TEXT, lang TEXT, datatype TEXT);
+            CREATE UNIQUE INDEX terms_term ON terms (value, kind, lang, datatype);
+            CREATE TABLE quads (s INTEGER, p INTEGER, o INTEGER, c INTEGER);
+            CREATE UNIQUE INDEX quads_spoc ON quads (s, p, o, c);
+            CREATE INDEX quads_po ON quads (p, o);
+            CREATE INDEX quads_o ON quads (o);
+        ''')
+
+        self._contexts = {}
+
+        # Term lookups are very repetitive (same predicates, classes, etc.)
+        self._ids = {}
+        self._term = functools.lru_cache(maxsize=self.cache_size)(self._term)
+
+    def close(self, commit_pending_transaction=False):
+        self._finalizer()
+
+    def commit(self):
+        self.conn.commit()
+
+    def destroy(self, configuration=None):
+        self._finalizer()
+
+    # Terms
+
+    def _term_id(self, term, create=False):
+        if isinstance(term, Graph):
+            term = term.identifier
+        term_id = self._ids.get(term)
+        if term_id is not None:
+            return term_id
+
+        row = _term_row(term)
+        result = self.conn.execute(
+            'SELECT id FROM terms WHERE value = ? AND kind = ? '
+            'AND lang = ? AND datatype = ?', row).fetchone()
+        if result:
+            term_id = result[0]
+        elif create:
+            term_id = self.conn.execute(
+                'INSERT INTO terms (kind, value, lang, datatype) '
+                'VALUES (?, ?, ?, ?)',
+                (row[1], row[0], row[2], row[3])).lastrowid
+        else:
+            return None
+
+        if len(self._ids) >= self.cache_size:
+            self._ids.clear()
+        self._ids[term] = term_id
+        return term_id
+
+    def _term(self, term_id):
+        kind, value, lang, datatype = self.conn.execute(
+            'SELECT kind, value, lang, datatype FROM terms WHERE id = ?',
+            (term_id,)).fetchone()
+        if kind == 'U':
+            return URIRef(value)
+        elif kind == 'B':
+            return BNode(value)
+        return Literal(value, lang=lang or None,
+                       datatype=URIRef(datatype) if datatype else None)
+
+    def _context(self, context_id):
+        identifier = self._term(context_id)
+        if identifier not in self._contexts:
+            self._contexts[identifier] = Graph(
+                store=self, identifier=identifier)
+        return self._contexts[identifier]
+
+    def _where(self, triple, context):
+        '''
+        Returns the WHERE clause and params for a triple pattern, or None if
+        any of the terms is not in the store (so nothing can match)
+        '''
+        clauses = []
+        params = []
+        for column, term in zip(('s', 'p', 'o', 'c'), triple + (context,)):
+            if term is None:
+                continue
+            term_id = self._term_id(term)
+            if term_id is None:
+                return None
+            clauses.append('{0} = ?'.format(column))
+            params.append(term_id)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    # Store API
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted)
+        if context is None:
+            raise ValueError('A context is required to add triples')
+        if isinstance(context, Graph):
+            self._contexts.setdefault(context.identifier, context)
+        self.conn.execute(
+            'INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)',
+            [self._term_id(term, create=True)
+             for term in triple + (context,)])
+
+    def remove(self, triple_pattern, context=None):
+        Store.remove(self, triple_pattern, context)
+        where = self._where(triple_pattern, context)
+        if where is not None:
+            self.conn.execute('DELETE FROM quads' + where[0], where[1])
+
+    def triples(self, triple_pattern, context=None):
+        where = self._where(triple_pattern, context)
+        if where is None:
+            return
+        if context is None:
+            # Triples in several contexts are returned once
+            sql = ('SELECT s, p, o, group_concat(c) FROM quads{0} '
+                   'GROUP BY s, p, o')
+        else:
+            sql = 'SELECT s, p, o, c FROM quads{0}'
+        for s, p, o, contexts in self.conn.execute(
+                sql.format(where[0]), where[1]).fetchall():
+            yield (
+                (self._term(s), self._term(p), self._term(o)),
+                (self._context(int(c)) for c in str(contexts).split(','))
+            )
+
+    def __len__(self, context=None):
+        where = self._where((None, None, None), context)
+        if where is None:
+            return 0
+        if context is None:
+            sql = 'SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads)'
+        else:
+            sql = 'SELECT COUNT(*) FROM quads' + where[0]
+        return self.conn.execute(sql, where[1]).fetchone()[0]
+
+    def contexts(self, triple=None):
+        where = self._where(triple or (None, None, None), None)
+        if where is None:
+            return
+        for (c,) in self.conn.execute(
+                'SELECT DISTINCT c FROM quads' + where[0], where[1]).fetchall():
+            yield self._context(c)
+
+
+def _term_row(term):
+    if isinstance(term, Literal):
+        return (
+            str(term), 'L', term.language or '',
+            str(term.datatype) if term.datatype else '')
+    elif isinstance(term, BNode):
+        return (str(term), 'B', '', '')
+    return (str(term), 'U', '', '')
+
+
+def _remove_database(conn, path):
+    conn.close()
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Values of the `ckanext.dcat.rdf.store` config option (or the `rdf_store`
+# key of the harvest source config) that don't correspond to rdflib stores
+STORES = {
+    'compact': lambda: CompactStore(),
+    'sqlite': lambda: SQLiteStore(
+        tmp_dir=config.get(RDF_STORE_TMP_DIR_CONFIG_OPTION)),
+}
+
+
+def get_store(store_name=None):
+    '''
+    Returns the rdflib store to use for the processors graph
+
+    `store_name` can be one of the keys of `STORES` or the name of any rdflib
+    store plugin (eg `Memory`, the default). If not provided, the value of
+    the `ckanext.dcat.rdf.store` config option is used.
+    '''
+    if not store_name:
+        store_name = config.get(RDF_STORE_CONFIG_OPTION) or DEFAULT_RDF_STORE
+
+    if store_name in STORES:
+        return STORES[store_name]()
+    try:
+        return rdflib.plugin.get(store_name, Store)()
+    except rdflib.plugin.PluginException:
+        raise RDFParserException('Unknown RDF store: {0}'.format(store_name))
@@ -1663,13 +1663,15 @@ class TestDCATRDFHarvester(object):
     def test_validates_correct_config(self):
         harvester = DCATRDFHarvester()
 
-        for config in ['{}', '{"rdf_format":"text/turtle"}']:
+        for config in ['{}', '{"rdf_format":"text/turtle"}',
+                       '{"rdf_store":"sqlite"}', '{"rdf_store":"Memory"}']:
             assert config == harvester.validate_config(config)
 
     def test_does_not_validate_incorrect_config(self):
         harvester = DCATRDFHarvester()
 
-        for config in ['invalid', '{invalid}', '{rdf_format:invalid}']:
+        for config in ['invalid', '{invalid}', '{rdf_format:invalid}',
+                       '{"rdf_store":"invalid"}', '{"rdf_store":1}']:
             try:
                 harvester.validate_config(config)
                 assert False
@@ -1,3 +1,5 @@
+import datetime
+import gzip
 
 try:
     from unittest import mock
@@ -12,7 +14,8 @@ from ckantoolkit import config
 from ckantoolkit.tests import helpers, factories
 
 
-from ckanext.dcat.logic import _pagination_info
+from ckanext.dcat.logic import _catalog_dict, _pagination_info, catalog_validators
+from ckanext.dcat.output_cache import output_cache
 from ckanext.dcat.processors import RDFParser
 
 
@@ -65,6 +68,89 @@ def test_dataset_show_without_format():
     assert dcat_dataset['notes'] == dataset['notes']
 
 
+@pytest.mark.usefixtures('with_plugins', 'clean_db')
+@pytest.mark.ckan_config('ckanext.dcat.output_cache.backend', 'memory')
+class TestDatasetShowOutputCache(object):
+
+    def setup_method(self):
+        output_cache.reset()
+
+    def teardown_method(self):
+        output_cache.reset()
+
+    def test_output_is_cached(self):
+        dataset = factories.Dataset()
+
+        with mock.patch('ckanext.dcat.logic.RDFSerializer') as serializer:
+            serializer.return_value.serialize_dataset.return_value = 'output'
+            for i in range(3):
+                content = helpers.call_action(
+                    'dcat_dataset_show', id=dataset['name'], format='ttl')
+                assert content == 'output'
+
+        assert serializer.return_value.serialize_dataset.call_count == 1
+        assert output_cache.stats()['hits'] == 2
+        assert output_cache.stats()['misses'] == 1
+
+    def test_formats_and_profiles_are_cached_separately(self):
+        dataset = factories.Dataset()
+
+        ttl = helpers.call_action(
+            'dcat_dataset_show', id=dataset['id'], format='ttl')
+        xml = helpers.call_action(
+            'dcat_dataset_show', id=dataset['id'], format='xml')
+        ttl_v3 = helpers.call_action(
+            'dcat_dataset_show', id=dataset['id'], format='ttl',
+            profiles=['euro_dcat_ap_3'])
+
+        assert output_cache.stats()['misses'] == 3
+        assert len({ttl, xml, ttl_v3}) == 3
+
+    def test_updated_dataset_is_not_served_from_cache(self):
+        dataset = factories.Dataset(title='Old title')
+
+        helpers.call_action('dcat_dataset_show', id=dataset['id'])
+
+        helpers.call_action(
+            'package_patch', id=dataset['id'], title='New title')
+
+        content = helpers.call_action('dcat_dataset_show', id=dataset['id'])
+
+        assert 'New title' in content
+        assert output_cache.stats()['hits'] == 0
+
+    def test_compressed_output_is_cached(self):
+        dataset = factories.Dataset()
+
+        plain = helpers.call_action(
+            'dcat_dataset_show', id=dataset['id'], format='ttl')
+        compressed = helpers.call_action(
+            'dcat_dataset_show', context={'encoding': 'gzip'},
+            id=dataset['id'], format='ttl')
+
+        assert gzip.decompress(compressed).decode('utf-8') == plain
+
+        with mock.patch('ckanext.dcat.compression.compress') as compress:
+            assert helpers.call_action(
+                'dcat_dataset_show', context={'encoding': 'gzip'},
+                id=dataset['id'], format='ttl') == compressed
+
+        assert not compress.called
+
+    def test_private_datasets_are_not_cached(self):
+        user = factories.Sysadmin()
+        org = factories.Organization()
+        dataset = factories.Dataset(owner_org=org['id'], private=True)
+
+        for i in range(2):
+            helpers.call_action(
+                'dcat_dataset_show', context={'user': user['name']},
+                id=dataset['id'])
+
+        assert output_cache.stats()['hits'] == 0
+        assert output_cache.stats()['misses'] == 0
+
+
 # Pagination
 
 @pytest.mark.usefixtures("with_request_context")
@@ -290,3 +376,167 @@ class TestPagination(object):
 
         with pytest.raises(toolkit.ValidationError):
             _pagination_info(query, data_dict)
+
+
+# Catalog modification date
+
+class TestCatalogDict(object):
+
+    query = {
+        'count': 3,
+        'results': [
+            {'metadata_modified': '2024-05-03T10:00:00'},
+            {'metadata_modified': '2024-05-02T10:00:00'},
+            {'metadata_modified': '2024-05-01T10:00:00'},
+        ],
+    }
+
+    def test_catalog_dict_default(self):
+
+        assert _catalog_dict(self.query, {'page': 1}) == {}
+
+    @pytest.mark.ckan_config('ckanext.dcat.catalog_modified_from_page', 'true')
+    def test_catalog_dict_modified_from_page(self):
+
+        for data_dict in ({}, {'page': None}, {'page': '1'}):
+            catalog_dict = _catalog_dict(self.query, data_dict)
+
+            assert catalog_dict == {'modified': '2024-05-03T10:00:00'}
+
+    @pytest.mark.ckan_config('ckanext.dcat.catalog_modified_from_page', 'true')
+    def test_catalog_dict_modified_not_from_other_pages(self):
+
+        assert _catalog_dict(self.query, {'page': '2'}) == {}
+
+    @pytest.mark.ckan_config('ckanext.dcat.catalog_modified_from_page', 'true')
+    def test_catalog_dict_modified_not_from_filtered_requests(self):
+
+        for data_dict in (
+                {'q': 'title:test'},
+                {'fq': 'organization:test-org'},
+                {'modified_since': '2024-05-02'}):
+            assert _catalog_dict(self.query, data_dict) == {}
+
+        assert _catalog_dict(self.query, {'q': '*:*'}) == {
+            'modified': '2024-05-03T10:00:00'}
+
+    @pytest.mark.ckan_config('ckanext.dcat.catalog_modified_from_page', 'true')
+    def test_catalog_dict_modified_no_results(self):
+
+        assert _catalog_dict({'count': 0, 'results': []}, {}) == {}
+
+
+# Conditional requests
+
+@pytest.mark.usefixtures("with_request_context")
+class TestCatalogValidators(object):
+
+    def _etag(self, data_dict, *args, **kwargs):
+        validators, search_data_dict = self._validators(
+            data_dict, *args, **kwargs)
+        return validators[0] if validators else None, search_data_dict
+
+    def _validators(self, data_dict, count=3,
+                    first_modified='2024-05-03T10:00:00',
+                    orgs_modified=datetime.datetime.min, page_query=None):
+        query = {
+            'count': count,
+            'results': [{'id': 'a', 'metadata_modified': first_modified}],
+        }
+        with mock.patch('ckanext.dcat.logic.toolkit.get_action') as get_action, \
+                mock.patch('ckanext.dcat.logic.catalog_modification_cache') as cache, \
+                mock.patch('ckanext.dcat.logic.organizations_modified',
+                           return_value=orgs_modified):
+            get_action.return_value.return_value = query
+            cache.get.return_value = '2024-05-03T10:00:00'
+            validators = catalog_validators({}, data_dict, query=page_query)
+        search_data_dict = None
+        if get_action.return_value.called:
+            search_data_dict = get_action.return_value.call_args[0][1]
+        return validators, search_data_dict
+
+    @pytest.mark.ckan_config('ckanext.dcat.datasets_per_page', 10)
+    def test_only_first_dataset_is_searched(self):
+
+        etag, search_data_dict = self._etag({'page': '3', 'q': 'test'})
+
+        assert search_data_dict['rows'] == 1
+        assert search_data_dict['start'] == 20
+        assert search_data_dict['q'] == 'test'
+        assert search_data_dict['fl'] == ['id', 'metadata_modified']
+
+    def test_etag_is_stable(self):
+
+        assert self._etag({'page': '1'})[0] == self._etag({'page': '1'})[0]
+
+    @pytest.mark.parametrize('data_dict,count,first_modified', [
+        ({'page': '2'}, 3, '2024-05-03T10:00:00'),
+        ({'page': '1', 'q': 'test'}, 3, '2024-05-03T10:00:00'),
+        ({'page': '1', 'format': 'ttl'}, 3, '2024-05-03T10:00:00'),
+        ({'page': '1', 'profiles': ['schemaorg']}, 3, '2024-05-03T10:00:00'),
+        ({'page': '1'}, 2, '2024-05-03T10:00:00'),
+        ({'page': '1'}, 3, '2024-05-04T10:00:00'),
+    ])
+    def test_etag_changes(self, data_dict, count, first_modified):
+
+        etag = self._etag({'page': '1'})[0]
+
+        assert self._etag(data_dict, count, first_modified)[0] != etag
+
+    def test_etag_changes_with_organizations(self):
+
+        etag = self._etag({'page': '1'})[0]
+
+        assert self._etag(
+            {'page': '1'},
+            orgs_modified=datetime.datetime(2024, 5, 3, 10, 0, 0),
+        )[0] != etag
+
+    def test_etag_from_page_results(self):
+
+        # Dates of the dataset dicts have microseconds, the ones returned
+        # by the index milliseconds
+        page_query = {
+            'count': 3,
+            'results': [
+                {'id': 'a', 'metadata_modified': '2024-05-03T10:00:00.123456'},
+                {'id': 'b', 'metadata_modified': '2024-05-02T10:00:00'},
+            ],
+        }
+
+        etag, search_data_dict = self._etag(
+            {'page': '1'}, page_query=page_query)
+
+        assert search_data_dict is None
+        assert etag == self._etag(
+            {'page': '1'}, first_modified='2024-05-03T10:00:00.123Z')[0]
+
+    def test_last_modified(self):
+
+        validators, _ = self._validators(
+            {'page': '1'}, first_modified='2024-05-03T10:00:00.123Z')
+        assert validators[1] == datetime.datetime(2024, 5, 3, 10, 0, 0, 123000)
+
+        validators, _ = self._validators(
+            {'page': '1'}, first_modified='2024-05-03T10:00:00',
+            orgs_modified=datetime.datetime(2024, 5, 4, 10, 0, 0))
+        assert validators[1] == datetime.datetime(2024, 5, 4, 10, 0, 0)
+
+    def test_no_last_modified_without_dates(self):
+
+        validators, _ = self._validators(
+            {'page': '1'}, page_query={'count': 0, 'results': []})
+
+        assert validators[0]
+        assert validators[1] is None
+
+    def test_no_etag_without_organizations_date(self):
+
+        assert self._etag({'page': '1'}, orgs_modified=None) == (None, None)
+
+    def test_wrong_page(self):
+
+        with mock.patch('ckanext.dcat.logic.organizations_modified',
+                        return_value=datetime.datetime.min):
+            with pytest.raises(toolkit.ValidationError):
+                catalog_validators({}, {'page': 'a'})
@@ -1,9 +1,10 @@
+import io
 
 import pytest
 
 from ckantoolkit import config
 
-from rdflib import Graph, URIRef, Literal
+from rdflib import ConjunctiveGraph, Graph, URIRef, Literal
 from rdflib.namespace import Namespace, RDF
 
 from ckanext.dcat.processors import (
@@ -16,12 +17,25 @@ from ckanext.dcat.processors import (
 )
 
 from ckanext.dcat.profiles import RDFProfile
+from ckanext.dcat.tests.utils import get_file_contents
 
 DCT = Namespace("http://purl.org/dc/terms/")
 DCAT = Namespace("http://www.w3.org/ns/dcat#")
 HYDRA = Namespace('http://www.w3.org/ns/hydra/core#')
 
 
+def _dataset_summary(dataset):
+    # Values of multiple triples and blank node ids are not
+    # guaranteed to be in the same order or have the same values
+    return (
+        dataset['title'],
+        dataset.get('notes'),
+        sorted(t['name'] for t in dataset.get('tags', [])),
+        sorted(e['key'] for e in dataset.get('extras', [])),
+        sorted(r.get('url', '') for r in dataset.get('resources', [])),
+    )
+
+
 def _default_graph():
 
     g = Graph()
@@ -71,6 +85,26 @@ class MockRDFProfile2(RDFProfile):
         return dataset_dict
 
 
+class MockRDFProfileCounter(RDFProfile):
+
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        MockRDFProfileCounter.instances += 1
+        self.datasets_seen = []
+        super().__init__(*args, **kwargs)
+
+    def reset(self):
+        self.datasets_seen = []
+
+    def parse_dataset(self, dataset_dict, dataset_ref):
+
+        self.datasets_seen.append(dataset_ref)
+        dataset_dict['seen'] = len(self.datasets_seen)
+
+        return dataset_dict
+
+
 class TestRDFParser(object):
 
     def test_default_profile(self):
@@ -120,6 +154,40 @@ class TestRDFParser(object):
             assert dataset['profile_1']
             assert dataset['profile_2']
 
+    def test_profiles_are_instantiated_once(self):
+
+        MockRDFProfileCounter.instances = 0
+
+        p = RDFParser()
+
+        p._profiles = [MockRDFProfileCounter]
+
+        p.g = _default_graph()
+
+        datasets = [d for d in p.datasets()]
+
+        assert len(datasets) == 3
+        assert MockRDFProfileCounter.instances == 1
+
+        # Per-dataset state is reset before each dataset
+        for dataset in datasets:
+            assert dataset['seen'] == 1
+
+    def test_profiles_are_rebound_to_new_graph(self):
+
+        p = RDFParser()
+
+        p._profiles = [MockRDFProfile1]
+
+        p.g = _default_graph()
+        assert len([d for d in p.datasets()]) == 3
+
+        p.g = Graph()
+        assert len([d for d in p.datasets()]) == 0
+
+        profile = p._profile_instances()[0]
+        assert profile.g is p.g
+
     def test_parse_data(self):
 
         data = '''<?xml version="1.0" encoding="utf-8" ?>
@@ -347,3 +415,139 @@ class TestRDFParser(object):
         p.g = Graph()
 
         assert len([d for d in p.datasets()]) == 0
+
+    def test_stream_datasets(self):
+
+        lines = _default_graph().serialize(format='nt').splitlines()
+        # Triples of the same subject don't need to be together
+        lines.reverse()
+
+        p = RDFParser()
+
+        datasets = list(p.stream_datasets(io.StringIO('\n'.join(lines))))
+
+        assert sorted(d['title'] for d in datasets) == [
+            'Test Dataset 1', 'Test Dataset 2', 'Test Dataset 3']
+        resources = dict((d['title'], len(d['resources'])) for d in datasets)
+        assert resources == {
+            'Test Dataset 1': 2, 'Test Dataset 2': 1, 'Test Dataset 3': 0}
+
+    def test_stream_datasets_nquads(self):
+
+        g = ConjunctiveGraph()
+        g.get_context(URIRef('http://example.org/graph')).parse(
+            data=_default_graph().serialize(format='nt'), format='nt')
+
+        p = RDFParser()
+
+        datasets = list(p.stream_datasets(
+            io.BytesIO(g.serialize(format='nquads', encoding='utf-8')),
+            _format='nq'))
+
+        assert len(datasets) == 3
+
+    @pytest.mark.parametrize('file_name', [
+        'dcat/dataset.rdf',
+        'dcat/dataset_afs.ttl',
+        'dcat/dataset_health.ttl',
+        'dcat/catalog_datasets_list.rdf',
+    ])
+    def test_stream_datasets_same_as_datasets(self, file_name, tmpdir):
+
+        g = Graph()
+        g.parse(data=get_file_contents(file_name),
+                format='xml' if file_name.endswith('.rdf') else 'ttl')
+
+        p = RDFParser()
+        p.g = g
+        expected = sorted(_dataset_summary(d) for d in p.datasets())
+
+        path = str(tmpdir.join('datasets.nt'))
+        g.serialize(destination=path, format='nt', encoding='utf-8')
+
+        p = RDFParser()
+        datasets = sorted(_dataset_summary(d) for d in p.stream_datasets(path))
+
+        assert datasets == expected
+
+    def test_stream_datasets_stops_at_other_datasets(self):
+
+        g = _default_graph()
+        g.add((URIRef("http://example.org/datasets/1"), DCT.relation,
+               URIRef("http://example.org/datasets/2")))
+
+        p = RDFParser()
+
+        for dataset in p.stream_datasets(
+                io.StringIO(g.serialize(format='nt'))):
+            if dataset['title'] == 'Test Dataset 1':
+                break
+
+        assert len(p.g) == 7
+        assert (URIRef("http://example.org/datasets/2"), DCT.title,
+                Literal('Test Dataset 2')) not in p.g
+
+    def test_stream_datasets_raises_on_parse_error(self):
+
+        p = RDFParser()
+
+        with pytest.raises(RDFParserException):
+            list(p.stream_datasets(io.StringIO('Wrong data')))
+
+        with pytest.raises(RDFParserException):
+            list(p.stream_datasets(io.StringIO(''), _format='ttl'))
+
+    @pytest.mark.parametrize('file_name', [
+        'dcat/dataset.rdf',
+        'dcat/dataset_afs.ttl',
+        'dcat/dataset_health.ttl',
+        'dcat/catalog_datasets_list.rdf',
+    ])
+    def test_bounded_descriptions_same_as_datasets(self, file_name):
+
+        g = Graph()
+        g.parse(data=get_file_contents(file_name),
+                format='xml' if file_name.endswith('.rdf') else 'ttl')
+
+        p = RDFParser()
+        p.g = g
+        expected = sorted(_dataset_summary(d) for d in p.datasets())
+
+        p = RDFParser(bounded_descriptions=True)
+        p.g = g
+        datasets = sorted(_dataset_summary(d) for d in p.datasets())
+
+        assert datasets == expected
+
+    def test_bounded_descriptions_graph(self):
+
+        p = RDFParser(bounded_descriptions=True)
+        p.g = _default_graph()
+
+        graphs = []
+        profile_instances = p._profile_instances
+
+        def _profile_instances(dataset_type=None, graph=None):
+            graphs.append(graph)
+            return profile_instances(dataset_type, graph)
+
+        p._profile_instances = _profile_instances
+
+        datasets = list(p.datasets())
+
+        assert len(datasets) == 3
+        assert len(graphs) == 3
+        assert all(g is not None and g is not p.g for g in graphs)
+        # Each graph only contains one dataset
+        assert all(
+            len(list(g.subjects(RDF.type, DCAT.Dataset))) == 1 for g in graphs)
+
+    @pytest.mark.ckan_config('ckanext.dcat.rdf.bounded_descriptions', 'true')
+    @pytest.mark.ckan_config('ckanext.dcat.expose_subcatalogs', 'true')
+    def test_bounded_descriptions_ignored_with_subcatalogs(self):
+
+        p = RDFParser()
+        assert p.bounded_descriptions
+
+        assert list(p.datasets()) == []
+        assert p._descriptions is None
@@ -1,10 +1,16 @@
 
 import pytest
 
-from rdflib import Graph, URIRef, Literal
-from rdflib.namespace import Namespace
+from rdflib import Graph, URIRef, BNode, Literal
+from rdflib.namespace import Namespace, RDF, RDFS, XSD
 
-from ckanext.dcat.profiles import RDFProfile, CleanedURIRef
+from ckanext.dcat.profiles import (
+    RDFProfile,
+    CleanedURIRef,
+    DictTriples,
+    NodeView,
+    URIRefOrLiteral,
+)
 
 from ckanext.dcat.tests.profiles.base.test_base_parser import _default_graph
 
@@ -48,6 +54,151 @@ class TestURIRefPreprocessing(object):
         assert CleanedURIRef(expectedNonHttpUri) == URIRef(expectedNonHttpUri)
 
 
+class TestNodeView(object):
+
+    def test_objects(self):
+        g = _default_graph()
+        dataset = URIRef('http://example.org/datasets/1')
+
+        view = NodeView(g)
+
+        assert list(view.objects(dataset, DCT.title)) == list(
+            g.objects(dataset, DCT.title))
+        assert list(view.objects(dataset, DCT.unknown_property)) == []
+        assert list(view.objects(URIRef('http://example.org/unknown'),
+                                 DCT.title)) == []
+
+    def test_counters(self):
+        dataset = URIRef('http://example.org/datasets/1')
+
+        view = NodeView(_default_graph())
+        for predicate in (DCT.title, DCT.description, DCT.title):
+            view.objects(dataset, predicate)
+
+        assert view.requests == 3
+        assert view.lookups == 1
+
+
+class TestDictTriples(object):
+
+    subject = URIRef("http://example.org/datasets/1")
+
+    def test_values_and_fallbacks(self):
+        items = DictTriples([
+            ("title", DCT.title, None, Literal),
+            ("identifier", DCT.identifier, ["guid", "id"], URIRefOrLiteral),
+            ("version", ADMS.version, ["dcat_version"], Literal),
+            ("url", DCAT.landingPage, None, URIRef, TEST.Document),
+            ("unknown", DCT.description, None, Literal),
+        ])
+        dataset_dict = {
+            "title": "Some title",
+            "identifier": "",
+            "id": "some-id",
+            "url": " http://example.org/some page ",
+            "extras": [
+                {"key": "guid", "value": "http://example.org/guid"},
+                {"key": "dcat_version", "value": "1.0"},
+            ],
+        }
+        p = RDFProfile(Graph())
+
+        p._add_triples_from_dict(dataset_dict, self.subject, items)
+
+        landing_page = URIRef("http://example.org/some%20page")
+        assert set(p.g) == {
+            (self.subject, DCT.title, Literal("Some title")),
+            (self.subject, DCT.identifier, URIRef("http://example.org/guid")),
+            (self.subject, ADMS.version, Literal("1.0")),
+            (self.subject, DCAT.landingPage, landing_page),
+            (landing_page, RDF.type, TEST.Document),
+        }
+
+    def test_alternative_keys(self):
+        items = DictTriples([
+            (("title_translated", "title"), DCT.title, None, Literal),
+        ])
+        p = RDFProfile(Graph())
+
+        p._add_triples_from_dict(
+            {"title": "Title", "title_translated": {"en": "Title", "ca": "Títol"}},
+            self.subject,
+            items,
+        )
+        assert set(p.g.objects(self.subject, DCT.title)) == {
+            Literal("Title", lang="en"),
+            Literal("Títol", lang="ca"),
+        }
+
+        p = RDFProfile(Graph())
+
+        p._add_triples_from_dict({"title": "Title"}, self.subject, items)
+        assert list(p.g.objects(self.subject, DCT.title)) == [Literal("Title")]
+
+    def test_list_and_date_values(self):
+        list_items = DictTriples(
+            [("language", DCT.language, None, URIRefOrLiteral)], list_value=True
+        )
+        date_items = DictTriples(
+            [("issued", DCT.issued, ["metadata_created"], Literal)], date_value=True
+        )
+        dataset_dict = {
+            "language": '["en", "http://example.org/lang/ca"]',
+            "metadata_created": "2024-05-01",
+        }
+        p = RDFProfile(Graph())
+
+        p._add_triples_from_dict(dataset_dict, self.subject, list_items)
+        p._add_triples_from_dict(dataset_dict, self.subject, date_items)
+
+        assert set(p.g) == {
+            (self.subject, DCT.language, Literal("en")),
+            (self.subject, DCT.language, URIRef("http://example.org/lang/ca")),
+            (self.subject, DCT.issued, Literal("2024-05-01", datatype=XSD.date)),
+        }
+
+    def test_item_lists_are_compiled(self):
+        items = [
+            ("title", DCT.title, None, Literal),
+            ("theme", DCAT.theme, None, URIRef),
+        ]
+        dataset_dict = {"title": "Some title", "theme": "a,b"}
+
+        p = RDFProfile(Graph())
+        p._add_list_triples_from_dict(dataset_dict, self.subject, items)
+
+        assert set(p.g) == {
+            (self.subject, DCT.title, Literal("Some title")),
+            (self.subject, DCAT.theme, URIRef("a")),
+            (self.subject, DCAT.theme, URIRef("b")),
+        }
+
+    def test_extras_index(self):
+        extras = [
+            {"key": "dcat_issued", "value": "2024"},
+            {"key": "issued", "value": "2025"},
+            {"key": "modified", "value": "2024-02"},
+        ]
+        dataset_dict = {"extras": extras}
+        p = RDFProfile(Graph())
+
+        index = p._extras_index(dataset_dict)
+
+        assert index["issued"] == "2024"
+        assert index["dcat_issued"] == "2024"
+        assert index["modified"] == "2024-02"
+        for key in index:
+            assert index[key] == p._get_dict_value(dataset_dict, key)
+
+        # The index is reused for the same extras until they change
+        assert p._extras_index(dataset_dict) is index
+        extras.append({"key": "license", "value": "cc-by"})
+        assert p._extras_index(dataset_dict)["license"] == "cc-by"
+
+        p.reset()
+        assert p._indexed_extras is None
+
+
 class TestBaseRDFProfile(object):
 
     def test_datasets(self):
@@ -103,6 +254,42 @@ class TestBaseRDFProfile(object):
         assert isinstance(value, str)
         assert value == 'Test Dataset 1'
 
+    def test_object_value_node_view(self):
+        g = _default_graph()
+        dataset = URIRef('http://example.org/datasets/1')
+        theme = BNode()
+        g.add((dataset, DCAT.theme, theme))
+        g.add((theme, RDFS.label, Literal('Theme label')))
+        g.add((dataset, DCAT.keyword, Literal('Keyword 1')))
+        g.add((dataset, DCAT.keyword, Literal('Keyword 2')))
+
+        p = RDFProfile(g)
+        expected = (
+            p._object_value(dataset, DCT.title),
+            p._object_value(dataset, DCAT.theme),
+            p._object_value_multilingual(dataset, DCAT.theme),
+            sorted(p._object_value_list(dataset, DCAT.keyword)),
+        )
+
+        view = NodeView(g)
+        p.use_node_view(view)
+
+        assert (
+            p._object_value(dataset, DCT.title),
+            p._object_value(dataset, DCAT.theme),
+            p._object_value_multilingual(dataset, DCAT.theme),
+            sorted(p._object_value_list(dataset, DCAT.keyword)),
+        ) == expected
+        assert view.lookups == 2
+
+    def test_reset_clears_node_view(self):
+        p = RDFProfile(_default_graph())
+        p.use_node_view(NodeView(p.g))
+
+        p.reset()
+
+        assert p._node_view is None
+
     def test_object_value_not_found(self):
 
         p = RDFProfile(_default_graph())
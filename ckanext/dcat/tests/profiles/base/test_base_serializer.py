@@ -1,7 +1,11 @@
+from unittest import mock
+
+import pytest
 
 from ckantoolkit import config
 
-from rdflib import URIRef, Literal
+from rdflib import ConjunctiveGraph, URIRef, Literal
+from rdflib.compare import isomorphic
 from rdflib.namespace import Namespace, RDF
 
 from ckanext.dcat.processors import (
@@ -12,6 +16,7 @@ from ckanext.dcat.processors import (
 )
 
 from ckanext.dcat.profiles import RDFProfile
+from ckanext.dcat.utils import catalog_uri
 from ckanext.dcat.tests.utils import BaseSerializeTest
 
 DCT = Namespace("http://purl.org/dc/terms/")
@@ -53,6 +58,19 @@ class MockRDFProfile2(RDFProfile):
         self.g.add((dataset_ref, DCAT.keyword, Literal('profile_2')))
 
 
+class MockRDFProfileCounter(RDFProfile):
+
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        MockRDFProfileCounter.instances += 1
+        super().__init__(*args, **kwargs)
+
+    def graph_from_dataset(self, dataset_dict, dataset_ref):
+
+        self.g.add((dataset_ref, DCT.title, Literal(dataset_dict['title'])))
+
+
 class TestRDFSerializer(BaseSerializeTest):
 
     def test_default_profile(self):
@@ -115,3 +133,148 @@ class TestRDFSerializer(BaseSerializeTest):
 
         assert self._triples(s.g, None, DCT.description, Literal('Lorem ipsum'))
         assert len(self._triples(s.g, None, DCAT.distribution, None)) == 1
+
+    def test_profiles_are_instantiated_once(self):
+
+        MockRDFProfileCounter.instances = 0
+
+        s = RDFSerializer()
+
+        s._profiles = [MockRDFProfileCounter]
+
+        dataset_dicts = []
+        for i in range(5):
+            dataset_dict = _default_dict()
+            dataset_dict['id'] = str(i)
+            dataset_dict['title'] = 'Dataset {}'.format(i)
+            dataset_dicts.append(dataset_dict)
+
+        s.serialize_catalog({}, dataset_dicts)
+
+        assert MockRDFProfileCounter.instances == 1
+        assert len(self._triples(s.g, None, DCT.title, None)) == 5
+
+    def _dataset_dicts(self, count):
+        dataset_dicts = []
+        for i in range(count):
+            dataset_dict = _default_dict()
+            dataset_dict['id'] = 'dataset-{}'.format(i)
+            dataset_dict['title'] = 'Dataset {}'.format(i)
+            dataset_dict['resources'][0]['id'] = 'resource-{}'.format(i)
+            dataset_dict['resources'][0]['package_id'] = dataset_dict['id']
+            dataset_dicts.append(dataset_dict)
+        return dataset_dicts
+
+    def test_serialize_datasets_isolated_graphs(self):
+
+        s = RDFSerializer()
+
+        outputs = list(
+            s.iter_serialize_datasets(self._dataset_dicts(3), _format='nt'))
+
+        assert len(outputs) == 3
+        for i, output in enumerate(outputs):
+            assert 'Dataset {}'.format(i) in output
+            for j in range(3):
+                if j != i:
+                    assert 'Dataset {}"'.format(j) not in output
+
+        # The class graph contains the last dataset
+        assert len(self._triples(s.g, None, RDF.type, DCAT.Dataset)) == 1
+
+    def test_serialize_datasets_merge(self):
+
+        s = RDFSerializer()
+
+        output = s.serialize_datasets(
+            self._dataset_dicts(3), _format='nt', merge=True)
+
+        assert len(self._triples(s.g, None, RDF.type, DCAT.Dataset)) == 3
+        for i in range(3):
+            assert output.count('"Dataset {}"'.format(i)) == 1
+
+    def test_serialize_datasets_scales_linearly(self):
+
+        def _output_lines(count):
+            s = RDFSerializer()
+            output = s.serialize_datasets(
+                self._dataset_dicts(count), _format='nt')
+            return len([line for line in output.splitlines() if line.strip()])
+
+        lines_10 = _output_lines(10)
+        lines_40 = _output_lines(40)
+
+        assert lines_40 == 4 * lines_10
+
+    @pytest.mark.parametrize("_format,parse_format", [
+        ("nt", "nt"),
+        ("nq", "nquads"),
+        ("ttl", "turtle"),
+        ("jsonld", "json-ld"),
+        ("xml", "xml"),
+    ])
+    @mock.patch(
+        "ckanext.dcat.profiles.base.RDFProfile._last_catalog_modification",
+        return_value="2024-05-01T10:00:00",
+    )
+    def test_iter_serialize_catalog(self, mock_modified, _format, parse_format):
+
+        dataset_dicts = self._dataset_dicts(3)
+        pagination_info = {
+            "count": 3,
+            "items_per_page": 100,
+            "current": "http://example.com/catalog.ttl?page=1",
+        }
+
+        s = RDFSerializer(profiles=["euro_dcat_ap_3"])
+        expected = s.serialize_catalog(
+            {}, dataset_dicts, _format=_format, pagination_info=pagination_info)
+
+        s = RDFSerializer(profiles=["euro_dcat_ap_3"])
+        chunks = list(s.iter_serialize_catalog(
+            {}, dataset_dicts, _format=_format, pagination_info=pagination_info))
+
+        if _format == "xml":
+            assert len(chunks) == 1
+        else:
+            assert len(chunks) > 3
+
+        g_expected = ConjunctiveGraph()
+        g_expected.parse(data=expected, format=parse_format)
+        g_streamed = ConjunctiveGraph()
+        g_streamed.parse(data="".join(chunks), format=parse_format)
+
+        assert len(g_streamed) == len(g_expected)
+        assert isomorphic(g_streamed, g_expected)
+
+    def test_iter_serialize_catalog_turtle_prefixes(self):
+
+        s = RDFSerializer()
+        s._profiles = [MockRDFProfile1, MockRDFProfile2]
+
+        output = "".join(
+            s.iter_serialize_catalog({}, self._dataset_dicts(3), _format="ttl"))
+
+        assert output.count("@prefix dcat:") == 1
+
+    def test_iter_serialize_catalog_datasets(self):
+
+        s = RDFSerializer(profiles=["euro_dcat_ap_3"])
+
+        output = "".join(
+            s.iter_serialize_catalog_datasets(self._dataset_dicts(3), _format="nt"))
+
+        g = ConjunctiveGraph()
+        g.parse(data=output, format="nt")
+
+        catalog = URIRef(catalog_uri())
+        assert len(self._triples(g, None, RDF.type, DCAT.Dataset)) == 3
+        assert len(self._triples(g, catalog, DCAT.dataset, None)) == 3
+        assert not self._triples(g, catalog, RDF.type, DCAT.Catalog)
+
+    def test_iter_serialize_catalog_datasets_unsupported_format(self):
+
+        s = RDFSerializer()
+
+        with pytest.raises(ValueError):
+            list(s.iter_serialize_catalog_datasets(self._dataset_dicts(1), _format="xml"))
@@ -227,6 +227,26 @@ class TestEuroDCATAPProfileParsing(BaseParseTest):
         dataset = [d for d in p.datasets()][0]
         assert dataset['license_id'] == 'cc-by'
 
+    def test_dataset_license_from_distribution_by_uri_variant(self):
+        # license_id retrieved from a variant of the URI of dcat:license object
+        g = Graph()
+
+        dataset = URIRef("http://example.org/datasets/1")
+        g.add((dataset, RDF.type, DCAT.Dataset))
+
+        distribution = URIRef("http://example.org/datasets/1/ds/1")
+        g.add((dataset, DCAT.distribution, distribution))
+        g.add((distribution, RDF.type, DCAT.Distribution))
+        g.add((distribution, DCT.license,
+               URIRef("https://creativecommons.org/licenses/by-nc/2.0/legalcode")))
+
+        p = RDFParser(profiles=['euro_dcat_ap'])
+
+        p.g = g
+
+        dataset = [d for d in p.datasets()][0]
+        assert dataset['license_id'] == 'cc-nc'
+
     def test_dataset_license_from_distribution_by_title(self):
         # license_id retrieved from dct:title of dcat:license object
         g = Graph()
@@ -683,6 +703,17 @@ class TestEuroDCATAPProfileParsing(BaseParseTest):
             resources[0].get('mimetype'))
 
     def test_distribution_mediatype_iana_uri_without_format(self):
+        resources = self._build_and_parse_format_mediatype_graph(
+            mediatype_item=URIRef("https://www.iana.org/assignments/media-types/application/json")
+        )
+        # IANA mediatype URI should be added to mimetype field, and the
+        # matching CKAN format to format
+        assert (u'https://www.iana.org/assignments/media-types/application/json' ==
+            resources[0].get('mimetype'))
+        assert u'JSON' == resources[0].get('format')
+
+    @pytest.mark.ckan_config('ckanext.dcat.normalize_ckan_format', False)
+    def test_distribution_mediatype_iana_uri_without_format_normalize_false(self):
         resources = self._build_and_parse_format_mediatype_graph(
             mediatype_item=URIRef("https://www.iana.org/assignments/media-types/application/json")
         )
@@ -692,6 +723,22 @@ class TestEuroDCATAPProfileParsing(BaseParseTest):
         assert (u'https://www.iana.org/assignments/media-types/application/json' ==
             resources[0].get('format'))
 
+    def test_distribution_format_variants_normalized(self):
+        for format_item, expected in [
+            (Literal("csv "), "CSV"),
+            (Literal("Comma Separated Values File"), "CSV"),
+            (Literal("text/CSV; charset=utf-8"), "CSV"),
+            # Vocabulary URIs are kept
+            (URIRef("http://publications.europa.eu/resource/authority/file-type/CSV"),
+             "http://publications.europa.eu/resource/authority/file-type/CSV"),
+            (URIRef("http://publications.europa.eu/resource/authority/file-type/UNKNOWN"),
+             "http://publications.europa.eu/resource/authority/file-type/UNKNOWN"),
+        ]:
+            resources = self._build_and_parse_format_mediatype_graph(
+                format_item=format_item
+            )
+            assert resources[0].get('format') == expected
+
     def test_distribution_dct_format_other_uri(self):
         resources = self._build_and_parse_format_mediatype_graph(
             format_item=URIRef("https://example.com/my/format")
@@ -434,6 +434,33 @@ class TestEuroDCATAPProfileSerializeDataset(BaseSerializeTest):
         assert self._triple(g, publisher, RDF.type, FOAF.Agent)
         assert self._triple(g, publisher, FOAF.name, dataset['organization']['title'])
 
+    @pytest.mark.usefixtures("with_plugins")
+    def test_publisher_org_updated(self):
+        org = factories.Organization(title='Example Publisher from Org')
+        dataset = {
+            'id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
+            'name': 'test-dataset',
+            'organization': {
+                'id': org['id'],
+                'name': org['name'],
+                'title': org['title'],
+            }
+        }
+
+        s = RDFSerializer(profiles=['euro_dcat_ap'])
+        dataset_ref = s.graph_from_dataset(dataset)
+        publisher = self._triple(s.g, dataset_ref, DCT.publisher, None)[2]
+        assert self._triple(s.g, publisher, FOAF.name, 'Example Publisher from Org')
+
+        helpers.call_action(
+            'organization_patch', id=org['id'], title='Updated Publisher')
+
+        # The cached organization was dropped when it was updated
+        s = RDFSerializer(profiles=['euro_dcat_ap'])
+        dataset_ref = s.graph_from_dataset(dataset)
+        publisher = self._triple(s.g, dataset_ref, DCT.publisher, None)[2]
+        assert self._triple(s.g, publisher, FOAF.name, 'Updated Publisher')
+
     def test_publisher_no_uri(self):
         dataset = {
             'id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
@@ -1420,6 +1447,39 @@ class TestEuroDCATAPProfileSerializeCatalog(BaseSerializeTest):
         # Verify that the license_url of the dataset is now also in the distribution
         assert self._triple(g, distribution, DCT.license, URIRef(dataset['license_url']))
 
+    @pytest.mark.ckan_config(DISTRIBUTION_LICENSE_FALLBACK_CONFIG, 'true')
+    def test_set_missing_license_uri_from_register_for_resource(self):
+        ''' Check the behavior if param in config is set: Add the URI of the registered license_id to the resource if there is no license_url '''
+        resource = {
+            'id': 'c041c635-054f-4431-b647-f9186926d021',
+            'package_id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
+            'name': 'CSV file',
+            'url': 'http://example.com/data/file.csv',
+            'download_url': 'http://example.com/data/file.csv',
+        }
+
+        dataset = {
+            'id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
+            'name': 'test-dataset',
+            'title': 'Test DCAT dataset',
+            'license_id': 'cc-by',
+            'resources': [
+                resource
+            ]
+        }
+
+        s = RDFSerializer(profiles=['euro_dcat_ap'])
+        g = s.g
+
+        dataset_ref = s.graph_from_dataset(dataset)
+
+        distribution = self._triple(g, dataset_ref, DCAT.distribution, None)[2]
+
+        # Verify that the URI of the license in the register is in the distribution
+        assert self._triple(
+            g, distribution, DCT.license,
+            URIRef('http://www.opendefinition.org/licenses/cc-by'))
+
     @pytest.mark.ckan_config(DISTRIBUTION_LICENSE_FALLBACK_CONFIG, 'true')
     def test_set_no_missing_license_for_resource(self):
         ''' Check the behavior if param in config is set and no valid license information is given'''
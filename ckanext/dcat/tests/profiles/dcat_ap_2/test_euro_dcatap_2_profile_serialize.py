@@ -278,6 +278,30 @@ class TestEuroDCATAP2ProfileSerializeDataset(BaseSerializeTest):
         wkt_cent = wkt.dumps(json.loads(extras['spatial_centroid']), decimals=4)
         assert self._triple(g, spatial, DCAT.centroid, wkt_cent, GSP.wktLiteral)
 
+    @pytest.mark.ckan_config("ckanext.dcat.output_spatial_format", "wkt geojson")
+    @pytest.mark.ckan_config("ckanext.dcat.output_spatial_decimals", "2")
+    def test_spatial_output_decimals(self):
+        dataset = {
+            'id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
+            'name': 'test-dataset',
+            'extras': [
+                {'key': 'spatial_uri', 'value': 'http://sws.geonames.org/6361390/'},
+                {'key': 'spatial_centroid', 'value': '{"type": "Point", "coordinates": [2.28114725,42.12208055]}'},
+            ]
+        }
+
+        s = RDFSerializer(profiles=DCAT_AP_PROFILES)
+        g = s.g
+
+        dataset_ref = s.graph_from_dataset(dataset)
+
+        spatial = self._triple(g, dataset_ref, DCT.spatial, None)[2]
+
+        assert self._triple(g, spatial, DCAT.centroid, 'POINT (2.28 42.12)', GSP.wktLiteral)
+        assert self._triple(
+            g, spatial, DCAT.centroid,
+            '{"type": "Point", "coordinates": [2.28, 42.12]}', GEOJSON_IMT)
+
     def test_spatial_bad_geojson_no_location(self):
         dataset = {
             'id': '4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6',
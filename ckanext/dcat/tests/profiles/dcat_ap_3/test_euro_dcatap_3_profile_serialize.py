@@ -1,6 +1,9 @@
 import json
+from unittest import mock
+
 import pytest
 
+from rdflib.plugins.stores.memory import Memory
 from rdflib.namespace import RDF
 from rdflib.term import URIRef
 from geomet import wkt
@@ -410,3 +413,91 @@ class TestEuroDCATAP3ProfileSerializeDataset(BaseSerializeTest):
 
         assert triple[2].datatype == XSD.nonNegativeInteger
         assert int(triple[2]) == 1234
+
+
+@mock.patch(
+    "ckanext.dcat.profiles.base.RDFProfile._last_catalog_modification",
+    return_value="2024-05-01T10:00:00",
+)
+class TestEuroDCATAP3ProfileSerializeCatalog(BaseSerializeTest):
+
+    def _dataset_dicts(self, count):
+        return [
+            {
+                "id": "dataset-{}".format(i),
+                "name": "test-dataset-{}".format(i),
+                "title": "Test DCAT dataset {}".format(i),
+                "resources": [
+                    {
+                        "id": "resource-{}-{}".format(i, j),
+                        "package_id": "dataset-{}".format(i),
+                        "url": "http://example.org/data-{}-{}.csv".format(i, j),
+                        "size": 1234,
+                    }
+                    for j in range(3)
+                ],
+            }
+            for i in range(count)
+        ]
+
+    def _visited_triples(self, count):
+        # Number of triples returned by all graph lookups when serializing a
+        # catalog page with `count` datasets
+        visited = []
+        triples = Memory.triples
+
+        def _triples(store, triple_pattern, context=None):
+            for t in triples(store, triple_pattern, context):
+                visited.append(t)
+                yield t
+
+        with mock.patch.object(Memory, "triples", _triples):
+            s = RDFSerializer(profiles=DCAT_AP_PROFILES)
+            s.serialize_catalog({}, self._dataset_dicts(count), _format="nt")
+
+        return len(visited)
+
+    def test_byte_sizes(self, mock_modified):
+
+        s = RDFSerializer(profiles=DCAT_AP_PROFILES)
+        g = s.g
+
+        s.graph_from_catalog({})
+        for dataset_dict in self._dataset_dicts(3):
+            s.graph_from_dataset(dataset_dict)
+
+        byte_sizes = list(g.objects(None, DCAT.byteSize))
+        assert len(byte_sizes) == 9
+        assert all(o.datatype == XSD.nonNegativeInteger for o in byte_sizes)
+
+    def test_byte_size_decimal(self, mock_modified):
+
+        dataset = {
+            "id": "4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6",
+            "name": "test-dataset",
+            "resources": [
+                {
+                    "id": "7fffe9b2-7a24-4d43-91f7-8bd58bad9615",
+                    "package_id": "4b6fe9ca-dc77-4cec-92a4-55c6624a5bd6",
+                    "url": "http://example.org/data.csv",
+                    "size": "12.5",
+                }
+            ],
+        }
+
+        s = RDFSerializer(profiles=DCAT_AP_PROFILES)
+        g = s.g
+
+        s.graph_from_dataset(dataset)
+
+        triple = [t for t in g.triples((None, DCAT.byteSize, None))][0]
+
+        assert triple[2].datatype == XSD.decimal
+        assert str(triple[2]) == "12.5"
+
+    def test_serialization_is_linear_in_page_size(self, mock_modified):
+
+        visited_10 = self._visited_triples(10)
+        visited_40 = self._visited_triples(40)
+
+        assert visited_40 <= 4 * visited_10
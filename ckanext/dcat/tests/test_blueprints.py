@@ -1,18 +1,25 @@
 # -*- coding: utf-8 -*-
+import gzip
 import json
 import time
+from unittest import mock
 
 from collections import OrderedDict
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
 import pytest
 
+from ckan import model
 from ckan import plugins as p
 
 from rdflib import Graph, ConjunctiveGraph, URIRef
+from rdflib.compare import isomorphic
 from ckantoolkit import url_for
 from ckantoolkit.tests import factories
 
+from ckanext.dcat import compression, prerender
+from ckanext.dcat import logic as dcat_logic
+from ckanext.dcat.output_cache import output_cache
 from ckanext.dcat.utils import dataset_uri
 from ckanext.dcat.processors import RDFParser
 from ckanext.dcat.profiles import RDF, DCAT
@@ -37,6 +44,17 @@ def _sort_query_params(url):
     )
 
 
+def _current_render(directory):
+    """
+    Creates an empty render in the pre-render `directory` and makes it the
+    current one, returning its path
+    """
+    render = directory / "render-test"
+    render.mkdir()
+    (directory / prerender.CURRENT_RENDER_LINK).symlink_to(render.name)
+    return render
+
+
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestEndpoints:
 
@@ -298,6 +316,34 @@ class TestEndpoints:
 
         assert len(dcat_datasets) == 4
 
+    @pytest.mark.ckan_config("ckanext.dcat.stream_catalog", True)
+    @pytest.mark.parametrize("_format,parse_format,content_type", [
+        ("nt", "nt", "application/n-triples"),
+        ("ttl", "turtle", "text/turtle"),
+        ("jsonld", "json-ld", "application/ld+json"),
+    ])
+    def test_catalog_streamed(self, app, _format, parse_format, content_type):
+
+        for i in range(4):
+            factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format=_format)
+
+        response = app.get(url)
+
+        assert response.headers["Content-Type"] == content_type
+
+        content = response.body
+
+        # Parse the contents to check it's an actual serialization
+        p = RDFParser()
+
+        p.parse(content, _format=parse_format)
+
+        dcat_datasets = [d for d in p.datasets()]
+
+        assert len(dcat_datasets) == 4
+
     def test_catalog_modified_date(self, app):
 
         dataset1 = factories.Dataset(title="First dataset")
@@ -453,6 +499,463 @@ class TestEndpoints:
         assert "Unknown RDF profiles: nope" in response.body
 
 
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestConditionalRequests:
+
+    def test_dataset_etag(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        response = app.get(url)
+
+        etag = response.headers["ETag"]
+        assert etag.startswith('"')
+        assert response.headers["Last-Modified"]
+
+        response = app.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.body
+
+    def test_dataset_if_modified_since(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        last_modified = app.get(url).headers["Last-Modified"]
+
+        response = app.get(url, headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == 304
+
+    def test_dataset_etag_changes(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+        etag = app.get(url).headers["ETag"]
+
+        other_format = url_for(
+            "dcat.read_dataset", _id=dataset["name"], _format="xml")
+        assert app.get(other_format).headers["ETag"] != etag
+
+        other_profiles = url_for(
+            "dcat.read_dataset", _id=dataset["name"], _format="ttl",
+            profiles="schemaorg")
+        assert app.get(other_profiles).headers["ETag"] != etag
+
+        p.toolkit.get_action("package_patch")(
+            {"ignore_auth": True}, {"id": dataset["id"], "title": "New title"})
+
+        response = app.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert "New title" in response.body
+
+    def test_dataset_private_no_etag(self, app):
+        user = factories.UserWithToken()
+        org = factories.Organization(
+            users=[{"name": user["name"], "capacity": "admin"}]
+        )
+        dataset = factories.Dataset(owner_org=org["id"], private=True)
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        response = app.get(url, headers={"Authorization": user["token"]})
+
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+    @pytest.mark.ckan_config("ckanext.dcat.conditional_requests", False)
+    def test_dataset_disabled(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        response = app.get(url)
+
+        assert "ETag" not in response.headers
+
+    def test_catalog_etag(self, app):
+
+        factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        response = app.get(url)
+
+        etag = response.headers["ETag"]
+        assert response.headers["Last-Modified"]
+
+        response = app.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert not response.body
+
+    def test_catalog_if_modified_since(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        last_modified = app.get(url).headers["Last-Modified"]
+
+        response = app.get(url, headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == 304
+        assert response.headers["Last-Modified"] == last_modified
+
+        # Dates have second precision in the headers
+        time.sleep(1)
+        p.toolkit.get_action("package_patch")(
+            {"ignore_auth": True}, {"id": dataset["id"], "title": "New"})
+
+        response = app.get(url, headers={"If-Modified-Since": last_modified})
+
+        assert response.status_code == 200
+        assert response.headers["Last-Modified"] != last_modified
+
+    @pytest.mark.ckan_config("ckanext.dcat.datasets_per_page", 2)
+    def test_catalog_etag_changes(self, app):
+
+        datasets = [factories.Dataset() for i in range(3)]
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+        page_2 = url_for("dcat.read_catalog", _format="ttl", page=2)
+        etag = app.get(url).headers["ETag"]
+        etag_page_2 = app.get(page_2).headers["ETag"]
+
+        assert etag != etag_page_2
+        assert app.get(
+            url_for("dcat.read_catalog", _format="ttl", q="test")
+        ).headers["ETag"] != etag
+
+        # The last dataset moves to the first page
+        p.toolkit.get_action("package_patch")(
+            {"ignore_auth": True}, {"id": datasets[0]["id"], "title": "New"})
+
+        assert app.get(
+            url, headers={"If-None-Match": etag}).status_code == 200
+        assert app.get(
+            page_2, headers={"If-None-Match": etag_page_2}).status_code == 200
+
+    def test_catalog_etag_changes_on_delete(self, app):
+
+        datasets = [factories.Dataset() for i in range(2)]
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+        etag = app.get(url).headers["ETag"]
+
+        p.toolkit.get_action("package_delete")(
+            {"ignore_auth": True}, {"id": datasets[0]["id"]})
+
+        assert app.get(
+            url, headers={"If-None-Match": etag}).status_code == 200
+
+    def test_etags_change_on_organization_update(self, app):
+
+        org = factories.Organization()
+        dataset = factories.Dataset(owner_org=org["id"])
+
+        dataset_url = url_for(
+            "dcat.read_dataset", _id=dataset["name"], _format="ttl")
+        catalog_url = url_for("dcat.read_catalog", _format="ttl")
+        dataset_etag = app.get(dataset_url).headers["ETag"]
+        catalog_etag = app.get(catalog_url).headers["ETag"]
+
+        p.toolkit.get_action("organization_patch")(
+            {"ignore_auth": True}, {"id": org["id"], "title": "New title"})
+
+        assert app.get(
+            dataset_url, headers={"If-None-Match": dataset_etag}
+        ).status_code == 200
+        assert app.get(
+            catalog_url, headers={"If-None-Match": catalog_etag}
+        ).status_code == 200
+
+    def test_catalog_etag_without_extra_search(self, app):
+
+        factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        with mock.patch(
+            "ckanext.dcat.logic.toolkit.get_action",
+            wraps=p.toolkit.get_action,
+        ) as get_action:
+            etag = app.get(url).headers["ETag"]
+
+        assert [c[0][0] for c in get_action.call_args_list].count(
+            "package_search") == 1
+        assert app.get(
+            url, headers={"If-None-Match": etag}).status_code == 304
+
+    def test_catalog_not_authorized(self, app):
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        with mock.patch(
+            "ckanext.dcat.utils.toolkit.check_access",
+            side_effect=p.toolkit.NotAuthorized,
+        ):
+            response = app.get(
+                url, headers={"If-None-Match": '"etag"'}, status=403)
+
+        assert "ETag" not in response.headers
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestPrerenderedCatalog:
+
+    @pytest.fixture
+    def pages_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(
+            p.toolkit.config, "ckanext.dcat.prerender.directory", str(tmp_path))
+        return _current_render(tmp_path)
+
+    def test_prerendered_page_is_served(self, app, pages_dir):
+
+        factories.Dataset()
+        (pages_dir / "catalog-00001.ttl").write_text("# Pre-rendered")
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        response = app.get(url)
+
+        assert response.body == "# Pre-rendered"
+        assert response.headers["Content-Type"] == "text/turtle"
+        assert response.headers["ETag"]
+
+        response = app.get(
+            url, headers={"If-None-Match": response.headers["ETag"]})
+
+        assert response.status_code == 304
+
+    def test_rendered_pages_match_live_ones(self, app, pages_dir):
+
+        for i in range(3):
+            factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+        live = app.get(url).body
+
+        prerender.render_catalog(formats=["ttl"])
+
+        assert isomorphic(
+            Graph().parse(data=app.get(url).body, format="turtle"),
+            Graph().parse(data=live, format="turtle"),
+        )
+
+    def test_render_gets_organization_changes(self, app, pages_dir):
+
+        org = factories.Organization(title="Old title")
+        factories.Dataset(owner_org=org["id"])
+        prerender.render_catalog(formats=["ttl"])
+
+        # Changed by another process, which can't drop the cached
+        # organizations of this one
+        group = model.Group.get(org["id"])
+        group.title = "New title"
+        model.repo.commit()
+
+        prerender.render_catalog(formats=["ttl"])
+
+        with open(prerender.page_file(1, "ttl")) as f:
+            page = f.read()
+        assert "New title" in page
+        assert "Old title" not in page
+
+    def test_filtered_pages_are_rendered_live(self, app, pages_dir):
+
+        factories.Dataset(title="Test dataset")
+        (pages_dir / "catalog-00001.ttl").write_text("# Pre-rendered")
+        (pages_dir / "catalog-00002.ttl").write_text("# Pre-rendered")
+
+        for params in ({"q": "test"}, {"modified_since": "2018-03-22"},
+                       {"profiles": "schemaorg"}):
+            url = url_for("dcat.read_catalog", _format="ttl", **params)
+            assert app.get(url).body != "# Pre-rendered"
+
+        url = url_for("dcat.read_catalog", _format="jsonld")
+        assert app.get(url).body != "# Pre-rendered"
+
+        url = url_for("dcat.read_catalog", _format="ttl", page=2)
+        assert app.get(url).body == "# Pre-rendered"
+
+    def test_last_render_is_served_until_a_new_one_completes(
+            self, app, pages_dir):
+
+        factories.Dataset()
+        (pages_dir / "catalog-00001.ttl").write_text("# Pre-rendered")
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+        served = []
+
+        def search(context, data_dict):
+            served.append(app.get(url).body)
+            raise p.toolkit.ValidationError({})
+
+        with mock.patch(
+            "ckanext.dcat.prerender._search_ckan_datasets", side_effect=search
+        ), pytest.raises(p.toolkit.ValidationError):
+            prerender.render_catalog(formats=["ttl"])
+
+        assert served == ["# Pre-rendered"]
+        assert app.get(url).body == "# Pre-rendered"
+
+        prerender.render_catalog(formats=["ttl"])
+
+        assert app.get(url).body != "# Pre-rendered"
+
+    def test_prerendered_page_not_authorized(self, app, pages_dir):
+
+        (pages_dir / "catalog-00001.ttl").write_text("# Pre-rendered")
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        with mock.patch(
+            "ckanext.dcat.utils.toolkit.check_access",
+            side_effect=p.toolkit.NotAuthorized,
+        ):
+            response = app.get(url, status=403)
+
+        assert response.body != "# Pre-rendered"
+
+    def test_render_is_scheduled_on_changes(self, app, pages_dir):
+
+        with mock.patch("ckanext.dcat.prerender._redis") as redis, \
+                mock.patch("ckanext.dcat.prerender.toolkit.enqueue_job") as enqueue_job:
+            redis.return_value.set.return_value = True
+            dataset = factories.Dataset()
+            p.toolkit.get_action("package_patch")(
+                {"ignore_auth": True}, {"id": dataset["id"], "title": "New"})
+
+        assert enqueue_job.call_count == 2
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
+class TestCompression:
+
+    def test_dataset_gzip(self, app):
+
+        dataset = factories.Dataset(notes="Test dataset")
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        plain = app.get(url)
+        response = app.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Type"] == "text/turtle"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert gzip.decompress(response.get_data()).decode("utf-8") == plain.body
+        # Each representation has its own ETag
+        assert response.headers["ETag"] != plain.headers["ETag"]
+        assert "Content-Encoding" not in plain.headers
+
+    @pytest.mark.ckan_config("ckanext.dcat.output_cache.backend", "memory")
+    def test_dataset_gzip_variant_is_cached(self, app):
+
+        output_cache.reset()
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+        headers = {"Accept-Encoding": "gzip"}
+
+        first = app.get(url, headers=headers)
+        with mock.patch("ckanext.dcat.compression.compress") as compress:
+            second = app.get(url, headers=headers)
+
+        assert not compress.called
+        assert second.get_data() == first.get_data()
+        output_cache.reset()
+
+    def test_dataset_is_read_once(self, app):
+
+        dataset = factories.Dataset()
+
+        url = url_for("dcat.read_dataset", _id=dataset["name"], _format="ttl")
+
+        with mock.patch(
+            "ckanext.dcat.logic._public_dataset",
+            wraps=dcat_logic._public_dataset,
+        ) as public_dataset, mock.patch(
+            "ckanext.dcat.logic.toolkit.check_access",
+            wraps=p.toolkit.check_access,
+        ) as check_access:
+            app.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert public_dataset.call_count == 1
+        assert [c[0][0] for c in check_access.call_args_list].count(
+            "dcat_dataset_show") == 1
+
+    def test_catalog_gzip(self, app):
+
+        factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        plain = app.get(url)
+        response = app.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()).decode("utf-8") == plain.body
+
+    @pytest.mark.ckan_config("ckanext.dcat.stream_catalog", True)
+    def test_catalog_streamed_gzip(self, app):
+
+        factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        plain = app.get(url)
+        response = app.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()).decode("utf-8") == plain.body
+
+    @pytest.mark.ckan_config("ckanext.dcat.compression.encodings", "")
+    def test_disabled(self, app):
+
+        factories.Dataset()
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+
+        response = app.get(url, headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_prerendered_page_variant(self, app, tmp_path, monkeypatch):
+
+        monkeypatch.setitem(
+            p.toolkit.config, "ckanext.dcat.prerender.directory", str(tmp_path))
+        page = _current_render(tmp_path) / "catalog-00001.ttl"
+        page.write_text("# Pre-rendered")
+
+        url = url_for("dcat.read_catalog", _format="ttl")
+        headers = {"Accept-Encoding": "gzip"}
+
+        # Variants are not compressed on requests
+        response = app.get(url, headers=headers)
+
+        assert "Content-Encoding" not in response.headers
+        assert response.body == "# Pre-rendered"
+        assert not page.with_name("catalog-00001.ttl.gz").exists()
+
+        compression.variant_file(str(page), "gzip")
+
+        response = app.get(url, headers=headers)
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.get_data()) == b"# Pre-rendered"
+
+
 @pytest.mark.usefixtures("with_plugins", "clean_db", "clean_index")
 class TestAcceptHeader:
     """
@@ -1,7 +1,20 @@
+import gzip
 import json
 import os
+from unittest import mock
 
+import pytest
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF
+
+from ckantoolkit.tests import factories, helpers
+import ckan.plugins.toolkit as toolkit
+
+from ckanext.dcat import dump
 from ckanext.dcat.cli import dcat as dcat_cli
+from ckanext.dcat.output_cache import FileSystemBackend
+from ckanext.dcat.profiles import DCAT
+from ckanext.dcat.utils import catalog_uri, dataset_uri
 
 
 def test_consume(cli):
@@ -38,3 +51,135 @@ def test_produce(cli):
     assert result.exit_code == 0
 
     assert json.loads(result.stdout)["@context"]["dcat"] == "http://www.w3.org/ns/dcat#"
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+def test_dump(cli, tmpdir):
+
+    datasets = [factories.Dataset() for i in range(5)]
+    factories.Dataset(private=True, owner_org=factories.Organization()["id"])
+
+    result = cli.invoke(
+        dcat_cli, ["dump", "-f", "nt", "--batch-size", "2", str(tmpdir)]
+    )
+    assert result.exit_code == 0, result.output
+
+    with open(os.path.join(str(tmpdir), "manifest.json")) as f:
+        manifest = json.load(f)
+
+    assert manifest["format"] == "nt"
+    assert [shard["count"] for shard in manifest["shards"]] == [2, 2, 1]
+
+    g = Graph()
+    for file_name in [manifest["catalog"]] + [
+        shard["file"] for shard in manifest["shards"]
+    ]:
+        with gzip.open(os.path.join(str(tmpdir), file_name), "rt") as f:
+            g.parse(data=f.read(), format="nt")
+
+    catalog = URIRef(catalog_uri())
+    assert (catalog, RDF.type, DCAT.Catalog) in g
+    assert sorted(str(o) for o in g.objects(catalog, DCAT.dataset)) == sorted(
+        dataset_uri(dataset) for dataset in datasets
+    )
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+def test_dump_resume(cli, tmpdir):
+
+    [factories.Dataset() for i in range(4)]
+
+    args = ["dump", "--batch-size", "2", str(tmpdir)]
+    result = cli.invoke(dcat_cli, args)
+    assert result.exit_code == 0, result.output
+
+    first_shard = os.path.join(str(tmpdir), "datasets-00000.nt.gz")
+    os.remove(os.path.join(str(tmpdir), "datasets-00001.nt.gz"))
+    modified = os.path.getmtime(first_shard)
+
+    with mock.patch(
+        "ckanext.dcat.dump.dump_shard", side_effect=dump.dump_shard
+    ) as dump_shard:
+        result = cli.invoke(dcat_cli, args + ["--resume"])
+    assert result.exit_code == 0, result.output
+
+    assert dump_shard.call_count == 1
+    assert dump_shard.call_args[0][0]["index"] == 1
+    assert os.path.getmtime(first_shard) == modified
+    assert os.path.exists(os.path.join(str(tmpdir), "datasets-00001.nt.gz"))
+
+
+@pytest.mark.usefixtures("with_plugins", "clean_db")
+def test_dump_resume_detects_changed_shards(cli, tmpdir):
+
+    datasets = [factories.Dataset() for i in range(4)]
+
+    args = ["dump", "--batch-size", "2", str(tmpdir)]
+    result = cli.invoke(dcat_cli, args)
+    assert result.exit_code == 0, result.output
+
+    # Shards of other formats in the same directory are kept
+    other_format_shard = os.path.join(str(tmpdir), "datasets-00005.ttl.gz")
+    open(other_format_shard, "w").close()
+
+    first_id = sorted(dataset["id"] for dataset in datasets)[0]
+    helpers.call_action("package_patch", id=first_id, title="Updated")
+
+    with mock.patch(
+        "ckanext.dcat.dump.dump_shard", side_effect=dump.dump_shard
+    ) as dump_shard:
+        result = cli.invoke(dcat_cli, args + ["--resume"])
+    assert result.exit_code == 0, result.output
+
+    assert dump_shard.call_count == 1
+    assert dump_shard.call_args[0][0]["index"] == 0
+    assert os.path.exists(other_format_shard)
+
+
+def test_dump_skips_non_public_datasets():
+
+    dataset_dicts = {
+        "public": {"id": "public", "private": False, "state": "active"},
+        "private": {"id": "private", "private": True, "state": "active"},
+        "deleted": {"id": "deleted", "private": False, "state": "deleted"},
+    }
+
+    def package_show(context, data_dict):
+        if data_dict["id"] not in dataset_dicts:
+            raise toolkit.ObjectNotFound()
+        return dataset_dicts[data_dict["id"]]
+
+    errors = []
+    with mock.patch.object(
+        dump.toolkit, "get_action", return_value=package_show
+    ):
+        result = list(
+            dump._iter_dataset_dicts(
+                ["public", "private", "deleted", "purged"], errors
+            )
+        )
+
+    assert [dataset_dict["id"] for dataset_dict in result] == ["public"]
+    assert errors == ["private", "deleted", "purged"]
+
+
+def test_clear_output_cache(cli, tmpdir):
+
+    backend = FileSystemBackend(str(tmpdir))
+    backend.set("dataset-1", "key", b"output")
+
+    with mock.patch(
+        "ckanext.dcat.output_cache.backend_from_config", return_value=backend
+    ):
+        result = cli.invoke(dcat_cli, ["clear-output-cache"])
+    assert result.exit_code == 0, result.output
+
+    assert backend.get("dataset-1", "key") is None
+
+
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.backend", "filesystem")
+def test_clear_output_cache_wrong_config(cli):
+
+    result = cli.invoke(dcat_cli, ["clear-output-cache"])
+    assert result.exit_code != 0
+    assert "ckanext.dcat.output_cache.directory" in result.output
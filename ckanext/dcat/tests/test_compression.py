@@ -0,0 +1,159 @@
+import gzip
+import os
+
+import pytest
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from ckanext.dcat import compression
+from ckanext.dcat.compression import (
+    compress,
+    configured_encodings,
+    fresh_variant_file,
+    iter_compress,
+    negotiate_encoding,
+    variant_file,
+)
+
+
+def _request(accept_encoding=None):
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    return Request(EnvironBuilder(headers=headers).get_environ())
+
+
+def test_compress_gzip():
+    data = "<rdf:RDF>é</rdf:RDF>" * 100
+
+    compressed = compress(data, "gzip")
+
+    assert gzip.decompress(compressed).decode("utf-8") == data
+    assert len(compressed) < len(data)
+    assert gzip.decompress(compress(data, "gzip", best=True)).decode("utf-8") == data
+
+
+def test_iter_compress_gzip():
+    chunks = ["@prefix dcat: <http://www.w3.org/ns/dcat#> .\n"] + [
+        "<http://example.org/{0}> a dcat:Dataset .\n".format(i) for i in range(100)
+    ]
+
+    compressed = b"".join(iter_compress(iter(chunks), "gzip"))
+
+    assert gzip.decompress(compressed).decode("utf-8") == "".join(chunks)
+
+
+def test_compress_brotli():
+    brotli = pytest.importorskip("brotli")
+
+    assert brotli.decompress(compress("test" * 100, "br")) == b"test" * 100
+
+
+def test_compress_zstd():
+    zstandard = pytest.importorskip("zstandard")
+
+    compressed = compress("test" * 100, "zstd")
+
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(
+        compressed
+    ) == b"test" * 100
+
+
+def test_compress_unknown_encoding():
+    with pytest.raises(ValueError):
+        compress("test", "deflate")
+
+
+def test_configured_encodings_default():
+    assert configured_encodings() == ["gzip"]
+
+
+@pytest.mark.ckan_config("ckanext.dcat.compression.encodings", "")
+def test_configured_encodings_disabled():
+    assert configured_encodings() == []
+    assert negotiate_encoding(_request("gzip")) is None
+
+
+@pytest.mark.ckan_config("ckanext.dcat.compression.encodings", "gzip deflate")
+def test_configured_encodings_unknown():
+    with pytest.raises(ValueError):
+        configured_encodings()
+
+
+@pytest.mark.ckan_config("ckanext.dcat.compression.encodings", "br gzip")
+def test_configured_encodings_not_installed():
+    if compression.brotli is not None:
+        pytest.skip("brotli is installed")
+    with pytest.raises(ValueError) as e:
+        configured_encodings()
+    assert "brotli" in str(e.value)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,encoding",
+    [
+        (None, None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "gzip"),
+        ("deflate", None),
+        ("*", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding, encoding):
+    assert negotiate_encoding(_request(accept_encoding)) == encoding
+
+
+def test_negotiate_encoding_preference(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    monkeypatch.setitem(
+        compression.config, compression.COMPRESSION_ENCODINGS_CONFIG, "br gzip"
+    )
+
+    assert negotiate_encoding(_request("gzip, br")) == "br"
+    assert negotiate_encoding(_request("gzip, br;q=0.5")) == "gzip"
+    assert negotiate_encoding(_request("gzip")) == "gzip"
+
+
+def test_variant_file(tmp_path):
+    path = tmp_path / "catalog-00001.ttl"
+    path.write_text("<a> <b> <c> .\n" * 100)
+
+    variant = variant_file(str(path), "gzip")
+
+    assert variant == str(path) + ".gz"
+    with gzip.open(variant, "rt") as f:
+        assert f.read() == path.read_text()
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "catalog-00001.ttl",
+        "catalog-00001.ttl.gz",
+    ]
+
+    # Reused while it is up to date
+    modified = os.path.getmtime(variant)
+    assert variant_file(str(path), "gzip") == variant
+    assert os.path.getmtime(variant) == modified
+
+    # Compressed again if the file changes
+    path.write_text("<a> <b> <d> .\n")
+    os.utime(str(path), (modified + 10, modified + 10))
+
+    variant_file(str(path), "gzip")
+
+    with gzip.open(variant, "rt") as f:
+        assert f.read() == "<a> <b> <d> .\n"
+
+
+def test_fresh_variant_file(tmp_path):
+    path = tmp_path / "catalog-00001.ttl"
+    path.write_text("<a> <b> <c> .\n")
+
+    assert fresh_variant_file(str(path), "gzip") is None
+
+    variant = variant_file(str(path), "gzip")
+
+    assert fresh_variant_file(str(path), "gzip") == variant
+
+    modified = os.path.getmtime(variant)
+    os.utime(str(path), (modified + 10, modified + 10))
+
+    assert fresh_variant_file(str(path), "gzip") is None
@@ -0,0 +1,78 @@
+import datetime
+
+import pytest
+from dateutil.parser import parse as parse_date
+from rdflib.namespace import XSD
+
+from ckanext.dcat import dates
+from ckanext.dcat.dates import iso_datetime, normalize_date
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("2024", (XSD.gYear, "2024")),
+        ("-0044", (XSD.gYear, "-0044")),
+        ("2024Z", (XSD.gYear, "2024Z")),
+        ("2024-07", (XSD.gYearMonth, "2024-07")),
+        ("2024-07-01", (XSD.date, "2024-07-01")),
+        ("2024-07-01+02:00", (XSD.date, "2024-07-01+02:00")),
+        ("2024-04-10T10:07:31", (XSD.dateTime, "2024-04-10T10:07:31")),
+        (
+            "1905-03-01T10:07:31.182680",
+            (XSD.dateTime, "1905-03-01T10:07:31.182680"),
+        ),
+        ("2024-04-10 10:07", (XSD.dateTime, "2024-04-10T10:07:00")),
+        ("2024-04-10T10:07:31.5Z", (XSD.dateTime, "2024-04-10T10:07:31.500000+00:00")),
+        ("2024-04-10T10:07:31+0200", (XSD.dateTime, "2024-04-10T10:07:31+02:00")),
+        ("10 April 2024", (XSD.dateTime, "2024-04-10T00:00:00")),
+        ("not_a_date", (None, "not_a_date")),
+        ("2024-02-30T10:00:00", (None, "2024-02-30T10:00:00")),
+    ],
+)
+def test_normalize_date(value, expected):
+    assert normalize_date(value) == expected
+
+
+def test_normalize_date_not_a_string():
+    with pytest.raises(TypeError):
+        normalize_date(True)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2024",
+        "2024-07",
+        "0099-07-01",
+        "2024-07-01T23:59:59.999999",
+        "2024-07-01T24:00:00",
+        "2024-07-01T10:07:31-05:30",
+        "2024-07-01T10:07:31+24:00",
+        "2024-07-01T10:07:31.1234567",
+        "July 2024",
+    ],
+)
+def test_iso_datetime_matches_dateutil(value):
+    try:
+        expected = parse_date(value, default=dates.DEFAULT_DATETIME).isoformat()
+    except ValueError:
+        expected = None
+
+    assert iso_datetime(value) == expected
+
+
+def test_iso_datetime_not_parsed():
+    assert iso_datetime("not_a_date") is None
+
+
+def test_values_are_memoized():
+    dates.cache_clear()
+
+    value = datetime.datetime(2024, 4, 10, 10, 7, 31).isoformat()
+    for i in range(3):
+        assert normalize_date(value) == (XSD.dateTime, value)
+
+    info = dates.cache_info()["normalize_date"]
+    assert info.misses == 1
+    assert info.hits == 2
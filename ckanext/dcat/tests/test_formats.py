@@ -0,0 +1,74 @@
+import pytest
+
+from ckanext.dcat import formats
+from ckanext.dcat.formats import resource_format
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "csv",
+        "CSV",
+        " Csv ",
+        "comma separated values file",
+        "text/csv",
+        "text/CSV",
+        "text/csv; charset=utf-8",
+        "text/comma-separated-values",
+        "https://www.iana.org/assignments/media-types/text/csv",
+        "http://www.iana.org/assignments/media-types/text/CSV",
+        "http://publications.europa.eu/resource/authority/file-type/CSV",
+    ],
+)
+def test_resource_format_variants(value):
+    assert resource_format(value) == ("text/csv", "CSV")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        "",
+        123,
+        "not-a-format",
+        "http://publications.europa.eu/resource/authority/file-type/UNKNOWN",
+        "https://example.com/file-type/CSV",
+    ],
+)
+def test_resource_format_not_found(value):
+    assert resource_format(value) is None
+
+
+def test_is_format_uri():
+    assert formats.is_format_uri(
+        "http://publications.europa.eu/resource/authority/file-type/CSV"
+    )
+    assert formats.is_format_uri(
+        "https://www.iana.org/assignments/media-types/text/csv"
+    )
+    assert not formats.is_format_uri("CSV")
+    assert not formats.is_format_uri("https://example.com/file-type/CSV")
+
+
+def test_unknown_values_are_memoized():
+    formats.invalidate()
+
+    for i in range(3):
+        assert resource_format("Text/CSV") == ("text/csv", "CSV")
+        # Exact keys don't use the memo
+        assert resource_format("text/csv") == ("text/csv", "CSV")
+
+    info = formats.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+
+
+def test_invalidate():
+    resource_format("JSON")
+    assert formats._index is not None
+
+    formats.invalidate()
+
+    assert formats._index is None
+    assert formats.cache_info().currsize == 0
+    assert resource_format("JSON") == ("application/json", "JSON")
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from ckanext.dcat import geometry
+from ckanext.dcat.geometry import (
+    geojson_to_wkt,
+    is_geojson,
+    normalize_geojson,
+    output_decimals,
+    wkt_to_geojson,
+)
+
+POLYGON = (
+    '{"type": "Polygon", "coordinates": [[[1.1870606,41.0786393],'
+    '[1.1870606,41.1655218],[1.3752339,41.1655218],[1.3752339,41.0786393],'
+    '[1.1870606,41.0786393]]]}'
+)
+
+
+@pytest.mark.parametrize("value", [POLYGON, json.loads(POLYGON)])
+def test_geojson_to_wkt(value):
+    assert geojson_to_wkt(value) == (
+        "POLYGON ((1.1871 41.0786, 1.1871 41.1655, 1.3752 41.1655, "
+        "1.3752 41.0786, 1.1871 41.0786))"
+    )
+
+
+def test_geojson_to_wkt_decimals():
+    assert geojson_to_wkt(
+        '{"type": "Point", "coordinates": [2.28114725, 42.12208055]}', 2
+    ) == "POINT (2.28 42.12)"
+
+
+@pytest.mark.parametrize(
+    "value", ["not_json", "{}", '{"type": "Point"}', '"Tarragona"', 5]
+)
+def test_geojson_to_wkt_not_a_geometry(value):
+    assert geojson_to_wkt(value) is None
+
+
+def test_normalize_geojson():
+    assert normalize_geojson(POLYGON) == json.dumps(json.loads(POLYGON))
+    assert normalize_geojson("not_json") is None
+
+
+def test_normalize_geojson_decimals():
+    value = {
+        "type": "GeometryCollection",
+        "geometries": [
+            {"type": "Point", "coordinates": [2.28114725, 42.12208055]},
+            {"type": "LineString", "coordinates": [[1, 2], [1.23456, 2.34567]]},
+        ],
+    }
+
+    assert json.loads(normalize_geojson(value, 2)) == {
+        "type": "GeometryCollection",
+        "geometries": [
+            {"type": "Point", "coordinates": [2.28, 42.12]},
+            {"type": "LineString", "coordinates": [[1, 2], [1.23, 2.35]]},
+        ],
+    }
+    # The original value is not modified
+    assert value["geometries"][0]["coordinates"] == [2.28114725, 42.12208055]
+
+
+def test_wkt_to_geojson():
+    assert json.loads(wkt_to_geojson("POINT (2.28 42.12)")) == {
+        "type": "Point",
+        "coordinates": [2.28, 42.12],
+    }
+    assert wkt_to_geojson("NOT_WKT (1 2)") is None
+
+
+def test_is_geojson():
+    assert is_geojson(POLYGON)
+    assert not is_geojson("not_json")
+
+
+def test_output_decimals_default():
+    assert output_decimals() is None
+
+
+@pytest.mark.ckan_config(geometry.OUTPUT_SPATIAL_DECIMALS_CONFIG, "6")
+def test_output_decimals():
+    assert output_decimals() == 6
+
+
+def test_conversions_are_memoized():
+    geometry.cache_clear()
+
+    for i in range(3):
+        assert geojson_to_wkt(POLYGON)
+        assert normalize_geojson(POLYGON)
+
+    info = geometry.cache_info()
+    for name in ("geojson_to_wkt", "normalize_geojson"):
+        assert info[name].misses == 1
+        assert info[name].hits == 2
+
+
+def test_cache_bounded_by_size(monkeypatch):
+    monkeypatch.setattr(geometry._normalize_geojson_cached, "max_bytes", 5000)
+    geometry.cache_clear()
+
+    for i in range(100):
+        normalize_geojson(json.dumps({"type": "Point", "coordinates": [i, i]}))
+
+    info = geometry.cache_info()["normalize_geojson"]
+    assert info.misses == 100
+    assert 0 < info.currsize < 100
+    assert info.bytes <= 5000
+
+    # The most recent ones are kept
+    normalize_geojson(json.dumps({"type": "Point", "coordinates": [99, 99]}))
+    assert geometry.cache_info()["normalize_geojson"].hits == 1
+
+
+def test_large_conversions_not_cached(monkeypatch):
+    monkeypatch.setattr(
+        geometry._geojson_to_wkt_cached, "max_item_bytes", 100)
+    geometry.cache_clear()
+
+    for i in range(2):
+        assert geojson_to_wkt(POLYGON)
+
+    info = geometry.cache_info()["geojson_to_wkt"]
+    assert info.misses == 2
+    assert info.currsize == 0
@@ -0,0 +1,97 @@
+from unittest import mock
+
+import pytest
+
+from ckanext.dcat import licenses
+from ckanext.dcat.licenses import (
+    license_id_for_title,
+    license_id_for_uri,
+    license_uri,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_index():
+    licenses.invalidate()
+    yield
+    licenses.invalidate()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "http://creativecommons.org/licenses/by-nc/2.0/",
+        "https://creativecommons.org/licenses/by-nc/2.0/",
+        "http://creativecommons.org/licenses/by-nc/2.0",
+        "https://creativecommons.org/licenses/by-nc/2.0/legalcode",
+        "https://creativecommons.org/licenses/by-nc/2.0/legalcode.de",
+        " HTTPS://creativecommons.org/licenses/BY-NC/2.0/ ",
+    ],
+)
+def test_license_id_for_uri_variants(value):
+    assert license_id_for_uri(value) == "cc-nc"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        "",
+        "https://creativecommons.org/licenses/by-nc/4.0/",
+        "https://example.com/licenses/by-nc/2.0/",
+    ],
+)
+def test_license_id_for_uri_not_found(value):
+    assert license_id_for_uri(value) is None
+
+
+def test_license_id_for_title():
+    assert license_id_for_title("Creative Commons Attribution") == "cc-by"
+    assert license_id_for_title("Unknown license") is None
+
+
+def test_license_uri():
+    assert license_uri("cc-by") == "http://www.opendefinition.org/licenses/cc-by"
+    # Licenses without URL
+    assert license_uri("other-open") is None
+    assert license_uri("unknown") is None
+
+
+def test_register_loaded_once():
+    with mock.patch(
+        "ckanext.dcat.licenses.LicenseRegister", wraps=licenses.LicenseRegister
+    ) as register:
+        for i in range(3):
+            assert license_id_for_uri("http://www.opendefinition.org/licenses/cc-by")
+            assert license_uri("cc-by")
+
+    assert register.call_count == 1
+
+
+@pytest.mark.ckan_config(licenses.LICENSES_CACHE_TTL_CONFIG, "0")
+def test_index_expires():
+    with mock.patch(
+        "ckanext.dcat.licenses.LicenseRegister", wraps=licenses.LicenseRegister
+    ) as register:
+        license_uri("cc-by")
+        license_uri("cc-by")
+
+    assert register.call_count == 2
+
+
+@pytest.mark.ckan_config(licenses.LICENSES_CACHE_TTL_CONFIG, "0")
+def test_previous_index_kept_if_register_fails():
+    assert license_uri("cc-by")
+
+    with mock.patch(
+        "ckanext.dcat.licenses.LicenseRegister", side_effect=Exception("Timeout")
+    ):
+        assert license_uri("cc-by") == "http://www.opendefinition.org/licenses/cc-by"
+
+
+def test_register_fails_without_previous_index():
+    with mock.patch(
+        "ckanext.dcat.licenses.LicenseRegister", side_effect=Exception("Timeout")
+    ):
+        with pytest.raises(Exception):
+            license_uri("cc-by")
@@ -0,0 +1,262 @@
+import fnmatch
+import os
+from unittest import mock
+
+import pytest
+
+from ckanext.dcat import output_cache as oc
+from ckanext.dcat.output_cache import (
+    FileSystemBackend,
+    MemoryBackend,
+    OutputCache,
+    RedisBackend,
+    backend_from_config,
+    cache_key,
+)
+
+
+class FakeRedis(object):
+    """
+    Implements the few Redis commands used by the backend
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.expires = {}
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key] = value
+
+    def expire(self, name, seconds):
+        self.expires[name] = seconds
+
+    def delete(self, *names):
+        for name in names:
+            self.hashes.pop(name, None)
+
+    def scan_iter(self, match):
+        return [name for name in self.hashes if fnmatch.fnmatch(name, match)]
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline(object):
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def command(*args):
+            self.commands.append((name, args))
+
+        return command
+
+    def execute(self):
+        for name, args in self.commands:
+            getattr(self.client, name)(*args)
+
+
+@pytest.fixture(params=["memory", "filesystem", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    elif request.param == "filesystem":
+        return FileSystemBackend(str(tmp_path))
+    return RedisBackend(client=FakeRedis())
+
+
+def test_cache_key():
+    assert cache_key("a", "ttl") == cache_key("a", "ttl")
+    assert cache_key("a", "ttl") != cache_key("a", "xml")
+    assert cache_key("a b", "c") != cache_key("a", "b c")
+
+
+def test_backend_get_set(backend):
+    assert backend.get("dataset-1", "key") is None
+
+    backend.set("dataset-1", "key", "output é".encode("utf-8"))
+    backend.set("dataset-1", "key2", b"other output")
+
+    assert backend.get("dataset-1", "key") == "output é".encode("utf-8")
+    assert backend.get("dataset-1", "key2") == b"other output"
+    assert backend.get("dataset-2", "key") is None
+
+
+def test_backend_delete(backend):
+    backend.set("dataset-1", "key", b"output 1")
+    backend.set("dataset-1", "key2", b"output 1 bis")
+    backend.set("dataset-2", "key", b"output 2")
+
+    backend.delete("dataset-1")
+    backend.delete("not-cached")
+
+    assert backend.get("dataset-1", "key") is None
+    assert backend.get("dataset-1", "key2") is None
+    assert backend.get("dataset-2", "key") == b"output 2"
+
+
+def test_backend_clear(backend):
+    backend.set("dataset-1", "key", b"output 1")
+    backend.set("dataset-2", "key", b"output 2")
+
+    backend.clear()
+
+    assert backend.get("dataset-1", "key") is None
+    assert backend.get("dataset-2", "key") is None
+
+
+def test_memory_backend_keeps_most_recently_used():
+    backend = MemoryBackend(maxsize=2)
+    backend.set("dataset-1", "key", b"output 1")
+    backend.set("dataset-2", "key", b"output 2")
+    backend.get("dataset-1", "key")
+
+    backend.set("dataset-3", "key", b"output 3")
+
+    assert backend.get("dataset-1", "key") == b"output 1"
+    assert backend.get("dataset-2", "key") is None
+    assert backend.get("dataset-3", "key") == b"output 3"
+    assert backend._keys == {"dataset-1": {"key"}, "dataset-3": {"key"}}
+
+
+def test_memory_backend_ttl():
+    backend = MemoryBackend(ttl=10)
+    with mock.patch.object(oc.time, "monotonic", return_value=100):
+        backend.set("dataset-1", "key", b"output")
+    with mock.patch.object(oc.time, "monotonic", return_value=109):
+        assert backend.get("dataset-1", "key") == b"output"
+    with mock.patch.object(oc.time, "monotonic", return_value=110):
+        assert backend.get("dataset-1", "key") is None
+    assert backend._keys == {}
+
+
+def test_filesystem_backend_ttl(tmp_path):
+    backend = FileSystemBackend(str(tmp_path), ttl=10)
+    backend.set("dataset-1", "key", b"output")
+
+    assert backend.get("dataset-1", "key") == b"output"
+
+    path = os.path.join(backend._dataset_directory("dataset-1"), "key")
+    os.utime(path, (0, os.path.getmtime(path) - 10))
+
+    assert backend.get("dataset-1", "key") is None
+    assert not os.path.exists(path)
+
+
+def test_filesystem_backend_leaves_no_temporary_files(tmp_path):
+    backend = FileSystemBackend(str(tmp_path))
+    backend.set("dataset-1", "key", b"output")
+    backend.set("dataset-1", "key", b"new output")
+
+    assert os.listdir(backend._dataset_directory("dataset-1")) == ["key"]
+    assert backend.get("dataset-1", "key") == b"new output"
+
+
+def test_redis_backend_ttl():
+    client = FakeRedis()
+    backend = RedisBackend(client=client, ttl=60)
+    backend.set("dataset-1", "key", b"output")
+
+    assert client.expires == {oc.REDIS_KEY_PREFIX + "dataset-1": 60}
+
+
+def test_redis_backend_clear_only_removes_its_keys():
+    client = FakeRedis()
+    client.hset("other-key", "a", b"b")
+    backend = RedisBackend(client=client)
+    backend.set("dataset-1", "key", b"output")
+
+    backend.clear()
+
+    assert list(client.hashes) == ["other-key"]
+
+
+def test_backend_from_config_disabled():
+    assert backend_from_config() is None
+
+
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.backend", "memory")
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.maxsize", "5")
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.ttl", "0")
+def test_backend_from_config_memory():
+    backend = backend_from_config()
+
+    assert isinstance(backend, MemoryBackend)
+    assert backend.maxsize == 5
+    assert backend.ttl == 0
+
+
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.backend", "filesystem")
+def test_backend_from_config_filesystem_requires_directory():
+    with pytest.raises(ValueError):
+        backend_from_config()
+
+
+@pytest.mark.ckan_config("ckanext.dcat.output_cache.backend", "memcached")
+def test_backend_from_config_unknown():
+    with pytest.raises(ValueError):
+        backend_from_config()
+
+
+def test_output_cache_stats():
+    cache = OutputCache()
+    cache._backend = MemoryBackend()
+
+    cache.get("dataset-1", "key")
+    cache.set("dataset-1", "key", "output")
+    assert cache.get("dataset-1", "key") == "output"
+    assert cache.get("dataset-1", "key") == "output"
+
+    assert cache.stats() == {
+        "backend": "MemoryBackend",
+        "hits": 2,
+        "misses": 1,
+        "errors": 0,
+    }
+
+    cache.invalidate("dataset-1")
+    assert cache.get("dataset-1", "key") is None
+
+
+def test_output_cache_variants():
+    cache = OutputCache()
+    cache._backend = MemoryBackend()
+    cache.set("dataset-1", "key", "output")
+
+    assert cache.get_variant("dataset-1", "key", "gzip") is None
+
+    cache.set_variant("dataset-1", "key", "gzip", b"compressed output")
+
+    assert cache.get_variant("dataset-1", "key", "gzip") == b"compressed output"
+    assert cache.get("dataset-1", "key") == "output"
+
+    cache.invalidate("dataset-1")
+    assert cache.get_variant("dataset-1", "key", "gzip") is None
+
+
+def test_output_cache_backend_errors_are_misses():
+    cache = OutputCache()
+    cache._backend = mock.Mock()
+    cache._backend.get.side_effect = ConnectionError
+    cache._backend.set.side_effect = ConnectionError
+    cache._backend.delete.side_effect = ConnectionError
+
+    assert cache.get("dataset-1", "key") is None
+    cache.set("dataset-1", "key", "output")
+    cache.invalidate("dataset-1")
+
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["errors"] == 3
+
+
+def test_output_cache_disabled():
+    cache = OutputCache()
+
+    assert not cache.enabled()
+    cache.invalidate("dataset-1")
+    cache.clear()
+    assert cache.stats()["backend"] is None
@@ -0,0 +1,357 @@
+import os
+from unittest import mock
+
+import pytest
+from rdflib import Graph, URIRef
+
+from ckanext.dcat import prerender
+from ckanext.dcat.processors import HYDRA
+from ckanext.dcat.profiles import DCAT
+from ckanext.dcat.utils import catalog_uri
+
+
+class FakeRedis(object):
+    """
+    Implements the few Redis commands used by the render jobs
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+
+    def get(self, name):
+        value = self.values.get(name)
+        return value.encode("utf-8") if value is not None else None
+
+    def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        if ex:
+            self.expires[name] = ex
+        return True
+
+    def exists(self, name):
+        return int(name in self.values)
+
+    def expire(self, name, seconds):
+        self.expires[name] = seconds
+
+    def delete(self, name):
+        self.values.pop(name, None)
+
+
+def _dataset_dicts(count):
+    return [
+        {
+            "id": "dataset-{}".format(i),
+            "name": "test-dataset-{}".format(i),
+            "title": "Test DCAT dataset {}".format(i),
+        }
+        for i in range(count)
+    ]
+
+
+def _search(dataset_dicts, per_page):
+    def search(context, data_dict):
+        start = (data_dict["page"] - 1) * per_page
+        return {
+            "count": len(dataset_dicts),
+            "results": dataset_dicts[start:start + per_page],
+        }
+
+    return search
+
+
+@pytest.fixture
+def mock_search():
+    with mock.patch(
+        "ckanext.dcat.prerender._search_ckan_datasets"
+    ) as search, mock.patch(
+        "ckanext.dcat.prerender._prefetch_organizations"
+    ), mock.patch(
+        "ckanext.dcat.profiles.base.RDFProfile._last_catalog_modification",
+        return_value="2024-05-01T10:00:00",
+    ):
+        yield search
+
+
+@pytest.mark.ckan_config("ckanext.dcat.datasets_per_page", 2)
+def test_render_catalog(mock_search, tmp_path):
+    mock_search.side_effect = _search(_dataset_dicts(5), 2)
+
+    pages = prerender.render_catalog(str(tmp_path), formats=["ttl", "jsonld"])
+
+    assert pages == 3
+    assert mock_search.call_count == 3
+    assert sorted(os.listdir(str(tmp_path / "current"))) == [
+        "catalog-00001.jsonld",
+        "catalog-00001.jsonld.gz",
+        "catalog-00001.ttl",
+        "catalog-00001.ttl.gz",
+        "catalog-00002.jsonld",
+        "catalog-00002.jsonld.gz",
+        "catalog-00002.ttl",
+        "catalog-00002.ttl.gz",
+        "catalog-00003.jsonld",
+        "catalog-00003.jsonld.gz",
+        "catalog-00003.ttl",
+        "catalog-00003.ttl.gz",
+    ]
+
+    g = Graph()
+    g.parse(str(tmp_path / "current" / "catalog-00002.ttl"), format="turtle")
+
+    assert len(list(g.objects(None, DCAT.dataset))) == 2
+    base_url = catalog_uri() + "/catalog.ttl"
+    paged_collection = URIRef(base_url + "?page=2")
+    assert str(g.value(paged_collection, HYDRA.next)) == base_url + "?page=3"
+    assert str(g.value(paged_collection, HYDRA.previous)) == base_url + "?page=1"
+
+
+def test_render_catalog_no_datasets(mock_search, tmp_path):
+    mock_search.side_effect = _search([], 10)
+
+    assert prerender.render_catalog(str(tmp_path), formats=["ttl"]) == 1
+    assert sorted(os.listdir(str(tmp_path / "current"))) == [
+        "catalog-00001.ttl",
+        "catalog-00001.ttl.gz",
+    ]
+
+
+def test_render_catalog_removes_old_renders(mock_search, tmp_path):
+    (tmp_path / "other-file").write_text("")
+    mock_search.side_effect = _search(_dataset_dicts(1), 2)
+
+    renders = []
+    for i in range(3):
+        prerender.render_catalog(str(tmp_path), formats=["ttl"])
+        renders.append(os.readlink(str(tmp_path / "current")))
+
+    assert len(set(renders)) == 3
+    # The previous render is kept for the requests still reading it
+    assert sorted(os.listdir(str(tmp_path))) == sorted(
+        ["current", "other-file"] + renders[1:]
+    )
+
+
+def test_render_catalog_keeps_current_render_until_complete(
+    mock_search, tmp_path, monkeypatch
+):
+    monkeypatch.setitem(
+        prerender.config, prerender.PRERENDER_DIRECTORY_CONFIG, str(tmp_path)
+    )
+    monkeypatch.setitem(prerender.config, prerender.PRERENDER_FORMATS_CONFIG, "ttl")
+    mock_search.side_effect = _search(_dataset_dicts(1), 2)
+    prerender.render_catalog()
+    previous = prerender.page_file(1, "ttl")
+
+    served = []
+
+    def search(context, data_dict):
+        served.append(prerender.page_file(1, "ttl"))
+        raise ConnectionError
+
+    mock_search.side_effect = search
+
+    with pytest.raises(ConnectionError):
+        prerender.render_catalog()
+
+    assert served == [previous]
+    assert prerender.page_file(1, "ttl") == previous
+    # The failed render is removed
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "current", os.path.basename(os.path.dirname(previous))
+    ]
+
+    mock_search.side_effect = _search(_dataset_dicts(1), 2)
+    prerender.render_catalog()
+
+    assert prerender.page_file(1, "ttl") != previous
+
+
+@pytest.mark.ckan_config("ckanext.dcat.compression.encodings", "")
+def test_render_catalog_without_compression(mock_search, tmp_path):
+    mock_search.side_effect = _search(_dataset_dicts(1), 2)
+
+    prerender.render_catalog(str(tmp_path), formats=["ttl"])
+
+    assert os.listdir(str(tmp_path / "current")) == ["catalog-00001.ttl"]
+
+
+def test_render_catalog_clears_process_caches(mock_search, tmp_path):
+    mock_search.side_effect = _search([], 10)
+
+    with mock.patch.object(
+        prerender, "organization_cache"
+    ) as organization_cache, mock.patch.object(
+        prerender, "catalog_modification_cache"
+    ) as catalog_modification_cache:
+        prerender.render_catalog(str(tmp_path), formats=["ttl"])
+
+    organization_cache.invalidate.assert_called_once_with()
+    catalog_modification_cache.invalidate.assert_called_once_with()
+
+
+def test_render_catalog_requires_directory():
+    with pytest.raises(ValueError):
+        prerender.render_catalog()
+
+
+def test_render_catalog_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        prerender.render_catalog(str(tmp_path), formats=["csv"])
+
+
+def test_page_file(tmp_path, monkeypatch):
+    assert prerender.page_file(1, "ttl") is None
+
+    monkeypatch.setitem(
+        prerender.config, prerender.PRERENDER_DIRECTORY_CONFIG, str(tmp_path)
+    )
+    monkeypatch.setitem(prerender.config, prerender.PRERENDER_FORMATS_CONFIG, "ttl")
+    # Not rendered yet
+    assert prerender.page_file(1, "ttl") is None
+
+    render = tmp_path / "render-1"
+    render.mkdir()
+    (render / "catalog-00001.ttl").write_text("page")
+    (render / "catalog-00001.jsonld").write_text("page")
+    os.symlink("render-1", str(tmp_path / "current"))
+
+    assert prerender.page_file(1, "ttl") == os.path.realpath(
+        str(render / "catalog-00001.ttl")
+    )
+    assert prerender.page_file(2, "ttl") is None
+    # Not a configured format
+    assert prerender.page_file(1, "jsonld") is None
+
+
+@pytest.mark.ckan_config("ckanext.dcat.catalog_endpoint", "/dcat/catalog/{_format}")
+def test_catalog_path():
+    assert prerender.catalog_path("ttl") == "/dcat/catalog/ttl"
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.directory", "/tmp/dcat-pages")
+def test_schedule_render():
+    redis = FakeRedis()
+    with mock.patch.object(
+        prerender, "_redis", return_value=redis
+    ), mock.patch.object(
+        prerender.toolkit, "enqueue_job"
+    ) as enqueue_job:
+        for now in (100.0, 105.0):
+            with mock.patch.object(prerender.time, "time", return_value=now):
+                prerender.schedule_render()
+
+    assert enqueue_job.call_count == 1
+    assert enqueue_job.call_args[0][0] == prerender.render_catalog_job
+    assert enqueue_job.call_args[1]["queue"] == "default"
+    assert redis.values[prerender.LAST_CHANGE_KEY] == "105.0"
+    assert redis.expires[prerender.PENDING_KEY] == prerender.PENDING_KEY_TIMEOUT
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.directory", "/tmp/dcat-pages")
+@pytest.mark.ckan_config("ckanext.dcat.prerender.queue", "dcat")
+def test_schedule_render_queue():
+    with mock.patch.object(
+        prerender, "_redis", return_value=FakeRedis()
+    ), mock.patch.object(prerender.toolkit, "enqueue_job") as enqueue_job:
+        prerender.schedule_render()
+
+    assert enqueue_job.call_args[1]["queue"] == "dcat"
+
+
+def test_schedule_render_disabled():
+    with mock.patch.object(prerender, "_redis") as redis:
+        prerender.schedule_render()
+
+    assert not redis.called
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.directory", "/tmp/dcat-pages")
+def test_schedule_render_errors_are_logged():
+    with mock.patch.object(prerender, "_redis", side_effect=ConnectionError):
+        prerender.schedule_render()
+
+
+def _run_job(redis, now, render_catalog=None):
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    with mock.patch.object(
+        prerender.time, "sleep", sleep
+    ), mock.patch.object(
+        prerender.time, "time", lambda: now[0]
+    ), mock.patch.object(
+        prerender, "_redis", return_value=redis
+    ), mock.patch.object(
+        prerender, "render_catalog", render_catalog or mock.Mock()
+    ) as render, mock.patch.object(
+        prerender.toolkit, "enqueue_job"
+    ) as enqueue_job:
+        prerender.render_catalog_job()
+
+    return sleeps, render, enqueue_job
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.delay", 5)
+def test_render_catalog_job():
+    redis = FakeRedis()
+    redis.set(prerender.PENDING_KEY, "1")
+    redis.set(prerender.LAST_CHANGE_KEY, "100.0")
+
+    sleeps, render, enqueue_job = _run_job(redis, [102.0])
+
+    # Only waits for the rest of the delay since the last change
+    assert sleeps == [3.0]
+    assert render.call_count == 1
+    assert prerender.PENDING_KEY not in redis.values
+    assert not enqueue_job.called
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.delay", 5)
+def test_render_catalog_job_no_wait():
+    redis = FakeRedis()
+    redis.set(prerender.PENDING_KEY, "1")
+    redis.set(prerender.LAST_CHANGE_KEY, "100.0")
+
+    sleeps, render, enqueue_job = _run_job(redis, [200.0])
+
+    assert sleeps == []
+    assert render.call_count == 1
+
+
+@pytest.mark.ckan_config("ckanext.dcat.prerender.delay", 5)
+def test_render_catalog_job_renders_changes_during_render():
+    redis = FakeRedis()
+    redis.set(prerender.PENDING_KEY, "1")
+    redis.set(prerender.LAST_CHANGE_KEY, "100.0")
+    now = [200.0]
+    renders = []
+
+    def render_catalog():
+        # The pending key is held while rendering
+        assert redis.exists(prerender.PENDING_KEY)
+        renders.append(now[0])
+        if len(renders) == 1:
+            redis.set(prerender.LAST_CHANGE_KEY, "201.0")
+
+    sleeps, render, enqueue_job = _run_job(redis, now, render_catalog)
+
+    assert renders == [200.0, 206.0]
+    assert sleeps == [6.0]
+    assert prerender.PENDING_KEY not in redis.values
+
+
+def test_render_catalog_job_releases_pending_key_on_errors():
+    redis = FakeRedis()
+    redis.set(prerender.PENDING_KEY, "1")
+
+    with pytest.raises(ValueError):
+        _run_job(redis, [200.0], mock.Mock(side_effect=ValueError))
+
+    assert prerender.PENDING_KEY not in redis.values
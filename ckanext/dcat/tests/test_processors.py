@@ -0,0 +1,101 @@
+import pytest
+
+from ckanext.dcat.processors import (
+    RDFParser,
+    RDFSerializer,
+    RDFProfileException,
+    RDFProfileRegistry,
+    DEFAULT_RDF_PROFILES,
+    profile_registry,
+)
+from ckanext.dcat.profiles import EuropeanDCATAP2Profile, SchemaOrgProfile
+
+
+@pytest.fixture
+def registry():
+    profile_registry.invalidate()
+    yield profile_registry
+    profile_registry.invalidate()
+
+
+class TestRDFProfileRegistry(object):
+
+    def test_get_resolves_profiles_in_order(self):
+        registry = RDFProfileRegistry()
+
+        profiles = registry.get(["schemaorg", "euro_dcat_ap_2"])
+
+        assert profiles == [SchemaOrgProfile, EuropeanDCATAP2Profile]
+        assert profiles[0].name == "schemaorg"
+
+    def test_get_is_cached(self):
+        registry = RDFProfileRegistry()
+
+        registry.get(["euro_dcat_ap_2"])
+        registry.get(["euro_dcat_ap_2"])
+        registry.get(["euro_dcat_ap_2", "schemaorg"])
+
+        stats = registry.stats()
+        assert stats["entries"] == 2
+        assert stats["misses"] == 2
+        assert stats["hits"] == 1
+        assert stats["resolution_time"] > 0
+
+    def test_get_returns_copies(self):
+        registry = RDFProfileRegistry()
+
+        profiles = registry.get(["euro_dcat_ap_2"])
+        profiles.append(SchemaOrgProfile)
+
+        assert registry.get(["euro_dcat_ap_2"]) == [EuropeanDCATAP2Profile]
+
+    def test_unknown_profiles_not_cached(self):
+        registry = RDFProfileRegistry()
+
+        for i in range(2):
+            with pytest.raises(RDFProfileException) as e:
+                registry.get(["euro_dcat_ap_2", "not_found"])
+            assert str(e.value) == "Unknown RDF profiles: not_found"
+
+        assert registry.stats()["entries"] == 0
+        assert registry.stats()["misses"] == 2
+
+    @pytest.mark.ckan_config("ckanext.dcat.rdf.profiles", "euro_dcat_ap_2 schemaorg")
+    def test_warm_uses_config(self):
+        registry = RDFProfileRegistry()
+
+        registry.warm()
+
+        assert registry.get(["euro_dcat_ap_2", "schemaorg"])
+        assert registry.stats()["hits"] == 1
+
+    def test_warm_uses_defaults(self):
+        registry = RDFProfileRegistry()
+
+        registry.warm()
+
+        assert registry.get(DEFAULT_RDF_PROFILES)
+        assert registry.stats()["hits"] == 1
+
+    def test_invalidate(self):
+        registry = RDFProfileRegistry()
+
+        registry.get(["euro_dcat_ap_2"])
+        registry.invalidate()
+
+        assert registry.stats() == {
+            "entries": 0,
+            "hits": 0,
+            "misses": 0,
+            "resolution_time": 0.0,
+        }
+
+    def test_processors_use_the_registry(self, registry):
+
+        RDFParser(profiles=["euro_dcat_ap_2"])
+        RDFSerializer(profiles=["euro_dcat_ap_2"])
+        RDFSerializer(profiles=["euro_dcat_ap_2"])
+
+        stats = registry.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
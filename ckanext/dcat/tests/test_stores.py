@@ -0,0 +1,347 @@
+import gc
+import os
+import tracemalloc
+from io import StringIO
+
+import pytest
+
+from rdflib import ConjunctiveGraph, Graph, URIRef, BNode, Literal
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+from rdflib.plugins.stores.memory import Memory
+
+from ckanext.dcat.exceptions import RDFParserException
+from ckanext.dcat.processors import RDFParser
+from ckanext.dcat.profiles import DCAT, DCT
+from ckanext.dcat.stores import (
+    CompactStore,
+    SQLiteStore,
+    DescriptionStore,
+    GraphDescriptions,
+    SubjectIndex,
+    bounded_description,
+    get_store,
+)
+from ckanext.dcat.tests.utils import get_file_contents
+
+
+class TestSQLiteStore(object):
+
+    def test_parse_same_as_memory(self):
+        data = get_file_contents('dcat/dataset.rdf')
+
+        g_memory = ConjunctiveGraph()
+        g_memory.parse(data=data, format='xml')
+        g_sqlite = ConjunctiveGraph(store=SQLiteStore())
+        g_sqlite.parse(data=data, format='xml')
+
+        assert len(g_sqlite) == len(g_memory)
+        assert isomorphic(g_sqlite, g_memory)
+
+    def test_terms(self):
+        g = ConjunctiveGraph(store=SQLiteStore())
+        dataset = URIRef('http://example.org/dataset/1')
+        node = BNode()
+        literals = [
+            Literal('Test'),
+            Literal('Test', lang='en'),
+            Literal('Multiline\n"quoted"'),
+            Literal('2024-05-01', datatype=XSD.date),
+        ]
+
+        g.add((dataset, DCT.temporal, node))
+        for literal in literals:
+            g.add((node, DCT.description, literal))
+
+        assert g.value(dataset, DCT.temporal) == node
+        assert set(g.objects(node, DCT.description)) == set(literals)
+        assert len(list(g.triples((None, None, Literal('Test', lang='en'))))) == 1
+        assert len(list(g.triples((None, None, Literal('Other'))))) == 0
+
+    def test_contexts(self):
+        g = ConjunctiveGraph(store=SQLiteStore())
+        dataset = URIRef('http://example.org/dataset/1')
+
+        for name in ('a', 'b'):
+            g.get_context(URIRef('http://example.org/graph/' + name)).add(
+                (dataset, RDF.type, DCAT.Dataset))
+
+        assert len(g) == 1
+        assert len(list(g.quads((dataset, None, None)))) == 2
+        assert len(g.get_context(URIRef('http://example.org/graph/a'))) == 1
+
+    def test_remove(self):
+        g = ConjunctiveGraph(store=SQLiteStore())
+        dataset = URIRef('http://example.org/dataset/1')
+        g.add((dataset, RDF.type, DCAT.Dataset))
+        g.add((dataset, DCT.title, Literal('Test')))
+
+        g.remove((None, DCT.title, None))
+
+        assert len(g) == 1
+        assert g.value(dataset, DCT.title) is None
+
+    def test_database_removed(self):
+        store = SQLiteStore()
+        path = store.path
+        g = ConjunctiveGraph(store=store)
+        g.add((URIRef('http://example.org/dataset/1'), RDF.type, DCAT.Dataset))
+        assert os.path.exists(path)
+
+        g.close()
+
+        assert not os.path.exists(path)
+
+    def test_database_removed_on_garbage_collection(self):
+        store = SQLiteStore()
+        path = store.path
+
+        del store
+        gc.collect()
+
+        assert not os.path.exists(path)
+
+    def test_tmp_dir(self, tmpdir):
+        store = SQLiteStore(tmp_dir=str(tmpdir))
+
+        assert os.path.dirname(store.path) == str(tmpdir)
+
+
+class TestCompactStore(object):
+
+    @pytest.mark.parametrize('file_name,_format', [
+        ('dcat/dataset.rdf', 'xml'),
+        ('dcat/catalog.rdf', 'xml'),
+        ('dcat/dataset_health.ttl', 'ttl'),
+    ])
+    def test_parse_same_as_memory(self, file_name, _format):
+        data = get_file_contents(file_name)
+
+        g_memory = ConjunctiveGraph()
+        g_memory.parse(data=data, format=_format)
+        g_compact = ConjunctiveGraph(store=CompactStore())
+        g_compact.parse(data=data, format=_format)
+
+        assert len(g_compact) == len(g_memory)
+        assert isomorphic(g_compact, g_memory)
+
+    def test_terms_stored_once(self):
+        store = CompactStore()
+        g = ConjunctiveGraph(store=store)
+        for i in range(10):
+            dataset = URIRef('http://example.org/dataset/{}'.format(i))
+            g.add((dataset, RDF.type, DCAT.Dataset))
+            g.add((dataset, DCT.license, URIRef('http://example.org/license')))
+
+        # 10 datasets, rdf:type, dcat:Dataset, dct:license, the license
+        # and the default context
+        assert len(store._terms) == 15
+        assert len(g) == 20
+
+    def test_triples(self):
+        g = ConjunctiveGraph(store=CompactStore())
+        dataset = URIRef('http://example.org/dataset/1')
+        node = BNode()
+        g.add((dataset, RDF.type, DCAT.Dataset))
+        g.add((dataset, DCT.title, Literal('Test')))
+        g.add((dataset, DCT.temporal, node))
+        g.add((node, DCT.description, Literal('Test', lang='en')))
+
+        assert g.value(dataset, DCT.temporal) == node
+        assert list(g.subjects(RDF.type, DCAT.Dataset)) == [dataset]
+        assert set(g.subjects(None, Literal('Test'))) == {dataset}
+        assert len(list(g.triples((None, DCT.title, None)))) == 1
+        assert len(list(g.triples((None, None, Literal('Other'))))) == 0
+        assert len(list(g.triples((None, None, None)))) == 4
+
+    def test_duplicates(self):
+        g = ConjunctiveGraph(store=CompactStore())
+        dataset = URIRef('http://example.org/dataset/1')
+
+        g.add((dataset, DCT.title, Literal('Test')))
+        g.add((dataset, DCT.title, Literal('Test')))
+
+        assert len(g) == 1
+
+    def test_contexts(self):
+        g = ConjunctiveGraph(store=CompactStore())
+        dataset = URIRef('http://example.org/dataset/1')
+
+        for name in ('a', 'b'):
+            g.get_context(URIRef('http://example.org/graph/' + name)).add(
+                (dataset, RDF.type, DCAT.Dataset))
+
+        assert len(g) == 1
+        assert len(list(g.triples((dataset, None, None)))) == 1
+        assert len(list(g.quads((dataset, None, None)))) == 2
+        assert len(g.get_context(URIRef('http://example.org/graph/a'))) == 1
+
+    def test_remove(self):
+        g = ConjunctiveGraph(store=CompactStore())
+        dataset = URIRef('http://example.org/dataset/1')
+        g.add((dataset, RDF.type, DCAT.Dataset))
+        g.add((dataset, DCT.title, Literal('Test')))
+
+        g.remove((None, DCT.title, None))
+
+        assert len(g) == 1
+        assert g.value(dataset, DCT.title) is None
+
+        g.add((dataset, DCT.title, Literal('Test')))
+
+        assert g.value(dataset, DCT.title) == Literal('Test')
+
+    def test_parser_store(self):
+        p = RDFParser(store='compact')
+        p.parse(get_file_contents('dcat/dataset.rdf'))
+
+        assert isinstance(p.g.store, CompactStore)
+
+        datasets = list(p.datasets())
+        assert len(datasets) == 1
+        assert datasets[0]['title'] == 'Zimbabwe Regional Geochemical Survey.'
+
+
+class TestDescriptionStore(object):
+
+    def test_triples(self):
+        s = URIRef('http://example.org/s')
+        o = BNode()
+        store = DescriptionStore([
+            (s, DCT.title, Literal('Title')),
+            (s, DCT.publisher, o),
+            (o, DCT.title, Literal('Publisher')),
+        ])
+        g = Graph(store=store)
+
+        assert len(g) == 3
+        assert g.value(s, DCT.title) == Literal('Title')
+        assert g.value(g.value(s, DCT.publisher), DCT.title) == Literal('Publisher')
+        assert set(g.subjects(DCT.title, None)) == {s, o}
+
+        g.remove((s, DCT.title, None))
+
+        assert len(g) == 2
+        assert g.value(s, DCT.title) is None
+
+
+class TestBoundedDescription(object):
+
+    def test_bounded_description(self):
+        g = Graph()
+        g.parse(data=get_file_contents('dcat/catalog_datasets_list.rdf'),
+                format='xml')
+
+        datasets = list(g.subjects(RDF.type, DCAT.Dataset))
+        assert len(datasets) > 1
+
+        for dataset in datasets:
+            d = Graph(store=DescriptionStore(bounded_description(g, dataset)))
+
+            assert list(d.subjects(RDF.type, DCAT.Dataset)) == [dataset]
+            assert set(d.predicate_objects(dataset)) == set(
+                g.predicate_objects(dataset))
+            for distribution in g.objects(dataset, DCAT.distribution):
+                assert set(d.predicate_objects(distribution)) == set(
+                    g.predicate_objects(distribution))
+
+
+class TestGraphDescriptions(object):
+
+    def test_same_as_bounded_description(self):
+        g = Graph()
+        g.parse(data=get_file_contents('dcat/catalog_datasets_list.rdf'),
+                format='xml')
+        descriptions = GraphDescriptions(g)
+
+        for dataset in g.subjects(RDF.type, DCAT.Dataset):
+            assert set(Graph(store=descriptions.store(dataset))) == set(
+                bounded_description(g, dataset))
+
+    def test_modified_description_not_shared(self):
+        g = Graph()
+        dataset1 = URIRef('http://example.org/dataset/1')
+        dataset2 = URIRef('http://example.org/dataset/2')
+        publisher = URIRef('http://example.org/publisher')
+        for dataset in (dataset1, dataset2):
+            g.add((dataset, RDF.type, DCAT.Dataset))
+            g.add((dataset, DCT.publisher, publisher))
+        g.add((publisher, DCT.title, Literal('Publisher')))
+        descriptions = GraphDescriptions(g)
+
+        d1 = Graph(store=descriptions.store(dataset1))
+        assert len(d1) == 3
+        d1.add((publisher, DCT.description, Literal('Description')))
+        d1.remove((publisher, DCT.title, None))
+        assert len(d1) == 3
+
+        d2 = Graph(store=descriptions.store(dataset2))
+        assert len(d2) == 3
+        assert d2.value(publisher, DCT.title) == Literal('Publisher')
+        assert d2.value(publisher, DCT.description) is None
+
+
+class TestSubjectIndex(object):
+
+    def _load_peak_memory(self, num_bnodes):
+        source = StringIO(''.join(
+            '<http://example.org/dataset/{0}> <{1}> _:b{0} .\n'.format(
+                i, DCT.temporal)
+            for i in range(num_bnodes)))
+        with SubjectIndex() as index:
+            index.batch_size = 100
+            tracemalloc.start()
+            try:
+                index.load(source, 'nt')
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    def test_blank_nodes_keep_label(self):
+        data = (
+            '<http://example.org/dataset/1> <{0}> <{1}> .\n'
+            '<http://example.org/dataset/1> <{2}> _:b1 .\n'
+            '_:b1 <{3}> "2024-01-01" .\n'
+        ).format(RDF.type, DCAT.Dataset, DCT.temporal, DCAT.startDate)
+        with SubjectIndex() as index:
+            index.load(StringIO(data), 'nt')
+            [(dataset_ref, g)] = list(index.dataset_descriptions())
+
+        temporal = g.value(dataset_ref, DCT.temporal)
+        assert isinstance(temporal, BNode)
+        assert str(g.value(temporal, DCAT.startDate)) == '2024-01-01'
+
+    def test_memory_flat_with_number_of_blank_nodes(self):
+        small = self._load_peak_memory(1000)
+        large = self._load_peak_memory(20000)
+
+        # Remembering every label would take well over 1MB here
+        assert large - small < 200 * 1024
+
+
+class TestGetStore(object):
+
+    def test_default(self):
+        assert isinstance(get_store(), Memory)
+
+    @pytest.mark.ckan_config('ckanext.dcat.rdf.store', 'sqlite')
+    def test_config(self):
+        assert isinstance(get_store(), SQLiteStore)
+
+    @pytest.mark.ckan_config('ckanext.dcat.rdf.store', 'sqlite')
+    def test_name_overrides_config(self):
+        assert isinstance(get_store('Memory'), Memory)
+
+    def test_unknown_store(self):
+        with pytest.raises(RDFParserException):
+            get_store('not-a-store')
+
+    def test_parser_store(self):
+        p = RDFParser(store='sqlite')
+        p.parse(get_file_contents('dcat/dataset.rdf'))
+
+        assert isinstance(p.g.store, SQLiteStore)
+
+        datasets = list(p.datasets())
+        assert len(datasets) == 1
+        assert datasets[0]['title'] == 'Zimbabwe Regional Geochemical Survey.'
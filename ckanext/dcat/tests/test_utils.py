@@ -1,4 +1,25 @@
-from ckanext.dcat.utils import parse_accept_header
+import copy
+import datetime
+import pickle
+from unittest import mock
+
+import pytest
+
+from ckan.plugins import toolkit
+from ckantoolkit.tests import factories
+
+from ckanext.dcat.utils import (
+    ORGANIZATIONS_MODIFIED_KEY,
+    CatalogModificationCache,
+    DatasetSchemaCache,
+    FrozenDict,
+    OrganizationCache,
+    freeze,
+    organizations_modified,
+    parse_accept_header,
+    schema_index,
+    set_organizations_modified,
+)
 
 
 def test_accept_header_empty():
@@ -120,3 +141,334 @@ def test_accept_header_html_multiple():
     _format = parse_accept_header(header)
 
     assert _format is None
+
+
+def _schema():
+    return {
+        'dataset_type': 'test_schema_index',
+        'dataset_fields': [
+            {'field_name': 'title_translated', 'validators': 'fluent_text'},
+            {'field_name': 'theme',
+             'validators': 'ignore_missing scheming_multiple_text'},
+            {'field_name': 'contact', 'repeating_subfields': [
+                {'field_name': 'name'}, {'field_name': 'email'}]},
+            {'field_name': 'notes'},
+        ],
+        'resource_fields': [
+            {'field_name': 'language',
+             'validators': 'ignore_missing scheming_multiple_text'},
+        ],
+    }
+
+
+def test_schema_index():
+
+    schema = _schema()
+
+    index = schema_index(schema)
+
+    assert index.dataset_fields['notes'] == schema['dataset_fields'][3]
+    assert index.multilingual_dataset_fields == ['title_translated']
+    assert index.multiple_text_dataset_fields == {'theme'}
+    assert index.multiple_text_resource_fields == {'language'}
+    assert index.repeating_dataset_fields == [schema['dataset_fields'][2]]
+    assert index.dataset_subfield_names == {'contact': ['name', 'email']}
+    assert index.repeating_resource_fields == []
+
+
+def test_schema_index_reused():
+
+    schema = _schema()
+
+    assert schema_index(schema) is schema_index(schema)
+
+
+def test_schema_index_schema_reloaded():
+
+    schema = _schema()
+    index = schema_index(schema)
+
+    new_schema = _schema()
+    new_schema['dataset_fields'].append({'field_name': 'version'})
+    new_index = schema_index(new_schema)
+
+    assert new_index is not index
+    assert 'version' in new_index.dataset_fields
+
+
+def test_freeze():
+
+    value = freeze({'fields': [{'field_name': 'title'}], 'about': 'Test'})
+
+    assert value == {'fields': ({'field_name': 'title'},), 'about': 'Test'}
+    assert isinstance(value, FrozenDict)
+    assert isinstance(value['fields'][0], FrozenDict)
+    with pytest.raises(TypeError):
+        value['about'] = 'Changed'
+    with pytest.raises(TypeError):
+        value['fields'][0].update({'field_name': 'notes'})
+
+
+def test_frozen_dict_copies():
+
+    value = freeze({'fields': [{'field_name': 'title'}]})
+
+    assert copy.deepcopy(value) == value
+    assert pickle.loads(pickle.dumps(value)) == value
+
+    mutable = dict(value)
+    mutable['about'] = 'Test'
+    assert 'about' not in value
+
+
+def test_dataset_schema_cache_no_scheming():
+
+    cache = DatasetSchemaCache()
+
+    assert cache.get('dataset') is None
+    assert cache.get('dataset') is None
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+
+def test_catalog_modification_cache():
+
+    cache = CatalogModificationCache()
+
+    with mock.patch.object(
+            cache, '_load', return_value='2024-05-01T10:00:00') as load:
+        assert cache.get() == '2024-05-01T10:00:00'
+        assert cache.get() == '2024-05-01T10:00:00'
+        assert load.call_count == 1
+
+        cache.invalidate()
+
+        assert cache.get() == '2024-05-01T10:00:00'
+        assert load.call_count == 2
+
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+
+
+@pytest.mark.ckan_config('ckanext.dcat.catalog_modified_cache_ttl', '0')
+def test_catalog_modification_cache_disabled():
+
+    cache = CatalogModificationCache()
+
+    with mock.patch.object(
+            cache, '_load', return_value='2024-05-01T10:00:00') as load:
+        cache.get()
+        cache.get()
+
+    assert load.call_count == 2
+
+
+def _load_org(org_ids):
+    return {
+        org_id: freeze({'id': org_id, 'title': 'Org {}'.format(org_id)})
+        for org_id in org_ids
+        if org_id != 'missing'
+    }
+
+
+def test_organization_cache():
+
+    cache = OrganizationCache()
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load:
+        assert cache.get('org1')['title'] == 'Org org1'
+        assert cache.get('org1')['title'] == 'Org org1'
+        assert cache.get('missing') is None
+        assert cache.get('missing') is None
+
+    # Missing organizations are not cached
+    assert load.call_count == 3
+    assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 3}
+
+
+def test_organization_cache_maxsize():
+
+    cache = OrganizationCache(maxsize=2)
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load:
+        cache.get('org1')
+        cache.get('org2')
+        cache.get('org1')
+        cache.get('org3')
+
+        assert cache.stats()['entries'] == 2
+
+        # org2 was the least recently used one
+        cache.get('org1')
+        cache.get('org2')
+
+    assert load.call_count == 4
+
+
+def test_organization_cache_invalidate():
+
+    cache = OrganizationCache()
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load:
+        cache.get('org1')
+        cache.get('org2')
+        cache.invalidate('org1')
+        cache.get('org1')
+        cache.get('org2')
+
+        assert load.call_count == 3
+
+        cache.invalidate()
+
+        assert cache.stats() == {'entries': 0, 'hits': 0, 'misses': 0}
+
+
+def test_organization_cache_prefetch():
+
+    cache = OrganizationCache()
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load:
+        cache.get('org1')
+        cache.prefetch(['org1', 'org2', None, 'org2', 'org3', 'missing'])
+
+        # Loaded in one go
+        assert [c.args[0] for c in load.call_args_list] == [
+            ['org1'], ['org2', 'org3', 'missing']]
+
+        for org_id in ('org1', 'org2', 'org3'):
+            cache.get(org_id)
+
+        # Nothing left to load
+        cache.prefetch(['org1', 'org2'])
+
+    assert load.call_count == 2
+    # Prefetched organizations are not misses
+    assert cache.stats() == {'entries': 3, 'hits': 3, 'misses': 1}
+
+
+def test_organization_cache_changed_in_other_process():
+
+    cache = OrganizationCache()
+    before = datetime.datetime(2024, 5, 1, 10, 0, 0)
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load, \
+            mock.patch('ckanext.dcat.utils.organizations_modified',
+                       return_value=before) as orgs_modified:
+        cache.get('org1')
+        cache.prefetch(['org2'])
+        cache.get('org1')
+        cache.get('org2')
+
+        assert load.call_count == 2
+
+        # Entries loaded before the last change are dropped
+        orgs_modified.return_value = datetime.datetime.now(
+            datetime.timezone.utc).replace(tzinfo=None)
+        cache.get('org1')
+        cache.prefetch(['org2'])
+
+    assert [c.args[0] for c in load.call_args_list] == [
+        ['org1'], ['org2'], ['org1'], ['org2']]
+
+
+@pytest.mark.usefixtures('with_plugins', 'clean_db')
+def test_organization_cache_load():
+
+    org = factories.Organization(title='Test Org')
+    group = factories.Group()
+
+    org_dicts = OrganizationCache()._load([org['id'], group['id'], 'missing'])
+
+    assert list(org_dicts) == [org['id']]
+    assert org_dicts[org['id']]['title'] == 'Test Org'
+    assert org_dicts[org['id']]['name'] == org['name']
+
+
+@pytest.mark.ckan_config('ckanext.dcat.organization_cache_ttl', '0')
+def test_organization_cache_disabled():
+
+    cache = OrganizationCache()
+
+    with mock.patch.object(cache, '_load', side_effect=_load_org) as load:
+        cache.prefetch(['org1'])
+        cache.get('org1')
+        cache.get('org1')
+
+    assert load.call_count == 2
+    assert cache.stats()['entries'] == 0
+
+
+@pytest.mark.usefixtures('with_plugins')
+@pytest.mark.ckan_config('ckan.plugins', 'dcat scheming_datasets')
+@pytest.mark.ckan_config(
+    'scheming.dataset_schemas', 'ckanext.dcat.schemas:dcat_ap_full.yaml')
+@pytest.mark.ckan_config(
+    'scheming.presets',
+    'ckanext.scheming:presets.json ckanext.dcat.schemas:presets.yaml')
+class TestDatasetSchemaCache(object):
+
+    def test_get(self):
+        cache = DatasetSchemaCache()
+
+        schema = cache.get('dataset')
+
+        assert schema['dataset_type'] == 'dataset'
+        assert cache.get('dataset') is schema
+        assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+    def test_get_read_only(self):
+        cache = DatasetSchemaCache()
+
+        schema = cache.get('dataset')
+
+        with pytest.raises(TypeError):
+            schema['about'] = 'Changed'
+        with pytest.raises(TypeError):
+            schema['dataset_fields'][0]['field_name'] = 'changed'
+
+    def test_get_unknown_type(self):
+        cache = DatasetSchemaCache()
+
+        for i in range(2):
+            with pytest.raises(toolkit.ObjectNotFound):
+                cache.get('not-a-type')
+
+        assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+    def test_maxsize(self):
+        cache = DatasetSchemaCache(maxsize=1)
+
+        cache.get('dataset')
+        with pytest.raises(toolkit.ObjectNotFound):
+            cache.get('not-a-type')
+        cache.get('dataset')
+
+        assert cache.stats() == {'entries': 1, 'hits': 0, 'misses': 3}
+
+    def test_invalidate(self):
+        cache = DatasetSchemaCache()
+        schema = cache.get('dataset')
+
+        cache.invalidate()
+
+        assert cache.stats() == {'entries': 0, 'hits': 0, 'misses': 0}
+        assert cache.get('dataset') is not schema
+
+
+def test_organizations_modified():
+
+    redis = mock.Mock()
+    redis.get.return_value = None
+    with mock.patch('ckanext.dcat.utils._redis', return_value=redis):
+        assert organizations_modified() == datetime.datetime.min
+
+        set_organizations_modified()
+        redis.get.return_value = redis.set.call_args[0][1].encode('utf-8')
+
+        assert organizations_modified() > datetime.datetime.min
+        assert redis.set.call_args[0][0] == ORGANIZATIONS_MODIFIED_KEY
+
+
+def test_organizations_modified_errors():
+
+    with mock.patch('ckanext.dcat.utils._redis', side_effect=ConnectionError):
+        assert organizations_modified() is None
+        set_organizations_modified()
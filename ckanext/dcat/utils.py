@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import datetime
 import logging
+import threading
+import time
 import uuid
+from collections import OrderedDict
 import simplejson as json
 import re
 import operator
@@ -15,12 +19,15 @@ from ckan import model
 import ckan.plugins.toolkit as toolkit
 import ckan.plugins as plugins
 
+from ckanext.dcat import compression
 from ckanext.dcat.exceptions import RDFProfileException
 from ckanext.dcat.interfaces import IDCATURIGenerator
 
 from ckan.views.home import index as index_endpoint
 from ckan.views.dataset import read as read_endpoint
 
+from werkzeug.http import is_resource_modified
+
 _ = toolkit._
 
 log = logging.getLogger(__name__)
@@ -33,12 +40,24 @@ CONTENT_TYPES = {
     'n3': 'text/n3',
     'ttl': 'text/turtle',
     'jsonld': 'application/ld+json',
+    'nt': 'application/n-triples',
+    'nq': 'application/n-quads',
 }
 
 DCAT_CLEAN_TAGS = 'ckanext.dcat.clean_tags'
 
 DEFAULT_CATALOG_ENDPOINT = '/catalog.{_format}'
 ENABLE_CONTENT_NEGOTIATION_CONFIG = 'ckanext.dcat.enable_content_negotiation'
+STREAM_CATALOG_CONFIG = 'ckanext.dcat.stream_catalog'
+CATALOG_MODIFIED_CACHE_TTL_CONFIG = 'ckanext.dcat.catalog_modified_cache_ttl'
+CATALOG_MODIFIED_FROM_PAGE_CONFIG = 'ckanext.dcat.catalog_modified_from_page'
+DEFAULT_CATALOG_MODIFIED_CACHE_TTL = 60
+ORGANIZATION_CACHE_TTL_CONFIG = 'ckanext.dcat.organization_cache_ttl'
+DEFAULT_ORGANIZATION_CACHE_TTL = 300
+CONDITIONAL_REQUESTS_CONFIG = 'ckanext.dcat.conditional_requests'
+
+# Date of the last change to an organization, shared by all processes
+ORGANIZATIONS_MODIFIED_KEY = 'ckanext-dcat:organizations:modified'
 
 
 def _get_package_type(id):
@@ -96,6 +115,490 @@ def field_labels():
     }
 
 
+class FrozenDict(dict):
+    '''
+    Read-only dict, for values shared between all callers in the process
+
+    Callers that need to modify the value should work on a copy (eg
+    `dict(value)`).
+    '''
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('{0} is read-only'.format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+def freeze(value):
+    '''
+    Returns a read-only copy of a structure of dicts and lists
+
+    Dicts are turned into `FrozenDict` instances and lists into tuples.
+    '''
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+# Cached results for dataset types without a scheming schema and for when
+# scheming is not enabled
+_NO_SCHEMA = object()
+_NO_SCHEMING = object()
+
+
+class DatasetSchemaCache(object):
+    '''
+    Process-wide cache of the scheming schemas of each dataset type
+
+    The schema is needed by every profile instance and on each
+    `after_dataset_show` and `before_dataset_index` call, so when reindexing
+    or harvesting the `scheming_dataset_schema_show` action would be
+    dispatched millions of times to return the same dict. Schemas are cached
+    by dataset type (keeping the `maxsize` most recently used ones) and
+    returned frozen, so callers can not modify the shared copy.
+
+    The cache is invalidated by the DCAT plugin when the CKAN config is
+    updated, as scheming reloads the schemas at that point.
+    '''
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._schemas = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, dataset_type='dataset'):
+        '''
+        Returns the scheming schema for a dataset type, or None if scheming
+        is not enabled
+
+        Raises `ObjectNotFound` if scheming has no schema for the dataset
+        type.
+        '''
+        with self._lock:
+            schema = self._schemas.get(dataset_type)
+            if schema is not None:
+                self._hits += 1
+                self._schemas.move_to_end(dataset_type)
+
+        if schema is None:
+            schema = self._load(dataset_type)
+            with self._lock:
+                self._misses += 1
+                self._schemas[dataset_type] = schema
+                while len(self._schemas) > self.maxsize:
+                    self._schemas.popitem(last=False)
+
+        if schema is _NO_SCHEMING:
+            return None
+        if schema is _NO_SCHEMA:
+            raise toolkit.ObjectNotFound(
+                'Unknown dataset schema: {0}'.format(dataset_type))
+        return schema
+
+    def _load(self, dataset_type):
+        try:
+            schema_show = toolkit.get_action('scheming_dataset_schema_show')
+        except KeyError:
+            return _NO_SCHEMING
+        try:
+            return freeze(schema_show({}, {'type': dataset_type}))
+        except toolkit.ObjectNotFound:
+            return _NO_SCHEMA
+
+    def invalidate(self):
+        '''
+        Clears all cached schemas and resets the stats
+        '''
+        with self._lock:
+            self._schemas = OrderedDict()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self):
+        '''
+        Returns a dict with the number of cached schemas and the cache hits
+        and misses
+        '''
+        return {
+            'entries': len(self._schemas),
+            'hits': self._hits,
+            'misses': self._misses,
+        }
+
+
+dataset_schema_cache = DatasetSchemaCache()
+
+
+class CatalogModificationCache(object):
+    '''
+    Process-wide cache of the last modification date of the catalog
+
+    The catalog `dct:modified` value is the most recent `metadata_modified`
+    of the public datasets, which takes a `package_search` call. Instead of
+    running it on every catalog request, the value is kept until a dataset
+    is created, updated or deleted (the DCAT plugin invalidates the cache on
+    these events) or for `ckanext.dcat.catalog_modified_cache_ttl` seconds,
+    so changes made in other processes are eventually picked up. A TTL of 0
+    disables the cache.
+    '''
+
+    def __init__(self):
+        self._value = None
+        self._expires = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self):
+        '''
+        Returns the most recent `metadata_modified` value of the datasets,
+        or None if there are no datasets
+        '''
+        with self._lock:
+            if time.monotonic() < self._expires:
+                self._hits += 1
+                return self._value
+
+        value = self._load()
+        ttl = self._ttl()
+        with self._lock:
+            self._misses += 1
+            if ttl > 0:
+                self._value = value
+                self._expires = time.monotonic() + ttl
+        return value
+
+    def _ttl(self):
+        try:
+            return int(config.get(
+                CATALOG_MODIFIED_CACHE_TTL_CONFIG,
+                DEFAULT_CATALOG_MODIFIED_CACHE_TTL))
+        except (TypeError, ValueError):
+            return DEFAULT_CATALOG_MODIFIED_CACHE_TTL
+
+    def _load(self):
+        context = {'ignore_auth': True}
+        result = toolkit.get_action('package_search')(
+            context,
+            {
+                'sort': 'metadata_modified desc',
+                'rows': 1,
+            },
+        )
+        if result and result.get('results'):
+            return result['results'][0]['metadata_modified']
+        return None
+
+    def invalidate(self):
+        '''
+        Drops the cached value, so it is searched again on the next call
+        '''
+        with self._lock:
+            self._value = None
+            self._expires = 0
+
+    def stats(self):
+        '''
+        Returns a dict with the cache hits and misses
+        '''
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+        }
+
+
+catalog_modification_cache = CatalogModificationCache()
+
+
+class OrganizationCache(object):
+    '''
+    Process-wide cache of the organizations used as publisher fallback
+
+    Datasets without publisher get the details of their organization, so
+    serializing a catalog page called `organization_show` for each dataset.
+    Organizations are cached by id (keeping the `maxsize` most recently used
+    ones) for `ckanext.dcat.organization_cache_ttl` seconds, and dropped by
+    the DCAT plugin when they are updated or deleted. As other processes
+    can't be notified, organizations loaded before the last organization
+    change (see `organizations_modified`) are dropped too. A TTL of 0
+    disables the cache.
+
+    Organizations are returned frozen, without their datasets, members or
+    followers. They are read from the database and dictized with the show
+    schema of their type, as `organization_show` does, but without its
+    dataset count search or `IOrganizationController.read` calls.
+    '''
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._orgs = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, org_id):
+        '''
+        Returns the organization dict, or None if it does not exist
+        '''
+        org_dict = self._cached(org_id, organizations_modified())
+        if org_dict is None:
+            loaded = _utcnow()
+            org_dict = self._load([org_id]).get(org_id)
+            self._store(org_id, org_dict, loaded)
+        return org_dict
+
+    def prefetch(self, org_ids):
+        '''
+        Loads with a single query the organizations not cached yet, eg those
+        of the datasets of a catalog page before serializing them
+
+        Repeated and empty ids are ignored. Prefetched organizations are not
+        counted as cache misses.
+        '''
+        if self._ttl() <= 0:
+            return
+        orgs_modified = organizations_modified()
+        missing = [
+            org_id for org_id in dict.fromkeys(org_ids)
+            if org_id
+            and self._cached(org_id, orgs_modified, count=False) is None
+        ]
+        if not missing:
+            return
+        loaded = _utcnow()
+        for org_id, org_dict in self._load(missing).items():
+            self._store(org_id, org_dict, loaded, miss=False)
+
+    def _cached(self, org_id, orgs_modified, count=True):
+        with self._lock:
+            entry = self._orgs.get(org_id)
+            if entry is None:
+                return None
+            expires, loaded, org_dict = entry
+            # If the last change can't be read, rely on the TTL
+            if (time.monotonic() >= expires
+                    or orgs_modified is not None and loaded < orgs_modified):
+                del self._orgs[org_id]
+                return None
+            if count:
+                self._hits += 1
+            self._orgs.move_to_end(org_id)
+            return org_dict
+
+    def _store(self, org_id, org_dict, loaded, miss=True):
+        ttl = self._ttl()
+        with self._lock:
+            if miss:
+                self._misses += 1
+            if ttl > 0 and org_dict is not None:
+                self._orgs[org_id] = (
+                    time.monotonic() + ttl, loaded, org_dict)
+                self._orgs.move_to_end(org_id)
+                while len(self._orgs) > self.maxsize:
+                    self._orgs.popitem(last=False)
+
+    def _ttl(self):
+        try:
+            return int(config.get(
+                ORGANIZATION_CACHE_TTL_CONFIG, DEFAULT_ORGANIZATION_CACHE_TTL))
+        except (TypeError, ValueError):
+            return DEFAULT_ORGANIZATION_CACHE_TTL
+
+    def _load(self, org_ids):
+        '''
+        Returns a dict with the organization dicts of the ids provided that
+        exist, keyed by id
+        '''
+        from sqlalchemy import orm
+        from ckan.lib import plugins as lib_plugins
+        from ckan.lib.dictization import model_dictize
+
+        groups = (
+            model.Session.query(model.Group)
+            .filter(model.Group.id.in_(org_ids))
+            .filter(model.Group.is_organization == True)  # noqa: E712
+            .options(orm.selectinload(model.Group._extras))
+        )
+
+        org_dicts = {}
+        for group in groups:
+            context = {
+                'model': model,
+                'session': model.Session,
+                'ignore_auth': True,
+            }
+            org_dict = model_dictize.group_dictize(
+                group, context,
+                packages_field=None,
+                include_groups=False,
+                include_tags=False,
+                include_users=False,
+            )
+            org_dict['num_followers'] = 0
+
+            group_plugin = lib_plugins.lookup_group_plugin(org_dict['type'])
+            if hasattr(group_plugin, 'show_group_schema'):
+                schema = group_plugin.show_group_schema()
+            elif hasattr(group_plugin, 'db_to_form_schema_options'):
+                schema = group_plugin.db_to_form_schema_options(
+                    {'type': 'show', 'api': False, 'context': context})
+            else:
+                schema = group_plugin.db_to_form_schema()
+            org_dict, _errors = lib_plugins.plugin_validate(
+                group_plugin, context, org_dict, schema, 'organization_show')
+
+            org_dicts[group.id] = freeze(org_dict)
+
+        return org_dicts
+
+    def invalidate(self, org_id=None):
+        '''
+        Drops an organization from the cache, or all of them if no id is
+        provided
+        '''
+        with self._lock:
+            if org_id is None:
+                self._orgs = OrderedDict()
+                self._hits = 0
+                self._misses = 0
+            else:
+                self._orgs.pop(org_id, None)
+
+    def stats(self):
+        '''
+        Returns a dict with the number of cached organizations and the cache
+        hits and misses
+        '''
+        return {
+            'entries': len(self._orgs),
+            'hits': self._hits,
+            'misses': self._misses,
+        }
+
+
+organization_cache = OrganizationCache()
+
+
+def _redis():
+    from ckan.lib.redis import connect_to_redis
+
+    return connect_to_redis()
+
+
+def organizations_modified():
+    '''
+    Returns the date (naive, in UTC) of the last time an organization was
+    created, updated or deleted, or `datetime.datetime.min` if unknown
+
+    Organizations are used as publisher fallback, so this is part of the
+    validators of the RDF endpoints responses. It is kept in Redis, so it
+    is the same for all processes. Returns None if it can not be read.
+    '''
+    try:
+        value = _redis().get(ORGANIZATIONS_MODIFIED_KEY)
+    except Exception:
+        log.warning('Could not read the organizations modification date',
+                    exc_info=True)
+        return None
+    if not value:
+        return datetime.datetime.min
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.datetime.min
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def set_organizations_modified():
+    '''
+    Records that organizations changed now (see `organizations_modified`)
+
+    Errors are logged, so they never break the organization changes.
+    '''
+    try:
+        _redis().set(ORGANIZATIONS_MODIFIED_KEY, _utcnow().isoformat())
+    except Exception:
+        log.warning('Could not update the organizations modification date',
+                    exc_info=True)
+
+
+class SchemaIndex(object):
+    '''
+    Lookups on a scheming dataset schema, computed once
+
+    Profiles check the schema for every value they parse or serialize, so
+    instead of scanning the field lists each time the fields are indexed by
+    name, and the flags derived from their presets and validators are
+    precomputed.
+    '''
+
+    def __init__(self, schema):
+        self.schema = schema
+
+        for entity in ('dataset', 'resource'):
+            fields = {}
+            multilingual = []
+            multiple_text = set()
+            repeating = []
+            subfields = {}
+            for field in schema.get(f'{entity}_fields', []):
+                name = field['field_name']
+                fields[name] = field
+                validators = field.get('validators') or ''
+                if any(v.startswith('fluent') for v in validators.split()):
+                    multilingual.append(name)
+                if 'scheming_multiple_text' in validators:
+                    multiple_text.add(name)
+                if 'repeating_subfields' in field:
+                    repeating.append(field)
+                    subfields[name] = [
+                        subfield.get('field_name')
+                        for subfield in field['repeating_subfields']
+                    ]
+
+            # Fields by name
+            setattr(self, f'{entity}_fields', fields)
+            # Names of the fields using the fluent presets
+            setattr(self, f'multilingual_{entity}_fields', multilingual)
+            # Names of the fields using the scheming_multiple_text validator
+            setattr(self, f'multiple_text_{entity}_fields', multiple_text)
+            # Fields with repeating subfields, in schema order
+            setattr(self, f'repeating_{entity}_fields', repeating)
+            # Field name -> names of its repeating subfields
+            setattr(self, f'{entity}_subfield_names', subfields)
+
+
+_schema_indexes = {}
+
+
+def schema_index(schema):
+    '''
+    Returns the `SchemaIndex` for a scheming dataset schema dict
+
+    Indexes are shared by all callers and rebuilt if scheming returns a
+    different object for the same dataset type (ie when the schemas are
+    reloaded).
+    '''
+    key = schema.get('dataset_type')
+    index = _schema_indexes.get(key)
+    if index is None or index.schema is not schema:
+        index = _schema_indexes[key] = SchemaIndex(schema)
+    return index
+
+
 def catalog_uri():
     '''
     Returns an URI for the whole catalog
@@ -269,6 +772,8 @@ def url_to_rdflib_format(_format):
         _format = 'pretty-xml'
     elif _format == 'jsonld':
         _format = 'json-ld'
+    elif _format == 'nq':
+        _format = 'nquads'
 
     return _format
 
@@ -283,6 +788,8 @@ def rdflib_to_url_format(_format):
         _format = 'xml'
     elif _format == 'json-ld':
         _format = 'jsonld'
+    elif _format == 'nquads':
+        _format = 'nq'
 
     return _format
 
@@ -393,6 +900,40 @@ def dcat_json_page():
     return datasets
 
 
+def _conditional_requests_enabled():
+    return toolkit.asbool(config.get(CONDITIONAL_REQUESTS_CONFIG, True))
+
+
+def _not_modified(etag, last_modified=None):
+    '''
+    Returns True if the validators match the `If-None-Match` or
+    `If-Modified-Since` headers of the request
+    '''
+    return not is_resource_modified(
+        toolkit.request.environ, etag=etag, last_modified=last_modified)
+
+
+def _response_encoding():
+    '''
+    Returns the encoding the response should be compressed with, or None
+    '''
+    return compression.negotiate_encoding(toolkit.request)
+
+
+def _encoded_etag(etag, encoding):
+    # Each encoding is a different representation, with its own ETag
+    if encoding:
+        return '{0}-{1}'.format(etag, encoding)
+    return etag
+
+
+def _set_encoding_headers(response, encoding):
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if compression.configured_encodings():
+        response.vary.add('Accept-Encoding')
+
+
 def read_dataset_page(_id, _format):
     if not _format:
         _format = check_access_header()
@@ -404,9 +945,36 @@ def read_dataset_page(_id, _format):
     if _profiles:
         _profiles = _profiles.split(',')
 
+    data_dict = {'id': _id, 'format': _format, 'profiles': _profiles}
+
+    encoding = _response_encoding()
+
+    # Imported here as the logic module depends on this one
+    from ckanext.dcat.logic import (
+        _output_cache_key, _public_dataset, dataset_validators)
+
+    # The dataset is read once for the validators and the output cache key
+    pkg = _public_dataset(data_dict)
+    validators = None
+    if _conditional_requests_enabled():
+        validators = dataset_validators(pkg, data_dict)
+    if validators:
+        etag = _encoded_etag(validators[0], encoding)
+        last_modified = validators[1]
+
+    context = {
+        'output_cache_key': _output_cache_key(pkg, data_dict),
+        # Compressed outputs are cached by the action as well
+        'encoding': encoding,
+    }
+
     try:
-        response = toolkit.get_action('dcat_dataset_show')({}, {'id': _id,
-            'format': _format, 'profiles': _profiles})
+        if validators and _not_modified(etag, last_modified):
+            toolkit.check_access('dcat_dataset_show', {}, data_dict)
+            response = None
+        else:
+            response = toolkit.get_action('dcat_dataset_show')(
+                context, data_dict)
     except toolkit.NotAuthorized:
         toolkit.abort(403)
     except toolkit.ObjectNotFound:
@@ -415,11 +983,47 @@ def read_dataset_page(_id, _format):
         toolkit.abort(409, str(e))
 
     from flask import make_response
-    response = make_response(response)
-    response.headers['Content-type'] = CONTENT_TYPES[_format]
+    if response is None:
+        response = make_response('', 304)
+        _set_encoding_headers(response, None)
+    else:
+        response = make_response(response)
+        response.headers['Content-type'] = CONTENT_TYPES[_format]
+        _set_encoding_headers(response, encoding)
+
+    if validators:
+        response.set_etag(etag)
+        response.last_modified = last_modified
 
     return response
 
+
+def _prerendered_page_file(_format, data_dict):
+    '''
+    Returns the path of the pre-rendered file for the catalog page
+    requested, or None if it has to be rendered live
+
+    Only pages of the catalog endpoint without other params than `page`
+    are pre-rendered.
+    '''
+    # Imported here as the prerender module depends on this one
+    from ckanext.dcat.prerender import catalog_path, page_file
+
+    if any(data_dict.get(key)
+           for key in ('modified_since', 'q', 'fq', 'profiles')):
+        return None
+    if toolkit.request.path != catalog_path(_format):
+        return None
+    try:
+        page = int(data_dict.get('page') or 1)
+    except ValueError:
+        return None
+    if page < 1:
+        return None
+
+    return page_file(page, _format)
+
+
 def read_catalog_page(_format):
     if not _format:
         _format = check_access_header()
@@ -440,13 +1044,75 @@ def read_catalog_page(_format):
         'profiles': _profiles,
     }
 
+    context = {}
+    if toolkit.asbool(config.get(STREAM_CATALOG_CONFIG, False)):
+        context['stream'] = True
+
+    # Imported here as the logic module depends on this one
+    from ckanext.dcat.logic import catalog_validators
+
+    encoding = _response_encoding()
+
+    # Pre-rendered pages and 304 responses don't go through the action
     try:
-        response = toolkit.get_action('dcat_catalog_show')({}, data_dict)
+        toolkit.check_access('dcat_catalog_show', {}, data_dict)
+    except toolkit.NotAuthorized:
+        toolkit.abort(403)
+
+    page_file = _prerendered_page_file(_format, data_dict)
+    if page_file:
+        if encoding:
+            # Compressed when rendering and kept next to the page. If it is
+            # not there yet, the page is sent uncompressed
+            variant = compression.fresh_variant_file(page_file, encoding)
+            if variant:
+                page_file = variant
+            else:
+                encoding = None
+        from flask import send_file
+        response = send_file(page_file, mimetype=CONTENT_TYPES[_format],
+                             conditional=True)
+        response.headers['Content-type'] = CONTENT_TYPES[_format]
+        _set_encoding_headers(response, encoding)
+        return response
+
+    validators = None
+    try:
+        conditional = _conditional_requests_enabled()
+        # Only conditional requests pay for a search of the first dataset,
+        # other ones get the validators computed from the page search results
+        if conditional and (toolkit.request.if_none_match
+                            or toolkit.request.if_modified_since):
+            validators = catalog_validators({}, data_dict)
+        if validators and _not_modified(
+                _encoded_etag(validators[0], encoding), validators[1]):
+            response = None
+        else:
+            context['with_validators'] = conditional
+            response = toolkit.get_action('dcat_catalog_show')(
+                context, data_dict)
+            validators = context.get('validators')
     except (toolkit.ValidationError, RDFProfileException) as e:
         toolkit.abort(409, str(e))
 
-    from flask import make_response
-    response = make_response(response)
-    response.headers['Content-type'] = CONTENT_TYPES[_format]
+    from flask import make_response, stream_with_context
+    if response is None:
+        response = make_response('', 304)
+        _set_encoding_headers(response, None)
+    else:
+        if context.get('stream'):
+            if encoding:
+                response = compression.iter_compress(response, encoding)
+            response = stream_with_context(response)
+        elif encoding:
+            response = compression.compress(response, encoding)
+        response = make_response(response)
+        response.headers['Content-type'] = CONTENT_TYPES[_format]
+        _set_encoding_headers(response, encoding)
+
+    if validators:
+        response.set_etag(_encoded_etag(validators[0], encoding))
+        if validators[1]:
+            response.last_modified = validators[1]
 
     return response
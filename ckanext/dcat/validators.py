@@ -1,8 +1,6 @@
 import datetime
 import json
-import re
 
-from dateutil.parser import parse as parse_date
 from ckantoolkit import (
     missing,
     StopOnError,
@@ -10,6 +8,16 @@ from ckantoolkit import (
     _,
 )
 
+from ckanext.dcat.dates import (  # noqa: F401
+    normalize_date,
+    is_date,
+    is_year,
+    is_year_month,
+    regexp_xsd_date,
+    regexp_xsd_year,
+    regexp_xsd_year_month,
+)
+
 try:
     from ckanext.scheming.validation import scheming_validator
 except ImportError:
@@ -17,33 +25,6 @@ except ImportError:
         return func
 
 
-# https://www.w3.org/TR/xmlschema11-2/#gYear
-regexp_xsd_year = re.compile(
-    r"-?([1-9][0-9]{3,}|0[0-9]{3})(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
-)
-
-# https://www.w3.org/TR/xmlschema11-2/#gYearMonth
-regexp_xsd_year_month = re.compile(
-    r"-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
-)
-
-regexp_xsd_date = re.compile(
-    r"-?([1-9][0-9]{3,}|0[0-9]{3})-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])(Z|(\+|-)((0[0-9]|1[0-3]):[0-5][0-9]|14:00))?"
-)
-
-
-def is_year(value):
-    return regexp_xsd_year.fullmatch(value)
-
-
-def is_year_month(value):
-    return regexp_xsd_year_month.fullmatch(value)
-
-
-def is_date(value):
-    return regexp_xsd_date.fullmatch(value)
-
-
 def dcat_date(key, data, errors, context):
     value = data[key]
 
@@ -55,14 +36,11 @@ def dcat_date(key, data, errors, context):
         return
 
     try:
-        if is_year(value) or is_year_month(value) or is_date(value):
-            return
+        datatype = normalize_date(value)[0]
     except TypeError:
         raise Invalid(_("Dates must be provided as strings or datetime objects"))
 
-    try:
-        parse_date(value)
-    except ValueError:
+    if datatype is None:
         raise Invalid(
             _(
                 "Date format incorrect. Supported formats are YYYY, YYYY-MM, YYYY-MM-DD and YYYY-MM-DDTHH:MM:SS"